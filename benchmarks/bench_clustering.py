@@ -0,0 +1,132 @@
+"""
+Subject-Profile und Distanzmatrizen: clustering (Masken-Matrixprodukte, DTW über alle Paare) vs Schleifen.
+
+Synthetische Transitionstabelle mit Subject-Gruppen (unterschiedliche Lernkurven über die
+Blöcke), fehlenden Blöcken und fehlenden Zellen. Verglichen wird mit dem Vorgehen ohne das
+Modul: Profil per Schleife über Subjects, Distanzen per Schleife über Paare (pandas
+Series.corr, NumPy-Abstand, DTW in Python). Die Schleifen laufen nur bis --naive-max
+Subjects; bei größeren Korpora wird nur clustering gemessen.
+Aufruf:
+    python benchmarks/bench_clustering.py [--subjects 100 300 800] [--naive-max 150]
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from midi_state_analysis.clustering import _block_cube, cluster_subjects, pairwise_distances, profile_matrix
+
+BLOCKS = ["Pretest", "B1", "B2", "B3", "B4", "B5", "B6", "B7", "B8", "Posttest"]
+TRANSITIONS = [12, 23, 34, 45, 56, 67, 78, 89, 91, 13, 35, 57]
+
+
+def synthetic_transitions(n_subjects: int, rng: np.random.Generator) -> pd.DataFrame:
+    """Drei Lernkurven-Typen, 10 % fehlende Blöcke, 5 % fehlende Zellen, 4 Wiederholungen je Zelle."""
+    group = rng.integers(0, 3, n_subjects)
+    slope = np.array([-0.10, -0.02, 0.04])[group]
+    subject, block, tid, time_s = [], [], [], []
+    for s in range(n_subjects):
+        for b, name in enumerate(BLOCKS):
+            if rng.random() < 0.1:
+                continue
+            for t in TRANSITIONS:
+                if rng.random() < 0.05:
+                    continue
+                values = 1.8 + slope[s] * b + 0.02 * (t % 10) + rng.normal(0, 0.15, 4)
+                subject += [f"S{s:04d}"] * 4
+                block += [name] * 4
+                tid += [t] * 4
+                time_s.extend(values)
+    return pd.DataFrame({"subject": subject, "block": block, "transition_id": tid, "transition_time_s": time_s})
+
+
+def naive_profiles(df: pd.DataFrame, columns) -> pd.DataFrame:
+    rows = {}
+    for subject, group in df.groupby("subject"):
+        means = group.groupby(["block", "transition_id"])["transition_time_s"].mean()
+        rows[subject] = means.reindex(columns)
+    return pd.DataFrame(rows).T
+
+
+def naive_distances(profiles: pd.DataFrame, metric: str) -> np.ndarray:
+    values = profiles.to_numpy(float)
+    cube = _block_cube(profiles)
+    n = len(values)
+    out = np.zeros((n, n))
+
+    def euclid(a, b):
+        m = ~np.isnan(a) & ~np.isnan(b)
+        return np.sqrt(((a[m] - b[m]) ** 2).sum() * len(a) / m.sum()) if m.any() else np.inf
+
+    def dtw(a, b):
+        a = [row for row in a if not np.isnan(row).all()]
+        b = [row for row in b if not np.isnan(row).all()]
+        acc = np.full((len(a) + 1, len(b) + 1), np.inf)
+        acc[0, 0] = 0.0
+        for i in range(1, len(a) + 1):
+            for j in range(1, len(b) + 1):
+                acc[i, j] = euclid(a[i - 1], b[j - 1]) + min(acc[i - 1, j], acc[i, j - 1], acc[i - 1, j - 1])
+        return acc[-1, -1]
+
+    series = [profiles.iloc[i] for i in range(n)]
+    for i in range(n):
+        for j in range(i + 1, n):
+            if metric == "correlation":
+                d = 1 - series[i].corr(series[j])
+            elif metric == "euclidean":
+                d = euclid(values[i], values[j])
+            else:
+                d = dtw(cube[i], cube[j])
+            out[i, j] = out[j, i] = d
+    return out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--subjects", type=int, nargs="+", default=[100, 300, 800])
+    parser.add_argument("--naive-max", type=int, default=150)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'Subjects':>8} {'Schritt':<22} {'Modul s':>9} {'Schleife s':>11} {'Speedup':>8} {'max |Δ|':>9}")
+    for n_subjects in args.subjects:
+        df = synthetic_transitions(n_subjects, np.random.default_rng(args.seed))
+        naive = n_subjects <= args.naive_max
+
+        start = time.perf_counter()
+        profiles = profile_matrix(df)
+        t_ours = time.perf_counter() - start
+        steps = [("profile_matrix", t_ours, None, None)]
+        if naive:
+            start = time.perf_counter()
+            ref = naive_profiles(df, profiles.columns)
+            steps[0] = ("profile_matrix", t_ours, time.perf_counter() - start,
+                        np.nanmax(np.abs(ref.to_numpy(float) - profiles.to_numpy(float))))
+
+        for metric in ("correlation", "euclidean", "dtw"):
+            start = time.perf_counter()
+            dist = pairwise_distances(profiles, metric).to_numpy()
+            t_ours = time.perf_counter() - start
+            if naive:
+                start = time.perf_counter()
+                ref = naive_distances(profiles, metric)
+                steps.append((metric, t_ours, time.perf_counter() - start, np.nanmax(np.abs(ref - dist))))
+            else:
+                steps.append((metric, t_ours, None, None))
+
+        start = time.perf_counter()
+        cluster_subjects(profiles, n_clusters=3, method="average", metric="dtw")
+        steps.append(("cluster average/dtw", time.perf_counter() - start, None, None))
+        start = time.perf_counter()
+        cluster_subjects(profiles, n_clusters=3, method="kmeans")
+        steps.append(("cluster kmeans", time.perf_counter() - start, None, None))
+
+        for name, t_ours, t_ref, delta in steps:
+            ref_text = f"{t_ref:>11.3f} {t_ref / t_ours:>7.0f}x {delta:>9.1e}" if t_ref is not None else f"{'–':>11} {'–':>8} {'–':>9}"
+            print(f"{n_subjects:>8} {name:<22} {t_ours:>9.3f} {ref_text}")
+
+
+if __name__ == "__main__":
+    main()
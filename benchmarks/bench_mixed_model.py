@@ -0,0 +1,89 @@
+"""
+Gemischtes Modell transition_time_s ~ block * freq + (1|subject): fit_mixed_model vs statsmodels MixedLM.
+
+Synthetische Daten in der Struktur der Studie (10 Blöcke, h/s, Subject-Abschnitt,
+schiefe Übergangszeiten) bei wachsender Zeilenzahl. Verglichen werden Laufzeit und
+Genauigkeit: Log-Likelihood, Varianzkomponenten, Zellmittel und deren Standardfehler.
+MixedLM bekommt dasselbe Modell in Zellmittel-Kodierung (0 + C(cell)), die Parameter sind
+also direkt vergleichbar.
+Aufruf:
+    python benchmarks/bench_mixed_model.py [--rows 10000 100000 300000] [--subjects 40] [--reml|--ml]
+"""
+
+import argparse
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+import statsmodels.formula.api as smf
+
+from midi_state_analysis.mixed_model import fit_mixed_model
+
+BLOCKS = ["Pretest", "B1", "B2", "B3", "B4", "B5", "B6", "B7", "B8", "Posttest"]
+
+
+def synthetic_transitions(n_rows: int, n_subjects: int, rng: np.random.Generator) -> pd.DataFrame:
+    """Lernkurve über die Blöcke, s langsamer als h, Subject-Abschnitt und lognormales Rauschen."""
+    subject = rng.integers(0, n_subjects, n_rows)
+    block = rng.integers(0, len(BLOCKS), n_rows)
+    rare = rng.random(n_rows) < 0.2
+    subject_effect = rng.normal(0, 0.3, n_subjects)
+    mean = 1.6 - 0.08 * block + 0.25 * rare + 0.02 * block * rare + subject_effect[subject]
+    time_s = mean + rng.lognormal(-1.0, 0.6, n_rows)
+    return pd.DataFrame({
+        "subject": np.char.add("S", subject.astype(str)),
+        "block": np.asarray(BLOCKS)[block],
+        "state_from_freq": np.where(rare, "s", "h"),
+        "transition_time_s": time_s,
+    })
+
+
+def fit_statsmodels(df: pd.DataFrame, blocks, freqs, reml: bool):
+    """MixedLM in Zellmittel-Kodierung; Zellen in derselben Reihenfolge wie fit_mixed_model."""
+    cell_names = [f"{block}|{freq}" for block in blocks for freq in freqs]
+    data = df.assign(cell=pd.Categorical(df["block"] + "|" + df["state_from_freq"], categories=cell_names))
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        model = smf.mixedlm("transition_time_s ~ 0 + C(cell)", data, groups=data["subject"])
+        return model.fit(reml=reml)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 300_000])
+    parser.add_argument("--subjects", type=int, default=40)
+    parser.add_argument("--seed", type=int, default=0)
+    method = parser.add_mutually_exclusive_group()
+    method.add_argument("--reml", dest="reml", action="store_true", default=True)
+    method.add_argument("--ml", dest="reml", action="store_false")
+    args = parser.parse_args()
+
+    print(f"{'Zeilen':>8} {'sparse s':>9} {'MixedLM s':>10} {'Speedup':>8} {'Δ loglik':>9} "
+          f"{'Δ σ_b² rel':>10} {'Δ σ² rel':>9} {'Δ Mittel':>9} {'Δ SE rel':>9}")
+    for n_rows in args.rows:
+        df = synthetic_transitions(n_rows, args.subjects, np.random.default_rng(args.seed))
+
+        start = time.perf_counter()
+        ours = fit_mixed_model(df, reml=args.reml)
+        t_ours = time.perf_counter() - start
+
+        start = time.perf_counter()
+        ref = fit_statsmodels(df, ours.blocks, ours.freqs, args.reml)
+        t_ref = time.perf_counter() - start
+
+        ref_var_subject = float(ref.cov_re.iloc[0, 0])
+        n_fe = len(ours.cell_means)
+        ref_se = np.sqrt(np.diag(ref.cov_params().to_numpy()[:n_fe, :n_fe]))
+        print(
+            f"{n_rows:>8} {t_ours:>9.3f} {t_ref:>10.2f} {t_ref / t_ours:>7.0f}x "
+            f"{ours.loglik - ref.llf:>9.1e} "
+            f"{abs(ours.sigma2_subject - ref_var_subject) / ref_var_subject:>10.1e} "
+            f"{abs(ours.sigma2 - ref.scale) / ref.scale:>9.1e} "
+            f"{np.abs(ours.cell_means - ref.fe_params.to_numpy()).max():>9.1e} "
+            f"{(np.abs(np.sqrt(np.diag(ours.cov)) - ref_se) / ref_se).max():>9.1e}"
+        )
+
+
+if __name__ == "__main__":
+    main()
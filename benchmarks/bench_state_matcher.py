@@ -0,0 +1,104 @@
+"""
+Durchsatz des State-Matchers bei wachsender Vokabulargröße (9, 100, 1000 States).
+
+Vergleicht den inkrementellen StateMatcher (invertierter Index + Zähler) mit dem
+linearen Scan über alle Definitionen, wie ihn detect_states_in_midi früher nutzte.
+Aufruf:
+    python benchmarks/bench_state_matcher.py [--events 200000] [--seed 0]
+"""
+
+import argparse
+import random
+import time
+
+import numpy as np
+
+from midi_state_analysis import STATE_DEFS, StateMatcher, detect_states_from_notes
+
+PITCH_RANGE = range(48, 85)
+
+
+def random_vocabulary(n_states: int, rng: random.Random) -> dict:
+    """Zufälliges Vokabular mit Akkordgrößen 3-8; die ersten 9 States sind STATE_DEFS."""
+    state_defs = {state: set(notes) for state, notes in STATE_DEFS.items()}
+    seen = {frozenset(notes) for notes in state_defs.values()}
+    state = max(state_defs) + 1
+    while len(state_defs) < n_states:
+        combo = frozenset(rng.sample(PITCH_RANGE, rng.randint(3, 8)))
+        if combo in seen:
+            continue
+        seen.add(combo)
+        state_defs[state] = set(combo)
+        state += 1
+    return state_defs
+
+
+def random_performance(state_defs: dict, n_events: int, rng: random.Random):
+    """Note-Stream, der zufällige States anschlägt und loslässt (mit gelegentlichen Fehltönen)."""
+    states = list(state_defs)
+    time_s, pitch, is_on = [], [], []
+    t = 0.0
+    while len(pitch) < n_events:
+        notes = list(state_defs[rng.choice(states)])
+        if rng.random() < 0.2:
+            notes.append(rng.choice(PITCH_RANGE))
+        for note in notes:
+            t += 0.01
+            time_s.append(t); pitch.append(note); is_on.append(True)
+        for note in notes:
+            t += 0.01
+            time_s.append(t); pitch.append(note); is_on.append(False)
+    return np.asarray(time_s), np.asarray(pitch, dtype=np.uint8), np.asarray(is_on)
+
+
+def linear_scan(time_s, pitch, is_on, state_defs: dict) -> int:
+    """Referenz: exakter Treffer per frozenset, sonst erster Subset-Treffer."""
+    combo_to_state = {frozenset(notes): state for state, notes in state_defs.items()}
+    ordered = sorted(state_defs.items(), key=lambda item: (-len(item[1]), item[0]))
+    pressed = set()
+    last_state, n_changes = None, 0
+    for note, on in zip(pitch.tolist(), is_on.tolist()):
+        if on:
+            pressed.add(note)
+        else:
+            pressed.discard(note)
+        state = combo_to_state.get(frozenset(pressed))
+        if state is None:
+            for state_id, notes in ordered:
+                if notes.issubset(pressed):
+                    state = state_id
+                    break
+        if state is not None and state != last_state:
+            n_changes += 1
+            last_state = state
+    return n_changes
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--events", type=int, default=200_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'States':>7} {'Matcher ev/s':>14} {'Linear ev/s':>14} {'Speedup':>8} {'gleich':>7}")
+    for n_states in (9, 100, 1000):
+        rng = random.Random(args.seed)
+        state_defs = random_vocabulary(n_states, rng)
+        time_s, pitch, is_on = random_performance(state_defs, args.events, rng)
+        matcher = StateMatcher(state_defs)
+
+        start = time.perf_counter()
+        events = detect_states_from_notes(time_s, pitch, is_on, matcher)
+        t_matcher = time.perf_counter() - start
+
+        start = time.perf_counter()
+        n_linear = linear_scan(time_s, pitch, is_on, state_defs)
+        t_linear = time.perf_counter() - start
+
+        n = len(pitch)
+        print(f"{n_states:>7} {n / t_matcher:>14,.0f} {n / t_linear:>14,.0f} "
+              f"{t_linear / t_matcher:>7.1f}x {str(len(events) == n_linear):>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,537 @@
+"""
+Benchmark-Suite der Hot Paths mit gespeicherter Baseline und Äquivalenzprüfung.
+
+Fälle (je Korpusgröße, synthetische Dateien mit festem Seed):
+    detect_states_in_midi       State-Erkennung auf bereits geladenen MIDI-Dateien
+    compute_transitions         Transitionen aus den erkannten State-Events
+    analyze_root_folder         Ende zu Ende: Ordner -> CSV
+    iter_results_threaded       Generator-API mit 4 Threads
+    summarize_transition_times  Kennzahlen je Block × Transition
+    run_anova                   zweifaktorielle OLS-ANOVA
+    finger_loader               midi_finger_analysis/load_MIDI_finger.py (braucht pretty_midi)
+
+Gemessen werden nach einem ungemessenen Aufwärmlauf die beste Laufzeit aus --repeat
+Läufen und der Speicher-Spitzenwert (tracemalloc, eigener Lauf); Eingaben eines Falls
+(geladene MIDI-Dateien, Events, Tabelle) werden vorher aufgebaut und nicht mitgemessen. Äquivalenz: Erkennung und Transitionen werden mit der
+ursprünglichen zeilenweisen Implementierung verglichen, analyze_root_folder zusätzlich
+mit dem Event-Store-Pfad, die Ergebnisse des Thread-Pools (iter_results, max_workers=4)
+je Datei mit dem seriellen Lauf und die Kennzahlen mit der SQLite-Aggregation. Jede
+Ausgabe bekommt einen Digest; weicht er von der Baseline ab, hat sich das Ergebnis
+geändert.
+
+Baseline: benchmarks/baseline.json (im Repo, mit Rechner- und Versionsangaben in "meta").
+Zeiten anderer Rechner sind nur grob vergleichbar; dann mit --save-baseline eine eigene
+anlegen. Die Digests sind rechnerunabhängig.
+
+Aufruf (aus dem Repo-Wurzelordner oder von überall, der Ordner wird in sys.path ergänzt):
+    python benchmarks/run_benchmarks.py [--sizes 2 8 32] [--repeat 5] [--only detect_states_in_midi ...]
+    python benchmarks/run_benchmarks.py --save-baseline          # benchmarks/baseline.json schreiben
+Exit-Code 1 bei Regression (Zeit oder Speicher > Baseline · (1 + --threshold) und mindestens
+MIN_REGRESSION_S bzw. MIN_REGRESSION_MB mehr), geändertem Ergebnis oder Abweichung von der Referenz.
+"""
+
+import argparse
+import contextlib
+import hashlib
+import io
+import json
+import os
+import platform
+import random
+import runpy
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from functools import cached_property
+
+import mido
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from midi_state_analysis import (
+    STATE_DEFS,
+    TEST_TRANSITION_SEQUENCE,
+    BLOCK_TRANSITION_SEQUENCE,
+    TRANSITION_FREQUENCIES,
+    ProgressReporter,
+    ResultStore,
+    analyze_event_store,
+    analyze_root_folder,
+    build_event_store,
+    compute_transition_id,
+    compute_transitions,
+    detect_states_in_midi,
+    get_sec_per_tick,
+    get_transition_sequence,
+    iter_results,
+    merge_music_tracks,
+    open_midi_file,
+    parse_subject_and_block,
+    normalize_block_name,
+    choose_freq_pattern,
+)
+from midi_state_analysis.anova_Transition import run_anova
+from midi_state_analysis.statistical_analysis import summarize_from_store, summarize_transition_times
+from midi_state_analysis.transition_data import prepare_dataframe
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baseline.json")
+FINGER_LOADER = os.path.join(BENCH_DIR, os.pardir, "midi_finger_analysis", "load_MIDI_finger.py")
+BLOCKS = ["Pretest"] + [f"B{k}" for k in range(1, 9)] + ["Posttest"]
+FINGER_PATTERN = [65, 60, 64, 62, 65]  # F4 C4 E4 D4 F4
+# Zeitunterschiede darunter gelten als Messrauschen (kurze Fälle, andere Rechnerlast)
+MIN_REGRESSION_S = 0.02
+MIN_REGRESSION_MB = 0.1
+
+
+# =========================
+# Synthetischer Korpus
+# =========================
+def _states_for(sequence) -> list:
+    states = [sequence[0] // 10]
+    states.extend(tid % 10 for tid in sequence)
+    return states
+
+
+def _save_track(path: str, events: list, rng: random.Random) -> None:
+    """events: (tick, an?, pitch, velocity); Loslassen abwechselnd als note_off / note_on mit 0."""
+    mid = mido.MidiFile(ticks_per_beat=480)
+    meta = mido.MidiTrack()
+    meta.append(mido.MetaMessage("set_tempo", tempo=500000))
+    track = mido.MidiTrack()
+    mid.tracks.extend([meta, track])
+    last = 0
+    for tick, on, note, velocity in sorted(events, key=lambda e: (e[0], e[1])):
+        if on:
+            track.append(mido.Message("note_on", note=note, velocity=velocity, time=tick - last))
+        else:
+            kind = "note_off" if rng.random() < 0.5 else "note_on"
+            track.append(mido.Message(kind, note=note, velocity=0, time=tick - last))
+        last = tick
+    mid.save(path)
+
+
+def _write_state_file(path: str, states: list, rng: random.Random) -> None:
+    """Akkordfolge mit gestaffelten Anschlägen, gelegentlichem Fehlton und variabler Haltedauer."""
+    events = []
+    tick = rng.randint(500, 3000)
+    for state in states:
+        notes = sorted(STATE_DEFS[state])
+        rng.shuffle(notes)
+        for note in notes:
+            events.append((tick, 1, note, rng.randint(40, 110)))
+            tick += rng.randint(0, 40)
+        if rng.random() < 0.1:
+            events += [(tick, 1, 50, 60), (tick + 100, 0, 50, 0)]
+        hold = rng.randint(400, 2500)
+        events += [(tick + hold + rng.randint(0, 60), 0, note, 0) for note in notes]
+        tick += hold + rng.randint(50, 300)
+    _save_track(path, events, rng)
+
+
+def _write_finger_file(path: str, rng: random.Random, n_notes: int = 80) -> None:
+    """Einzeltöne des Fingertests (F4 C4 E4 D4 F4) mit gelegentlichen Fehlgriffen, < 30 s."""
+    events = []
+    tick = 100
+    for i in range(n_notes):
+        note = FINGER_PATTERN[i % len(FINGER_PATTERN)]
+        if rng.random() < 0.08:
+            note = rng.choice([59, 62, 64, 67])
+        events += [(tick, 1, note, rng.randint(50, 100)), (tick + rng.randint(60, 150), 0, note, 0)]
+        tick += rng.randint(120, 300)
+    _save_track(path, events, rng)
+
+
+def build_corpus(root: str, n_subjects: int, seed: int = 0) -> None:
+    """root/states/Daten (MIDI)/<Subject>/MIDI_<Subject>_<Block>.mid und root/finger/... (4 Fingertests)."""
+    rng = random.Random(seed)
+    for i in range(n_subjects):
+        subject = f"S{i:03d}BM"
+        state_dir = os.path.join(root, "states", "Daten (MIDI)", subject)
+        finger_dir = os.path.join(root, "finger", "Daten (MIDI)", subject)
+        os.makedirs(state_dir)
+        os.makedirs(finger_dir)
+        for block in BLOCKS:
+            sequence = TEST_TRANSITION_SEQUENCE if "test" in block else BLOCK_TRANSITION_SEQUENCE
+            _write_state_file(os.path.join(state_dir, f"MIDI_{subject}_{block}.mid"), _states_for(sequence), rng)
+        for attempt in range(1, 5):
+            _write_finger_file(os.path.join(finger_dir, f"MIDI_{subject}_Finger{attempt}.mid"), rng)
+
+
+# =========================
+# Referenz (ursprüngliche zeilenweise Implementierung)
+# =========================
+def reference_detect_states(mid: mido.MidiFile) -> pd.DataFrame:
+    combo_to_state = {frozenset(notes): state for state, notes in STATE_DEFS.items()}
+    sec_per_tick = get_sec_per_tick(mid)
+    pressed = set()
+    events = []
+    last_state = None
+    ticks = 0
+    for msg in merge_music_tracks(mid):
+        ticks += msg.time
+        if msg.type == "note_on" and msg.velocity > 0:
+            pressed.add(msg.note)
+        elif msg.type in ("note_on", "note_off"):
+            pressed.discard(msg.note)
+        state = None
+        extra_keys = []
+        if len(pressed) == 6:
+            state = combo_to_state.get(frozenset(pressed))
+        elif len(pressed) > 6:
+            for state_id, state_notes in STATE_DEFS.items():
+                if set(state_notes).issubset(pressed):
+                    state = state_id
+                    extra_keys = list(pressed - set(state_notes))
+                    break
+        if state is not None and state != last_state:
+            events.append({
+                "time_s": ticks * sec_per_tick,
+                "state": state,
+                "extra_keys": extra_keys if extra_keys else None,
+                "total_keys_pressed": len(pressed),
+            })
+            last_state = state
+    return pd.DataFrame(events)
+
+
+def reference_compute_transitions(events: pd.DataFrame) -> pd.DataFrame:
+    rows = []
+    for i in range(len(events) - 1):
+        t1, s1 = events.iloc[i]["time_s"], events.iloc[i]["state"]
+        t2, s2 = events.iloc[i + 1]["time_s"], events.iloc[i + 1]["state"]
+        rows.append({
+            "idx_from": i, "state_from": s1, "onset_from_s": t1,
+            "idx_to": i + 1, "state_to": s2, "onset_to_s": t2,
+            "transition_time_s": t2 - t1, "transition_id": compute_transition_id(s1, s2),
+        })
+    return pd.DataFrame(rows)
+
+
+def reference_analyze(paths: list) -> pd.DataFrame:
+    frames = []
+    for path in paths:
+        subject, block = parse_subject_and_block(*os.path.split(path))
+        block = normalize_block_name(block)
+        events = reference_detect_states(open_midi_file(path))
+        transitions = reference_compute_transitions(events)
+        if transitions.empty:
+            continue
+        pattern = choose_freq_pattern(block, len(events))
+        sequence = get_transition_sequence("Test" if pattern == "Test" else "Block")
+        transitions = transitions[transitions["transition_id"].isin(sequence)].copy()
+        transitions["state_from_freq"] = transitions["transition_id"].map(
+            lambda tid: TRANSITION_FREQUENCIES.get(int(tid), "UNKNOWN"))
+        transitions["subject"] = subject
+        transitions["block"] = block
+        frames.append(transitions)
+    return pd.concat(frames, ignore_index=True)
+
+
+# =========================
+# Vergleich / Digest
+# =========================
+def frames_equal(a: pd.DataFrame, b: pd.DataFrame, rtol: float = 0.0) -> bool:
+    """Gleiche Spalten (von b), gleiche Werte; Zahlen exakt bzw. bis rtol."""
+    if len(a) != len(b) or not set(b.columns) <= set(a.columns):
+        return False
+    for col in b.columns:
+        left, right = a[col].reset_index(drop=True), b[col].reset_index(drop=True)
+        if pd.api.types.is_numeric_dtype(left) and pd.api.types.is_numeric_dtype(right):
+            if not np.allclose(left.to_numpy(float), right.to_numpy(float), rtol=rtol, atol=0.0, equal_nan=True):
+                return False
+        elif not (left.astype(str) == right.astype(str)).all():
+            return False
+    return True
+
+
+def _events_equal(events, reference: pd.DataFrame) -> bool:
+    frame = events.to_frame()
+    if not frames_equal(frame, reference[["time_s", "state", "total_keys_pressed"]] if len(reference) else reference):
+        return False
+    extra = [sorted(keys) if keys else None for keys in frame.get("extra_keys", [])]
+    ref_extra = [sorted(keys) if keys else None for keys in reference.get("extra_keys", [])]
+    return extra == ref_extra
+
+
+def digest(output) -> str:
+    """Stabiler Kurz-Hash einer Ausgabe (DataFrames auf 9 Nachkommastellen gerundet)."""
+    h = hashlib.sha256()
+    items = output if isinstance(output, list) else [output]
+    for item in items:
+        if item is None:
+            h.update(b"\0")
+            continue
+        if isinstance(item, bytes):
+            h.update(item)
+            continue
+        if not isinstance(item, pd.DataFrame):
+            item = item.to_frame()
+        h.update(item.round(9).to_csv(index=False).encode("utf-8"))
+    return h.hexdigest()[:16]
+
+
+# =========================
+# Fälle
+# =========================
+class Fixtures:
+    """Korpus einer Größe plus daraus abgeleitete Eingaben (lazy, einmal je Größe)."""
+
+    def __init__(self, workdir: str, n_subjects: int, seed: int):
+        self.workdir = workdir
+        build_corpus(workdir, n_subjects, seed)
+        self.midi_root = os.path.join(workdir, "states", "Daten (MIDI)")
+        self.finger_dir = os.path.join(workdir, "finger")
+        self.paths = sorted(
+            os.path.join(dirpath, name) for dirpath, _, names in os.walk(self.midi_root) for name in names
+        )
+
+    @cached_property
+    def mids(self) -> list:
+        return [open_midi_file(path) for path in self.paths]
+
+    @cached_property
+    def events(self) -> list:
+        return [detect_states_in_midi(mid) for mid in self.mids]
+
+    @cached_property
+    def csv_bytes(self) -> bytes:
+        return self.analyze()
+
+    @cached_property
+    def table(self) -> pd.DataFrame:
+        return prepare_dataframe(pd.read_csv(io.BytesIO(self.csv_bytes), encoding="utf-8-sig"))
+
+    @cached_property
+    def result_db(self) -> str:
+        path = os.path.join(self.workdir, "result.sqlite")
+        analyze_root_folder(self.midi_root, path, progress=_quiet_progress())
+        return path
+
+    def analyze(self) -> bytes:
+        output = os.path.join(self.workdir, "out.csv")
+        analyze_root_folder(self.midi_root, output, progress=_quiet_progress())
+        with open(output, "rb") as fh:
+            return fh.read()
+
+
+def _quiet_progress() -> ProgressReporter:
+    return ProgressReporter(stream=io.StringIO())
+
+
+def _check_detect(fx: Fixtures, output) -> str | None:
+    reference = [reference_detect_states(mid) for mid in fx.mids]
+    bad = sum(not _events_equal(events, ref) for events, ref in zip(output, reference))
+    return f"{bad} Dateien weichen von der Referenz ab" if bad else None
+
+
+def _check_transitions(fx: Fixtures, output) -> str | None:
+    reference = [reference_compute_transitions(events.to_frame()) for events in fx.events]
+    bad = sum(not frames_equal(table.to_frame(), ref) for table, ref in zip(output, reference) if len(ref))
+    return f"{bad} Dateien weichen von der Referenz ab" if bad else None
+
+
+def _check_analyze(fx: Fixtures, output: bytes) -> str | None:
+    problems = []
+    df = pd.read_csv(io.BytesIO(output), encoding="utf-8-sig")
+    reference = reference_analyze(fx.paths)
+    # CSV-Rundreise: Referenz ebenfalls über to_csv/read_csv
+    reference = pd.read_csv(io.StringIO(reference.to_csv(index=False)))
+    if not frames_equal(df, reference):
+        problems.append("Referenz")
+    store = os.path.join(fx.workdir, "notes.store")
+    if not os.path.exists(store):
+        build_event_store(fx.midi_root, store)
+    store_csv = os.path.join(fx.workdir, "store.csv")
+    analyze_event_store(store, store_csv, progress=_quiet_progress())
+    with open(store_csv, "rb") as fh:
+        if fh.read() != output:
+            problems.append("Event-Store")
+    return f"weicht ab: {', '.join(problems)}" if problems else None
+
+
+THREAD_WORKERS = 4
+THREAD_CHECK_RUNS = 5
+
+
+def _run_threaded(fx: Fixtures) -> list:
+    return [result.to_frame() for result in iter_results(fx.paths, max_workers=THREAD_WORKERS)]
+
+
+def _check_threaded(fx: Fixtures, output: list) -> str | None:
+    """Jede Datei wie im seriellen Lauf, über mehrere Läufe (Wettlaufsituationen sind selten)."""
+    serial = [result.to_frame() for result in iter_results(fx.paths)]
+    # Häufige Thread-Wechsel, damit geteilter Zustand zwischen Threads sicher auffällt
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-5)
+    try:
+        runs = [output] + [_run_threaded(fx) for _ in range(THREAD_CHECK_RUNS - 1)]
+    finally:
+        sys.setswitchinterval(interval)
+    bad = 0
+    for frames in runs:
+        for frame, ref in zip(frames, serial):
+            if (frame is None) != (ref is None) or (ref is not None and not frames_equal(frame, ref)):
+                bad += 1
+    return f"{bad} Ergebnisse in {len(runs)} Läufen weichen vom seriellen Lauf ab" if bad else None
+
+
+def _check_summarize(fx: Fixtures, output: pd.DataFrame) -> str | None:
+    reference = summarize_from_store(ResultStore(fx.result_db), ["block", "transition_id"])
+    # SQLite rechnet std über die Quadratsumme: gleich bis auf Rundung
+    return None if frames_equal(output, reference, rtol=1e-7) else "weicht von der SQLite-Aggregation ab"
+
+
+def _run_finger_loader(fx: Fixtures) -> pd.DataFrame:
+    cwd = os.getcwd()
+    os.chdir(fx.finger_dir)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            runpy.run_path(FINGER_LOADER, run_name="__main__")
+        return pd.read_csv(os.path.join(fx.finger_dir, "fingergeschicklichkeit.csv"))
+    finally:
+        os.chdir(cwd)
+
+
+def _finger_available() -> str | None:
+    try:
+        import pretty_midi  # noqa: F401
+    except ImportError:
+        return "übersprungen: pretty_midi fehlt"
+    return None
+
+
+# name -> (Lauf, Äquivalenzprüfung oder None, Voraussetzung oder None, vorab aufzubauende Fixtures)
+CASES = {
+    "detect_states_in_midi": (
+        lambda fx: [detect_states_in_midi(mid) for mid in fx.mids], _check_detect, None, ("mids",)),
+    "compute_transitions": (
+        lambda fx: [compute_transitions(events) for events in fx.events], _check_transitions, None, ("events",)),
+    "analyze_root_folder": (lambda fx: fx.analyze(), _check_analyze, None, ()),
+    "iter_results_threaded": (_run_threaded, _check_threaded, None, ()),
+    "summarize_transition_times": (
+        lambda fx: summarize_transition_times(fx.table, ["block", "transition_id"]), _check_summarize, None,
+        ("table",)),
+    "run_anova": (lambda fx: run_anova(fx.table).reset_index(), None, None, ("table",)),
+    "finger_loader": (_run_finger_loader, None, _finger_available, ()),
+}
+
+
+def measure(fn, repeat: int):
+    """(Ausgabe, beste Zeit in s, Speicher-Spitze in MB); ein Aufwärmlauf (Importe, Caches) vorab."""
+    output = fn()
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output = fn()
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return output, best, peak / 2 ** 20
+
+
+def machine_info() -> dict:
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "machine": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def load_baseline(path: str) -> tuple[dict, dict]:
+    """(meta, results) der Baseline; leer, wenn es keine gibt."""
+    if not os.path.exists(path):
+        return {}, {}
+    with open(path, encoding="utf-8") as fh:
+        data = json.load(fh)
+    return data.get("meta", {}), data.get("results", {})
+
+
+def save_baseline(path: str, results: dict) -> None:
+    meta = {"created": datetime.now().isoformat(timespec="seconds"), **machine_info()}
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump({"meta": meta, "results": results}, fh, indent=2, sort_keys=True)
+        fh.write("\n")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[2, 8, 32], help="Subjects je Korpus (× 10 Dateien)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--only", nargs="+", choices=list(CASES), help="nur diese Fälle")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="Ergebnisse als neue Baseline speichern")
+    parser.add_argument("--threshold", type=float, default=0.25, help="erlaubte Verschlechterung (0.25 = +25 %%)")
+    parser.add_argument("--no-check", action="store_true", help="Äquivalenzprüfung gegen die Referenz auslassen")
+    args = parser.parse_args()
+
+    meta, baseline = load_baseline(args.baseline)
+    if meta:
+        current = machine_info()
+        differs = [key for key in ("machine", "processor", "cpu_count", "python") if meta.get(key) != current[key]]
+        print(f"Baseline vom {meta.get('created', '?')} ({meta.get('machine', '?')}, Python {meta.get('python', '?')})")
+        if differs:
+            print(f"⚠ Baseline von anderem Rechner/Python ({', '.join(differs)}): Zeiten nur grob vergleichbar")
+    results = {}
+    failures = 0
+    print(f"{'Fall':<28} {'Subj.':>5} {'Zeit s':>9} {'Basis s':>9} {'Δ Zeit':>8} {'MB':>8} {'Δ MB':>8}  Status")
+    for n_subjects in args.sizes:
+        with tempfile.TemporaryDirectory(prefix="midi-bench-") as workdir:
+            fx = Fixtures(workdir, n_subjects, args.seed)
+            for name in args.only or CASES:
+                run, check, requirement, prepare = CASES[name]
+                key = f"{name}@{n_subjects}"
+                skipped = requirement() if requirement else None
+                if skipped:
+                    print(f"{name:<28} {n_subjects:>5} {'':>9} {'':>9} {'':>8} {'':>8} {'':>8}  {skipped}")
+                    continue
+                for attr in prepare:
+                    getattr(fx, attr)
+                output, seconds, peak_mb = measure(lambda: run(fx), args.repeat)
+                entry = {"time_s": round(seconds, 6), "peak_mb": round(peak_mb, 3), "digest": digest(output)}
+                results[key] = entry
+
+                status = []
+                base = baseline.get(key)
+                if base:
+                    if (seconds > base["time_s"] * (1 + args.threshold)
+                            and seconds - base["time_s"] > MIN_REGRESSION_S):
+                        status.append("LANGSAMER")
+                    if (peak_mb > base["peak_mb"] * (1 + args.threshold)
+                            and peak_mb - base["peak_mb"] > MIN_REGRESSION_MB):
+                        status.append("MEHR SPEICHER")
+                    if base.get("digest") != entry["digest"]:
+                        status.append("ERGEBNIS GEÄNDERT")
+                if check is not None and not args.no_check:
+                    problem = check(fx, output)
+                    if problem:
+                        status.append(f"REFERENZ {problem}")
+                failures += bool(status)
+                delta_t = f"{seconds / base['time_s'] - 1:+.0%}" if base else "–"
+                delta_m = f"{peak_mb / base['peak_mb'] - 1:+.0%}" if base and base["peak_mb"] else "–"
+                base_t = f"{base['time_s']:.4f}" if base else "–"
+                print(f"{name:<28} {n_subjects:>5} {seconds:>9.4f} {base_t:>9} {delta_t:>8} {peak_mb:>8.1f} "
+                      f"{delta_m:>8}  {'; '.join(status) or 'ok'}")
+
+    if args.save_baseline:
+        save_baseline(args.baseline, {**baseline, **results})
+        print(f"✓ Baseline gespeichert: {args.baseline}")
+    elif not baseline:
+        print(f"Keine Baseline unter {args.baseline}; mit --save-baseline anlegen.")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,11 +5,29 @@ CLI entrypoint plus grouped helpers for detection, transitions, config, and path
 
 # Entrypoints
 from .cli import main
-from .analyzer import analyze_root_folder
+from .analyzer import analyze_root_folder, analyze_event_store, analyze_midi_file
+from .api import iter_results, analyze_source, FileResult
+from .watcher import watch_folder
+from .sharding import merge_partial_outputs, subject_shard
+from .pipeline import run_pipeline, PIPELINE_STAGES
+from .progress import ProgressReporter
 
 # Detection / transitions
-from .state_detection import detect_states_in_midi
-from .transitions import compute_transitions, choose_freq_pattern, compute_transition_id
+from .state_detection import (
+    detect_states_in_midi,
+    detect_states_from_notes,
+    detect_states_with_features,
+    detect_states_tolerant,
+)
+from .state_matcher import StateMatcher
+from .transitions import (
+    compute_transitions,
+    choose_freq_pattern,
+    compute_transition_id,
+    compute_transition_ids,
+    transition_features,
+)
+from .events import StateEvents, TransitionTable
 
 # Config / sequences
 from .config import (
@@ -21,21 +39,84 @@ from .config import (
     map_transition_index_to_states,
     get_transition_sequence,
     get_expected_transition_at_index,
+    load_state_defs,
+    note_to_pitch,
 )
 
 # Path / MIDI utils
-from .folder_utils import find_midi_data_folder, parse_subject_and_block, normalize_block_name
-from .midi_utils import get_sec_per_tick, merge_music_tracks
+from .folder_utils import find_midi_data_folder, parse_subject_and_block, normalize_block_name, block_sort_key
+from .midi_utils import get_sec_per_tick, merge_music_tracks, extract_note_events
+from .archives import is_archive, iter_midi_paths, open_midi_file
+
+# Event-Store
+from .event_store import build_event_store, EventStore
+
+# Transitionstabelle laden
+from .transition_data import load_transitions, locate_transition_csv, classify_blocks
+from .result_store import ResultStore, write_result_db
+
+# Statistik
+from .permutation_tests import paired_permutation_test, run_permutation_tests
+from .sampling import SamplePlan, sample_paths, sample_table, sample_estimates
+from .markov import TransitionMatrices, markov_summary
+from .rolling_curves import rolling_curves, plateau_summary
+
+# Statistik mit scipy: erst beim ersten Zugriff laden, damit `midi-analysis` schnell startet
+_LAZY_EXPORTS = {
+    "pairwise_posthoc": ".posthoc",
+    "paired_tests": ".paired",
+    "run_paired_comparisons": ".paired",
+    "fit_mixed_model": ".mixed_model",
+    "MixedModelResult": ".mixed_model",
+    "detect_outliers": ".outliers",
+    "remove_outliers": ".outliers",
+    "profile_matrix": ".clustering",
+    "pairwise_distances": ".clustering",
+    "cluster_subjects": ".clustering",
+    "ClusterResult": ".clustering",
+}
+
+
+def __getattr__(name):
+    module = _LAZY_EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    import importlib
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+# Quantil-Sketches
+from .quantile_sketch import TDigest, TransitionSketches, sketch_path_for
 
 __all__ = [
     # Entrypoints
     "main",
     "analyze_root_folder",
+    "analyze_event_store",
+    "analyze_midi_file",
+    "iter_results",
+    "analyze_source",
+    "FileResult",
+    "watch_folder",
+    "merge_partial_outputs",
+    "subject_shard",
+    "run_pipeline",
+    "PIPELINE_STAGES",
+    "ProgressReporter",
     # Detection / transitions
     "detect_states_in_midi",
+    "detect_states_from_notes",
+    "detect_states_with_features",
+    "detect_states_tolerant",
+    "StateMatcher",
     "compute_transitions",
     "choose_freq_pattern",
     "compute_transition_id",
+    "compute_transition_ids",
+    "transition_features",
+    "StateEvents",
+    "TransitionTable",
     # Config / sequences
     "STATE_DEFS",
     "COMBO_TO_STATE",
@@ -45,10 +126,52 @@ __all__ = [
     "map_transition_index_to_states",
     "get_transition_sequence",
     "get_expected_transition_at_index",
+    "load_state_defs",
+    "note_to_pitch",
     # Path / MIDI utils
     "find_midi_data_folder",
     "parse_subject_and_block",
     "normalize_block_name",
+    "block_sort_key",
     "get_sec_per_tick",
     "merge_music_tracks",
+    "extract_note_events",
+    "is_archive",
+    "iter_midi_paths",
+    "open_midi_file",
+    # Event-Store
+    "build_event_store",
+    "EventStore",
+    # Transitionstabelle laden
+    "load_transitions",
+    "locate_transition_csv",
+    "classify_blocks",
+    "ResultStore",
+    "write_result_db",
+    # Statistik
+    "paired_permutation_test",
+    "run_permutation_tests",
+    "pairwise_posthoc",
+    "paired_tests",
+    "run_paired_comparisons",
+    "fit_mixed_model",
+    "MixedModelResult",
+    "SamplePlan",
+    "sample_paths",
+    "sample_table",
+    "sample_estimates",
+    "detect_outliers",
+    "remove_outliers",
+    "TransitionMatrices",
+    "markov_summary",
+    "rolling_curves",
+    "plateau_summary",
+    "profile_matrix",
+    "pairwise_distances",
+    "cluster_subjects",
+    "ClusterResult",
+    # Quantil-Sketches
+    "TDigest",
+    "TransitionSketches",
+    "sketch_path_for",
 ]
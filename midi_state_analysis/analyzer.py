@@ -1,55 +1,196 @@
-import os, mido
+import os
+import time
+from datetime import datetime
+from importlib.metadata import PackageNotFoundError, version
 import pandas as pd
-from .folder_utils import parse_subject_and_block, normalize_block_name
-from .state_detection import detect_states_in_midi
-from .transitions import compute_transitions, choose_freq_pattern, compute_transition_id
-from .config import get_transition_sequence, TRANSITION_FREQUENCIES
+from .folder_utils import parse_subject_and_block
+from .state_detection import detect_states_from_notes, detect_states_with_features, make_matcher
+from .api import analyze_source, expected_transitions, iter_results
+from .event_store import EventStore
+from .state_matcher import StateMatcher
+from .events import StateEvents
+from .quantile_sketch import TransitionSketches, sketch_path_for
+from .sharding import SOURCE_COL, subject_shard
+from .archives import iter_midi_paths
+from .result_store import is_result_db, write_result_db
+from .transition_data import classify_blocks
+from .progress import ProgressReporter
+from .sampling import SamplePlan, report_estimates, sample_paths
 
-def analyze_root_folder(root_folder: str, output_csv: str):
+def analyze_root_folder(
+    root_folder: str,
+    output_csv: str,
+    state_defs: dict | None = None,
+    shard: tuple[int, int] | None = None,
+    features: bool = False,
+    progress: ProgressReporter | None = None,
+    tolerance: int = 0,
+    sample: float | None = None,
+    sample_seed: int = 0,
+):
+    """
+    Analysiert alle MIDI-Dateien unter root_folder und schreibt die Transitionen als CSV.
+
+    Ordner und Dateien werden sortiert durchlaufen, die Zeilenreihenfolge ist damit
+    unabhängig vom Dateisystem. Mit shard=(i, N) werden nur die Subjects dieses Shards
+    verarbeitet und zusätzlich die Spalte source_file geschrieben (für `merge`).
+    Mit features=True kommen die Motorik-Spalten aus `transition_features` hinzu.
+    Mit tolerance=k zählen auch Akkorde mit Hamming-Distanz <= k zu einem State
+    (`detect_states_tolerant`, Spalten n_missing_keys_to/n_extra_keys_to).
+    root_folder darf auch ein zip/tar-Archiv (bzw. ein Ordner darin) sein, siehe archives.
+    Endet output_csv auf .sqlite/.sqlite3/.db, wird eine SQLite-Datenbank geschrieben.
+    progress: Fortschritt/Metriken (Default: Terminalzeile nur auf einem TTY), siehe progress.
+    Mit sample=f wird nur eine geschichtete Stichprobe (Anteil f je Block, siehe sampling)
+    analysiert und zusätzlich die Stichprobenschätzung mit Standardfehlern ausgegeben.
+
+    Returns:
+        die geschriebene Transitionstabelle (None, wenn keine Daten gefunden wurden)
+    """
+    sample_info = {} if sample is None else {"sample": sample, "sample_seed": sample_seed}
+    run_info = _run_info(root_folder, state_defs=state_defs, shard=shard, features=features, tolerance=tolerance,
+                         **sample_info)
+    paths, plan = midi_paths(root_folder, shard, sample, sample_seed)
+    all_dfs, sketches = collect_transitions(root_folder, state_defs, shard, features, progress, tolerance, paths)
+    df = _write_output(all_dfs, output_csv, sketches, run_info)
+    if plan is not None and df is not None:
+        report_estimates(df, plan)
+    return df
+
+def midi_paths(
+    root_folder: str,
+    shard: tuple[int, int] | None = None,
+    sample: float | None = None,
+    sample_seed: int = 0,
+) -> tuple[list, SamplePlan | None]:
+    """
+    Sortierte MIDI-Pfade unter root_folder (nur Subjects des Shards), ggf. als Stichprobe.
+
+    Returns:
+        (Pfade, SamplePlan bzw. None ohne sample)
+    """
+    paths = [
+        os.path.join(dirpath, filename) for dirpath, filename in iter_midi_paths(root_folder)
+        if shard is None or subject_shard(parse_subject_and_block(dirpath, filename)[0], shard[1]) == shard[0]
+    ]
+    if sample is None:
+        return paths, None
+    plan = sample_paths(paths, sample, sample_seed)
+    print(f"✓ {plan.describe()}")
+    return plan.selected(), plan
+
+def collect_transitions(
+    root_folder: str,
+    state_defs: dict | None = None,
+    shard: tuple[int, int] | None = None,
+    features: bool = False,
+    progress: ProgressReporter | None = None,
+    tolerance: int = 0,
+    paths: list | None = None,
+) -> tuple[list, TransitionSketches]:
+    """
+    Erkennung + Transitionen für alle MIDI-Dateien unter root_folder, ohne etwas zu schreiben
+    (Verbraucher von `api.iter_results`). paths: vorab gewählte Dateien (siehe `midi_paths`).
+
+    Returns:
+        (Liste der Transitionstabellen je Datei, Quantil-Sketches über alle Dateien)
+    """
+    progress = progress or ProgressReporter()
+    sketches = TransitionSketches()
     all_dfs = []
-    for dirpath, _, files in os.walk(root_folder):
-        midi_files = [f for f in files if f.lower().endswith((".mid", ".midi"))]
-        if not midi_files:
+    if paths is None:
+        paths, _ = midi_paths(root_folder, shard)
+    progress.start(len(paths))
+    for result in iter_results(paths, state_defs, features, tolerance):
+        if not result.ok:
+            progress.log(f"⚠ Fehler beim Verarbeiten von {os.path.basename(result.source)}: {result.error}")
+            progress.file_done(busy_s=result.elapsed_s, error=True)
             continue
-        for filename in sorted(midi_files):
-            full = os.path.join(dirpath, filename)
-            try:
-                subject, block = parse_subject_and_block(dirpath, filename)
-                block = normalize_block_name(block)  # Normalisiere Block-Namen
-                events = detect_states_in_midi(mido.MidiFile(full))
-                transitions = compute_transitions(events)
-                if transitions.empty:
-                    continue
-                
-                # Bestimme Block-Typ und erwartete Übergangssequenz
-                pattern = choose_freq_pattern(block, len(events))
-                block_type = 'Test' if pattern == 'Test' else 'Block'
-                sequence = get_transition_sequence(block_type)
-                valid_transitions = set(sequence)
-                
-                # Filtere nur Übergänge, die in der erwarteten Sequenz vorkommen
-                transitions_filtered = transitions[transitions['transition_id'].isin(valid_transitions)].copy()
-                
-                if transitions_filtered.empty:
-                    continue
-                
-                # Weise Häufigkeiten basierend auf Übergangscode zu
-                transitions_filtered["state_from_freq"] = transitions_filtered["transition_id"].apply(
-                    lambda tid: TRANSITION_FREQUENCIES.get(tid, "UNKNOWN")
-                )
-                
-                # Füge subject und block hinzu
-                transitions_filtered["subject"] = subject
-                transitions_filtered["block"] = block
-                
+        transitions_filtered = result.to_frame()
+        if transitions_filtered is not None:
+            if shard is not None:
+                transitions_filtered[SOURCE_COL] = os.path.relpath(result.source, root_folder).replace(os.sep, "/")
+            all_dfs.append(transitions_filtered)
+            sketches.update_from_frame(transitions_filtered)
+        progress.file_done(result.n_events, result.n_transitions, result.elapsed_s)
+    progress.close()
+    return all_dfs, sketches
+
+def analyze_midi_file(path: str, matcher: StateMatcher | None = None, features: bool = False) -> pd.DataFrame | None:
+    """
+    Analysiert eine einzelne MIDI-Datei (subject aus dem Ordner-, block aus dem Dateinamen).
+
+    Returns:
+        Gefilterte Transitionen inkl. state_from_freq, subject und block, oder None
+    """
+    return analyze_source(path, matcher, features).to_frame()
+
+def analyze_event_store(
+    store_path: str,
+    output_csv: str,
+    state_defs: dict | None = None,
+    features: bool = False,
+    progress: ProgressReporter | None = None,
+    tolerance: int = 0,
+):
+    """Wie `analyze_root_folder`, liest die Noten-Events aber aus einem gepackten Event-Store."""
+    run_info = _run_info(store_path, state_defs=state_defs, features=features, tolerance=tolerance, source="event_store")
+    store = EventStore(store_path)
+    matcher = make_matcher(state_defs, tolerance)
+    progress = progress or ProgressReporter()
+    sketches = TransitionSketches()
+    all_dfs = []
+    progress.start(len(store.files))
+    for entry, notes in store.iter_files():
+        started = time.perf_counter()
+        try:
+            if features:
+                events = detect_states_with_features(notes["time_s"], notes["pitch"], notes["is_on"], notes["velocity"], matcher)
+            else:
+                events = detect_states_from_notes(notes["time_s"], notes["pitch"], notes["is_on"], matcher)
+            transitions_filtered = _transitions_for_events(events, entry["subject"], entry["block"])
+            if transitions_filtered is not None:
                 all_dfs.append(transitions_filtered)
-            except Exception as e:
-                print(f"⚠ Fehler beim Verarbeiten von {filename}: {e}")
-                continue
-    
+                sketches.update_from_frame(transitions_filtered)
+        except Exception as e:
+            progress.log(f"⚠ Fehler beim Verarbeiten von {entry['source']}: {e}")
+            progress.file_done(busy_s=time.perf_counter() - started, error=True)
+            continue
+        n_transitions = 0 if transitions_filtered is None else len(transitions_filtered)
+        progress.file_done(len(notes["time_s"]), n_transitions, time.perf_counter() - started)
+    progress.close()
+    return _write_output(all_dfs, output_csv, sketches, run_info)
+
+def _transitions_for_events(events: StateEvents, subject: str, block: str) -> pd.DataFrame | None:
+    _, transitions_filtered = expected_transitions(events, block)
+    if transitions_filtered.empty:
+        return None
+    return transitions_filtered.to_frame(subject=subject, block=block)
+
+def _run_info(root_folder: str, **options) -> dict:
+    """Provenienz eines Laufs für die runs-Tabelle des SQLite-Backends."""
+    try:
+        pkg_version = version("midi_state_analysis")
+    except PackageNotFoundError:
+        pkg_version = None
+    return {
+        "started_at": datetime.now().isoformat(timespec="seconds"),
+        "root_folder": os.path.abspath(root_folder),
+        "options": options,
+        "version": pkg_version,
+    }
+
+def _write_output(all_dfs: list, output_csv: str, sketches: TransitionSketches, run_info: dict | None = None):
+    """Schreibt CSV bzw. Datenbank plus Sketches und gibt die zusammengeführte Tabelle zurück."""
     if not all_dfs:
         print("Keine Daten gefunden.")
-        return
-    
+        return None
+
     df = pd.concat(all_dfs, ignore_index=True)
-    df.to_csv(output_csv, index=False, encoding='utf-8-sig')
+    if is_result_db(output_csv):
+        db_df = df.assign(block_type=classify_blocks(df["block"]).astype(str))
+        write_result_db(db_df, output_csv, {**(run_info or {}), "n_files": len(all_dfs)})
+    else:
+        df.to_csv(output_csv, index=False, encoding='utf-8-sig')
+    # Quantil-Sketches neben der CSV ablegen (Perzentile ohne Neuladen der Tabelle)
+    sketches.save(sketch_path_for(output_csv))
+    return df
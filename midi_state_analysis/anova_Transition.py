@@ -1,53 +1,28 @@
-import os
+import argparse
 import pandas as pd
 import numpy as np
 from scipy.stats import shapiro
 import statsmodels.api as sm
 import statsmodels.formula.api as smf
 
-from midi_state_analysis.folder_utils import find_midi_data_folder
-
-
-def locate_transition_csv(explicit_path: str | None = None) -> str:
-    """Locate the CSV produced by midi_state_analysis (MIDI_ANALYSIS_STATES.csv)."""
-    candidates = []
-    if explicit_path:
-        candidates.append(explicit_path)
-
-    midi_folder = find_midi_data_folder(start_path='.')
-    if midi_folder:
-        candidates.append(os.path.join(os.path.dirname(midi_folder), "MIDI_ANALYSIS_STATES.csv"))
-
-    candidates.append(os.path.join(os.getcwd(), "MIDI_ANALYSIS_STATES.csv"))
-
-    for path in candidates:
-        if path and os.path.isfile(path):
-            return path
-
-    raise FileNotFoundError("Keine CSV-Datei mit Transitionen gefunden. Führe zuerst midi-analysis aus.")
-
-
-def classify_block(block: str) -> str:
-    b = str(block).lower()
-    if "pre" in b or "post" in b or "test" in b:
-        return "Test"
-    if b.startswith("b"):
-        return "Training"
-    return "Unbekannt"
-
-
-def prepare_dataframe(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.copy()
-    df["transition_time_s"] = pd.to_numeric(df["transition_time_s"], errors="coerce")
-    df["block_type"] = df["block"].apply(classify_block)
-    if "state_from_freq" not in df.columns:
-        df["state_from_freq"] = "UNKNOWN"
-    return df.dropna(subset=["transition_time_s"])
+from midi_state_analysis.transition_data import (
+    locate_transition_csv,
+    classify_block,
+    prepare_dataframe,
+    load_transitions,
+)
+from midi_state_analysis.outliers import OUTLIER_METHODS, remove_outliers, outlier_summary
+from midi_state_analysis.permutation_tests import run_permutation_tests
+from midi_state_analysis.paired import run_paired_comparisons
+from midi_state_analysis.mixed_model import fit_mixed_model
+from midi_state_analysis.sampling import add_sample_arguments, report_estimates, sample_table
+from midi_state_analysis.posthoc import pairwise_posthoc
+from midi_state_analysis.result_store import ResultStore, is_result_db
 
 
 def summarize(df: pd.DataFrame, group_cols: list[str]) -> pd.DataFrame:
     rows = []
-    for keys, group in df.groupby(group_cols):
+    for keys, group in df.groupby(group_cols, observed=True):
         series = group["transition_time_s"].dropna()
         keys_tuple = keys if isinstance(keys, tuple) else (keys,)
         row = {col: val for col, val in zip(group_cols, keys_tuple)}
@@ -61,9 +36,14 @@ def summarize(df: pd.DataFrame, group_cols: list[str]) -> pd.DataFrame:
     return pd.DataFrame(rows).sort_values(group_cols)
 
 
+def summarize_from_store(store: ResultStore, group_cols: list[str]) -> pd.DataFrame:
+    # Same columns as summarize(), aggregated inside SQLite
+    return store.aggregate(group_cols, stats=("n", "mean", "std", "median"))
+
+
 def shapiro_by_group(df: pd.DataFrame, group_col: str) -> pd.DataFrame:
     rows = []
-    for name, group in df.groupby(group_col):
+    for name, group in df.groupby(group_col, observed=True):
         series = group["transition_time_s"].dropna()
         if len(series) < 3:
             w_stat, p_val = (np.nan, np.nan)
@@ -96,10 +76,15 @@ def run_oneway_anova_by_transition(df: pd.DataFrame) -> pd.DataFrame:
     return sm.stats.anova_lm(model, typ=2)
 
 
-def anova_per_block(df: pd.DataFrame) -> list[tuple[str, pd.DataFrame]]:
+def anova_per_block(df: pd.DataFrame, store: ResultStore | None = None) -> list[tuple[str, pd.DataFrame]]:
+    # With a SQLite result store each block is fetched via the (subject, block) index
     results = []
-    for blk in sorted(df["block"].unique()):
-        subset = df[df["block"] == blk]
+    blocks = store.distinct("block") if store is not None else sorted(df["block"].unique())
+    for blk in blocks:
+        if store is not None:
+            subset = store.query(["transition_id", "transition_time_s"], block=blk)
+        else:
+            subset = df[df["block"] == blk]
         try:
             table = run_oneway_anova_by_transition(subset)
             results.append((f"ANOVA für Block {blk}", table))
@@ -116,10 +101,16 @@ def print_section(title: str, content: pd.DataFrame) -> None:
         print(content.to_string(index=False))
 
 
-def main(csv_path: str | None = None) -> None:
+def main(
+    csv_path: str | None = None,
+    outliers: str | None = None,
+    sample: float | None = None,
+    sample_seed: int = 0,
+) -> None:
+    # sample: analyze only a stratified subset of subject × block cells (see sampling)
     path = locate_transition_csv(csv_path)
     print(f"✓ Lade Transitionen aus: {path}")
-    df = pd.read_csv(path)
+    df = load_transitions(path)
     if df.empty:
         print("CSV ist leer.")
         return
@@ -130,11 +121,30 @@ def main(csv_path: str | None = None) -> None:
         print(f"Fehlende Spalten in der CSV: {', '.join(sorted(missing))}")
         return
 
-    df = prepare_dataframe(df)
-
-    print_section("Grundlegende Kennzahlen je Transition", summarize(df, ["transition_id"]))
-    print_section("Kennzahlen nach Block-Typ (Test/Training)", summarize(df, ["block_type", "transition_id"]))
-    print_section("Kennzahlen nach Frequenz (h/s)", summarize(df, ["state_from_freq", "transition_id"]))
+    if sample is not None:
+        plan, df = sample_table(df, sample, sample_seed)
+        print(f"✓ {plan.describe()}")
+        report_estimates(df, plan)
+    store = ResultStore(path) if is_result_db(path) and not outliers and sample is None else None
+    run(df, outliers=outliers, store=store)
+
+
+def run(df: pd.DataFrame, outliers: str | None = None, store: ResultStore | None = None) -> None:
+    # All sections for an already prepared transition table (store: aggregate via SQLite)
+    if outliers:
+        # Ausreißer je Subject × Block × Transition entfernen ("grubbs", "iqr" oder "mad")
+        clean, audit = remove_outliers(df, method=outliers)
+        print_section(f"Entfernte Ausreißer ({outliers}, je Subject × Block × Transition)", outlier_summary(audit, df))
+        df = clean
+
+    def describe(group_cols: list[str]) -> pd.DataFrame:
+        if store is not None:
+            return summarize_from_store(store, group_cols)
+        return summarize(df, group_cols)
+
+    print_section("Grundlegende Kennzahlen je Transition", describe(["transition_id"]))
+    print_section("Kennzahlen nach Block-Typ (Test/Training)", describe(["block_type", "transition_id"]))
+    print_section("Kennzahlen nach Frequenz (h/s)", describe(["state_from_freq", "transition_id"]))
     print_section("Shapiro je Transition", shapiro_by_group(df, "transition_id"))
 
     try:
@@ -143,10 +153,46 @@ def main(csv_path: str | None = None) -> None:
     except Exception as exc:
         print(f"ANOVA konnte nicht berechnet werden: {exc}")
 
+    # Messwiederholung: Subject als zufälliger Achsenabschnitt statt unabhängiger Zeilen
+    try:
+        mixed = fit_mixed_model(df)
+        print_section("Gemischtes Modell transition_time_s ~ block * freq + (1|subject) (REML)", mixed.variance_components())
+        print_section("Wald-F-Tests (Typ III, Between-Within-df)", mixed.wald_tests())
+    except Exception as exc:
+        print(f"Gemischtes Modell konnte nicht berechnet werden: {exc}")
+
     # One-way ANOVAs pro Block (inkl. Pre-/Posttest, falls als Block benannt)
-    for title, table in anova_per_block(df):
+    for title, table in anova_per_block(df, store):
         print_section(title, table)
 
+    # Post-hoc: welche Transitionen unterscheiden sich innerhalb eines Blocks?
+    posthoc = pairwise_posthoc(df, by=["block"])
+    if not posthoc.empty:
+        significant = posthoc[posthoc["tukey_reject"] | posthoc["gh_reject"]]
+        cols = ["block", "transition_id_a", "transition_id_b", "diff_s", "tukey_p", "gh_p", "welch_p_holm"]
+        print_section(
+            f"Post-hoc je Block (Tukey HSD / Games-Howell, signifikant: {len(significant)} von {len(posthoc)} Paaren)",
+            significant[cols],
+        )
+
+    # Nichtparametrische Alternative, da viele Transitionen den Shapiro-Test nicht bestehen
+    print_section("Permutationstests (Subject als Austauscheinheit)", run_permutation_tests(df))
+
+    # Lerneffekt je Subject: Pretest vs Posttest gepaart (t, Wilcoxon, dz)
+    paired = run_paired_comparisons(df)
+    if not paired.empty:
+        print_section("Gepaarter Vergleich Pretest vs Posttest (je Transition und Frequenz)", paired)
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="ANOVA der Übergangszeiten.")
+    parser.add_argument("csv_path", nargs="?",
+                        help="Transitionstabelle (CSV oder SQLite); Default: automatisch suchen")
+    parser.add_argument("--outliers", choices=OUTLIER_METHODS,
+                        help="Ausreißer je Subject × Block × Transition vorher entfernen")
+    add_sample_arguments(parser)
+    return parser.parse_args(argv)
+
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main(**vars(parse_args()))
\ No newline at end of file
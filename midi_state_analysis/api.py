@@ -0,0 +1,252 @@
+"""
+Bibliotheks-API: Ergebnisse je MIDI-Datei als Generator statt einer geschriebenen CSV.
+
+`iter_results` nimmt beliebige Quellen (Pfade, auch virtuelle Archivpfade, oder rohe
+MIDI-Bytes) und liefert lazy je Quelle ein `FileResult` mit subject, block, Muster und der
+gefilterten Transitionstabelle als Spalten-Arrays. `analyze_root_folder` ist nur noch
+ein Verbraucher dieses Generators; es gibt einen einzigen Analysepfad.
+
+Nebenläufigkeit: mit max_workers > 1 laufen Dateien in einem Thread-Pool (eigener
+StateMatcher je Thread); höchstens max_pending Dateien sind gleichzeitig angefordert,
+die Quelle wird also nur so weit gelesen, wie der Verbraucher hinterherkommt. Das
+MIDI-Parsing hält den GIL, Threads lohnen sich daher vor allem bei langsamer Ein-/Ausgabe
+(Netzlaufwerk, Archive). Abbruch über ein threading.Event (`cancel`) oder durch Schließen
+des Generators (break in der Schleife, gen.close()): noch nicht gestartete Dateien
+entfallen, laufende werden zu Ende gerechnet, aber nicht mehr geliefert.
+
+Beispiel:
+    >>> paths = [os.path.join(d, f) for d, f in iter_midi_paths("Daten (MIDI)")]
+    >>> for result in iter_results(paths, max_workers=4):
+    ...     if result.ok:
+    ...         print(result.subject, result.block, result.n_transitions)
+    >>> iter_results([("BE16MI/MIDI_B1.mid", data)])    # Bytes mit Namen für subject/block
+"""
+
+import io
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Iterable, Iterator, Optional, Tuple, Union
+
+import mido
+import numpy as np
+import pandas as pd
+
+from .archives import open_midi_file
+from .config import STATE_DEFS, TRANSITION_FREQUENCIES, get_transition_sequence
+from .events import StateEvents, TransitionTable
+from .folder_utils import normalize_block_name, parse_subject_and_block
+from .state_detection import detect_states_in_midi, make_matcher
+from .state_matcher import StateMatcher
+from .transitions import choose_freq_pattern, compute_transitions
+
+MidiSource = Union[str, os.PathLike, bytes, bytearray, memoryview, Tuple[str, bytes]]
+BYTES_NAME = "<bytes>"
+CANCEL_POLL_S = 0.1
+
+
+class FileResult:
+    """
+    Ergebnis einer Quelle.
+
+    transitions: gefilterte Transitionen (nur erwartete Sequenz, inkl. state_from_freq) als
+    TransitionTable, ggf. leer. Bei einem Fehler ist error gesetzt und transitions leer.
+    """
+
+    __slots__ = ("source", "subject", "block", "pattern", "transitions", "n_events", "elapsed_s", "error")
+
+    def __init__(
+        self,
+        source: str,
+        subject: str,
+        block: str,
+        pattern: Optional[str] = None,
+        transitions: Optional[TransitionTable] = None,
+        n_events: int = 0,
+        elapsed_s: float = 0.0,
+        error: Optional[str] = None,
+    ):
+        self.source = source
+        self.subject = subject
+        self.block = block
+        self.pattern = pattern
+        self.transitions = transitions if transitions is not None else TransitionTable()
+        self.n_events = n_events
+        self.elapsed_s = elapsed_s
+        self.error = error
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    @property
+    def n_transitions(self) -> int:
+        return len(self.transitions)
+
+    def to_frame(self) -> Optional[pd.DataFrame]:
+        """Transitionen als DataFrame mit subject und block (wie eine Datei der CSV), sonst None."""
+        if self.transitions.empty:
+            return None
+        return self.transitions.to_frame(subject=self.subject, block=self.block)
+
+    def __repr__(self) -> str:
+        status = f"error={self.error!r}" if self.error is not None else f"{self.n_transitions} Transitionen"
+        return f"FileResult({self.source!r}, subject={self.subject!r}, block={self.block!r}, {status})"
+
+
+def expected_transitions(events: StateEvents, block: str) -> Tuple[str, TransitionTable]:
+    """
+    Muster des Blocks und Transitionen der erwarteten Sequenz mit state_from_freq.
+
+    Returns:
+        (pattern, Tabelle); die Tabelle ist leer, wenn keine erwartete Transition vorkommt
+    """
+    pattern = choose_freq_pattern(block, len(events))
+    transitions = compute_transitions(events)
+    if transitions.empty:
+        return pattern, transitions
+
+    # Filtere nur Übergänge, die in der erwarteten Sequenz vorkommen
+    sequence = get_transition_sequence('Test' if pattern == 'Test' else 'Block')
+    transitions_filtered = transitions.filter(np.isin(transitions["transition_id"], sequence))
+    if transitions_filtered.empty:
+        return pattern, transitions_filtered
+
+    # Weise Häufigkeiten basierend auf Übergangscode zu (einmal pro vorkommendem Code)
+    codes, inverse = np.unique(transitions_filtered["transition_id"], return_inverse=True)
+    freqs = np.array([TRANSITION_FREQUENCIES.get(int(tid), "UNKNOWN") for tid in codes], dtype=object)
+    transitions_filtered["state_from_freq"] = freqs[inverse]
+    return pattern, transitions_filtered
+
+
+def _describe_source(source: MidiSource) -> Tuple[str, str, str, Optional[bytes]]:
+    """(Name, subject, block, Bytes oder None bei Pfaden) einer Quelle."""
+    if isinstance(source, tuple):
+        name, data = source
+        dirpath, filename = os.path.split(os.fspath(name))
+    elif isinstance(source, (bytes, bytearray, memoryview)):
+        return BYTES_NAME, "", "", bytes(source)
+    else:
+        name, data = os.fspath(source), None
+        dirpath, filename = os.path.split(name)
+    subject, block = parse_subject_and_block(dirpath, filename)
+    return name, subject, normalize_block_name(block), None if data is None else bytes(data)
+
+
+def analyze_source(source: MidiSource, matcher: Optional[StateMatcher] = None, features: bool = False) -> FileResult:
+    """
+    Analysiert eine Quelle (Fehler werden geworfen, nicht im Ergebnis vermerkt).
+
+    source: Pfad (subject aus dem Ordner-, block aus dem Dateinamen), (Name, Bytes) oder
+    reine Bytes (subject und block dann leer, Muster nach Anzahl der States).
+    """
+    started = time.perf_counter()
+    name, subject, block, data = _describe_source(source)
+    mid = open_midi_file(name) if data is None else mido.MidiFile(file=io.BytesIO(data))
+    events = detect_states_in_midi(mid, matcher, features)
+    pattern, transitions = expected_transitions(events, block)
+    return FileResult(
+        name, subject, block, pattern, transitions,
+        n_events=sum(len(track) for track in mid.tracks),
+        elapsed_s=time.perf_counter() - started,
+    )
+
+
+def _analyze_or_error(source: MidiSource, matcher: StateMatcher, features: bool) -> FileResult:
+    started = time.perf_counter()
+    try:
+        return analyze_source(source, matcher, features)
+    except Exception as e:
+        name, subject, block = BYTES_NAME, "", ""
+        try:
+            name, subject, block, _ = _describe_source(source)
+        except Exception:
+            pass
+        return FileResult(name, subject, block, elapsed_s=time.perf_counter() - started, error=str(e))
+
+
+def iter_results(
+    sources: Iterable[MidiSource],
+    state_defs: dict | None = None,
+    features: bool = False,
+    tolerance: int = 0,
+    max_workers: int = 1,
+    max_pending: Optional[int] = None,
+    ordered: bool = True,
+    cancel: Optional[threading.Event] = None,
+) -> Iterator[FileResult]:
+    """
+    Liefert lazy ein FileResult je Quelle; Fehler einer Datei stehen in result.error.
+
+    Args:
+        sources: Pfade, (Name, Bytes)-Paare oder Bytes; wird erst beim Iterieren gelesen
+        state_defs, features, tolerance: wie bei analyze_root_folder
+        max_workers: Threads (1 = im aufrufenden Thread, ohne Pool)
+        max_pending: höchstens so viele angeforderte, noch nicht gelieferte Dateien
+            (Default: 2 · max_workers)
+        ordered: Ergebnisse in Reihenfolge der Quellen (sonst in Fertigstellungsreihenfolge)
+        cancel: Event zum Abbrechen aus einem anderen Thread
+
+    Raises:
+        ValueError: ungültige Toleranz/State-Definitionen oder max_workers < 1 (sofort,
+            nicht erst beim Iterieren)
+    """
+    if max_workers < 1:
+        raise ValueError("max_workers muss mindestens 1 sein.")
+    matcher = make_matcher(state_defs, tolerance)
+    if max_workers == 1:
+        return _iter_inline(iter(sources), matcher, features, cancel)
+    max_pending = max(max_pending or 2 * max_workers, 1)
+    return _iter_pool(iter(sources), state_defs, features, tolerance, max_workers, max_pending, ordered, cancel)
+
+
+def _iter_inline(sources, matcher, features, cancel) -> Iterator[FileResult]:
+    for source in sources:
+        if cancel is not None and cancel.is_set():
+            return
+        yield _analyze_or_error(source, matcher, features)
+
+
+def _iter_pool(sources, state_defs, features, tolerance, max_workers, max_pending, ordered, cancel) -> Iterator[FileResult]:
+    local = threading.local()
+
+    def work(source: MidiSource) -> FileResult:
+        # StateMatcher hält den Tastenzustand einer Datei, daher einer pro Thread (auch für das
+        # Default-Vokabular: default_matcher() ist ein einziges, geteiltes Objekt)
+        if not hasattr(local, "matcher"):
+            local.matcher = StateMatcher(state_defs or STATE_DEFS, tolerance)
+        return _analyze_or_error(source, local.matcher, features)
+
+    def cancelled() -> bool:
+        return cancel is not None and cancel.is_set()
+
+    pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="midi-analysis")
+    pending = deque()
+    exhausted = False
+    try:
+        while True:
+            while not exhausted and len(pending) < max_pending and not cancelled():
+                try:
+                    source = next(sources)
+                except StopIteration:
+                    exhausted = True
+                    break
+                pending.append(pool.submit(work, source))
+            if not pending:
+                return
+            # Warten in kurzen Intervallen, damit cancel auch bei langen Dateien greift
+            targets = [pending[0]] if ordered else list(pending)
+            done = set()
+            while not done:
+                if cancelled():
+                    return
+                done, _ = wait(targets, timeout=CANCEL_POLL_S, return_when=FIRST_COMPLETED)
+            future = targets[0] if ordered else next(f for f in pending if f in done)
+            pending.remove(future)
+            yield future.result()
+    finally:
+        for future in pending:
+            future.cancel()
+        pool.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,197 @@
+"""
+MIDI-Korpora direkt aus zip/tar-Archiven lesen, ohne auf die Platte zu entpacken.
+
+Dateien im Archiv werden über virtuelle Pfade angesprochen: Archivpfad + "/" + Member,
+z.B. "Erhebung.zip/Daten (MIDI)/BE16MI/MIDI_BE16MI_B1.mid". Damit funktionieren
+parse_subject_and_block, os.path.relpath usw. unverändert. Die Bytes eines Members gehen
+per BytesIO direkt an mido.
+
+Jeder Thread bzw. Prozess hält ein eigenes, offenes Archiv-Handle (Cache pro Thread,
+Schlüssel inkl. PID und mtime), parallele Worker teilen sich also keinen Dateizeiger und
+öffnen das Archiv nur einmal. zip und unkomprimiertes tar erlauben wahlfreien Zugriff;
+bei komprimierten tar-Archiven (tar.gz usw.) würde jeder Rücksprung den Strom neu
+dekomprimieren, deshalb werden deren MIDI-Member beim ersten Zugriff in einem Durchgang
+in den Speicher gelesen.
+"""
+
+import io
+import os
+import tarfile
+import threading
+import zipfile
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import mido
+
+ARCHIVE_SUFFIXES = (".zip", ".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".tar.xz", ".txz")
+MIDI_SUFFIXES = (".mid", ".midi")
+DATA_FOLDER = "Daten (MIDI)"
+
+_LOCAL = threading.local()
+
+
+def is_archive(path: str) -> bool:
+    """True, wenn path eine existierende zip/tar-Datei ist."""
+    return path.lower().endswith(ARCHIVE_SUFFIXES) and os.path.isfile(path)
+
+
+def split_archive_path(path: str) -> Optional[Tuple[str, str]]:
+    """
+    Zerlegt einen virtuellen Pfad in (Archivdatei, Pfad im Archiv).
+
+    Beispiel:
+        >>> split_archive_path("Erhebung.zip/Daten (MIDI)/BE16MI")
+        ('Erhebung.zip', 'Daten (MIDI)/BE16MI')
+
+    Returns:
+        None, wenn der Pfad in keinem Archiv liegt
+    """
+    path = path.replace(os.sep, "/").rstrip("/")
+    parts = path.split("/")
+    for i in range(len(parts), 0, -1):
+        candidate = "/".join(parts[:i])
+        if candidate and is_archive(candidate):
+            return candidate, "/".join(parts[i:])
+    return None
+
+
+def walk_order_key(path: str) -> Tuple[Tuple[str, ...], str]:
+    """
+    Sortierschlüssel für "/"-getrennte relative Pfade in der Reihenfolge eines sortierten
+    os.walk (Preorder: Dateien eines Ordners vor seinen Unterordnern).
+
+    Genau das liefert der Tupelvergleich (Ordnerteile, Dateiname); genutzt für Archiv-Member
+    und beim Zusammenführen von Shard-Teilen.
+    """
+    parts = path.split("/")
+    return tuple(parts[:-1]), parts[-1]
+
+
+class MidiArchive:
+    """Index der MIDI-Member eines Archivs plus Lesezugriff über thread-lokale Handles."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.is_zip = path.lower().endswith(".zip")
+        stat = os.stat(path)
+        self._key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+        handle = self._handle()
+        if self.is_zip:
+            names = [info.filename for info in handle.infolist() if not info.is_dir()]
+        else:
+            names = [member.name for member in handle.getmembers() if member.isfile()]
+        # tar-Member heißen oft "./Daten (MIDI)/...": intern ohne "./", gelesen wird mit Originalnamen
+        self._members: Dict[str, str] = {
+            (n[2:] if n.startswith("./") else n): n for n in names if n.lower().endswith(MIDI_SUFFIXES)
+        }
+        self.names: List[str] = list(self._members)
+        self._compressed_tar = not self.is_zip and not path.lower().endswith(".tar")
+        self._buffer: Optional[Dict[str, bytes]] = None
+        self._lock = threading.Lock()
+
+    def _handle(self):
+        handles = getattr(_LOCAL, "handles", None)
+        if handles is None or getattr(_LOCAL, "pid", None) != os.getpid():
+            # nach fork() keine geerbten Handles weiterverwenden
+            handles = _LOCAL.handles = {}
+            _LOCAL.pid = os.getpid()
+        handle = handles.get(self._key)
+        if handle is None:
+            handle = zipfile.ZipFile(self.path) if self.is_zip else tarfile.open(self.path)
+            handles[self._key] = handle
+        return handle
+
+    def find_data_folder(self) -> Optional[str]:
+        """Pfad von "Daten (MIDI)" im Archiv ("" wenn die Subject-Ordner direkt oben liegen)."""
+        for name in sorted(self.names):
+            parts = name.split("/")
+            if DATA_FOLDER in parts[:-1]:
+                return "/".join(parts[:parts.index(DATA_FOLDER) + 1])
+        return "" if self.names else None
+
+    def iter_files(self, prefix: str = "") -> Iterator[Tuple[str, str]]:
+        """
+        (dirpath, filename) aller MIDI-Member unter prefix, in der Reihenfolge eines
+        sortierten os.walk (Dateien eines Ordners vor seinen Unterordnern).
+        """
+        prefix = prefix.strip("/")
+        selected = [n for n in self.names if not prefix or n.startswith(prefix + "/")]
+        for name in sorted(selected, key=walk_order_key):
+            dirname, filename = name.rsplit("/", 1) if "/" in name else ("", name)
+            yield dirname, filename
+
+    def read(self, name: str) -> bytes:
+        """Bytes eines Members (ohne Zwischenschritt über die Platte)."""
+        if self._compressed_tar:
+            with self._lock:
+                if self._buffer is None:
+                    self._buffer = self._read_all()
+            return self._buffer[name]
+        name = self._members[name]
+        handle = self._handle()
+        if self.is_zip:
+            return handle.read(name)
+        with handle.extractfile(name) as fh:
+            return fh.read()
+
+    def _read_all(self) -> Dict[str, bytes]:
+        wanted = {original: name for name, original in self._members.items()}
+        data: Dict[str, bytes] = {}
+        with tarfile.open(self.path, mode="r|*") as stream:
+            for member in stream:
+                if member.name in wanted:
+                    with stream.extractfile(member) as fh:
+                        data[wanted[member.name]] = fh.read()
+        return data
+
+
+_ARCHIVES: Dict[tuple, MidiArchive] = {}
+_ARCHIVES_LOCK = threading.Lock()
+
+
+def open_archive(path: str) -> MidiArchive:
+    """MidiArchive für path (pro Archivstand einmal indiziert und wiederverwendet)."""
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+    with _ARCHIVES_LOCK:
+        archive = _ARCHIVES.get(key)
+        if archive is None:
+            archive = _ARCHIVES[key] = MidiArchive(path)
+    return archive
+
+
+def iter_midi_paths(root_folder: str) -> Iterator[Tuple[str, str]]:
+    """
+    (dirpath, filename) aller MIDI-Dateien unter root_folder in sortierter Walk-Reihenfolge.
+
+    root_folder darf ein normaler Ordner, ein Archiv oder ein Pfad in einem Archiv sein;
+    dirpath ist dann ebenfalls ein virtueller Pfad.
+    """
+    location = split_archive_path(root_folder)
+    if location is not None:
+        archive_path, inner = location
+        for dirname, filename in open_archive(archive_path).iter_files(inner):
+            yield "/".join(p for p in (archive_path, dirname) if p), filename
+        return
+    for dirpath, dirs, files in os.walk(root_folder):
+        dirs.sort()
+        for filename in sorted(f for f in files if f.lower().endswith(MIDI_SUFFIXES)):
+            yield dirpath, filename
+
+
+def open_midi_file(path: str) -> mido.MidiFile:
+    """mido.MidiFile für einen normalen oder virtuellen Archiv-Pfad."""
+    location = split_archive_path(path)
+    if location is None:
+        return mido.MidiFile(path)
+    archive_path, inner = location
+    data = open_archive(archive_path).read(inner)
+    return mido.MidiFile(file=io.BytesIO(data))
+
+
+def find_data_folder_in_archive(archive_path: str) -> Optional[str]:
+    """Virtueller Pfad von "Daten (MIDI)" im Archiv (bzw. das Archiv selbst) oder None."""
+    inner = open_archive(archive_path).find_data_folder()
+    if inner is None:
+        return None
+    return "/".join(p for p in (archive_path, inner) if p)
@@ -1,13 +1,26 @@
-import argparse, os
+import argparse, os, sys
 from .folder_utils import find_midi_data_folder
-from .analyzer import analyze_root_folder
+from .analyzer import analyze_root_folder, analyze_event_store
+from .event_store import build_event_store
+from .config import STATE_DEFS, load_state_defs
+from .watcher import scan_midi_files, watch_folder
+from .sharding import parse_shard, shard_output_path, merge_partial_outputs
+from .archives import split_archive_path
+from .result_store import is_result_db
+from .progress import ProgressReporter
+from .sampling import add_sample_arguments
 
-def main():
-    parser = argparse.ArgumentParser(description="Analyse von Klavier-MIDI-State-Übergängen.")
-    parser.add_argument("start_path", nargs="?", default=".")
-    parser.add_argument("-o", "--output", help="Output-CSV-Datei")
-    args = parser.parse_args()
-    midi_root = find_midi_data_folder(args.start_path)
+def merge_main(argv):
+    parser = argparse.ArgumentParser(prog="midi-analysis merge",
+                                     description="Teil-CSVs aus --shard-Läufen zusammenführen.")
+    parser.add_argument("partials", nargs="+", help="Teil-CSVs (*.part-i-of-N.csv)")
+    parser.add_argument("-o", "--output", required=True, help="Finale Output-CSV-Datei")
+    args = parser.parse_args(argv)
+    n_rows = merge_partial_outputs(args.partials, args.output)
+    print(f"✓ {len(args.partials)} Teile mit {n_rows} Zeilen zusammengeführt:", args.output)
+
+def _resolve_midi_root(start_path):
+    midi_root = find_midi_data_folder(start_path)
     if not midi_root:
         fallback = r"C:\Users\joshb\Desktop\CODE\BIND_AR_PIANO_ISG_midi_state_analysis\Daten (MIDI)"
         if os.path.isdir(fallback):
@@ -15,7 +28,137 @@ def main():
             print(f"✓ Verwende Fallback-Ordner: {midi_root}")
         else:
             print("✗ 'Daten (MIDI)' nicht gefunden und Fallback-Pfad existiert nicht.")
-            return
-    output = args.output or os.path.join(os.path.dirname(midi_root), "MIDI_ANALYSIS_STATES.csv")
-    analyze_root_folder(midi_root, output)
+    return midi_root
+
+def _default_output(midi_root):
+    # Bei Archiven landet die CSV neben der Archivdatei
+    location = split_archive_path(midi_root)
+    data_parent = os.path.dirname(location[0]) if location else os.path.dirname(midi_root)
+    return os.path.join(data_parent, "MIDI_ANALYSIS_STATES.csv")
+
+def _add_progress_arguments(parser):
+    parser.add_argument("--progress-jsonl", metavar="FILE",
+                        help="Fortschritt (Dateien/s, Events/s, ETA, Fehler, Auslastung) periodisch als JSON-Lines anhängen")
+    parser.add_argument("--metrics-textfile", metavar="FILE",
+                        help="Fortschritt als Prometheus-Textfile schreiben (z.B. für den node_exporter)")
+    parser.add_argument("--progress-interval", metavar="SEK", type=float, default=5.0,
+                        help="Abstand der Fortschritts-Snapshots in Sekunden (Default: 5)")
+
+def _progress_from_args(args):
+    return ProgressReporter(args.progress_jsonl, args.metrics_textfile, args.progress_interval)
+
+def _check_tolerance(parser, tolerance, state_defs):
+    # Dem kleinsten State muss mindestens eine Taste bleiben
+    limit = min(len(notes) for notes in (state_defs or STATE_DEFS).values()) - 1
+    if not 0 <= tolerance <= limit:
+        parser.error(f"--tolerance muss zwischen 0 und {limit} liegen")
+
+def pipeline_main(argv):
+    from .pipeline import PIPELINE_STAGES, run_pipeline
+    parser = argparse.ArgumentParser(prog="midi-analysis pipeline",
+                                     description="Erkennung, Kennzahlen, ANOVA und Plots in einem Lauf.")
+    parser.add_argument("start_path", nargs="?", default=".")
+    parser.add_argument("-o", "--output", help="Output-CSV-Datei (.sqlite/.sqlite3/.db: SQLite-Datenbank)")
+    parser.add_argument("--input", metavar="CSV",
+                        help="Vorhandene Transitionstabelle verwenden statt neu zu erkennen")
+    for stage, help_text in (("stats", "Kennzahlen (statistical_analysis)"),
+                             ("anova", "ANOVA, Post-hoc und Permutationstests (anova_Transition)"),
+                             ("plots", "Lernkurven-Plots (graph_learningcurve)")):
+        parser.add_argument(f"--{stage}", action="store_true", help=f"Stufe {help_text}")
+    parser.add_argument("--outliers", choices=["grubbs", "iqr", "mad"],
+                        help="Ausreißer einmal vor allen Stufen entfernen")
+    parser.add_argument("--plots-dir", default="plots", help="Zielordner der Plots")
+    parser.add_argument("--states", metavar="JSON",
+                        help="State-Definitionen aus einer JSON-Datei statt config.STATE_DEFS")
+    parser.add_argument("--features", action="store_true",
+                        help="Motorik-Merkmale je Transition mitberechnen (Akkordaufbau, Überlappung, Velocity)")
+    parser.add_argument("--tolerance", metavar="K", type=int, default=0,
+                        help="Akkorde mit bis zu K fehlenden/zusätzlichen Tasten als State erkennen (Default: 0 = exakt)")
+    _add_progress_arguments(parser)
+    add_sample_arguments(parser)
+    args = parser.parse_args(argv)
+    if args.tolerance and args.features:
+        parser.error("--tolerance und --features sind nicht kombinierbar")
+    state_defs = load_state_defs(args.states) if args.states else None
+    _check_tolerance(parser, args.tolerance, state_defs)
+    # Ohne Stufen-Flags laufen alle Stufen
+    stages = [stage for stage in PIPELINE_STAGES if getattr(args, stage)] or list(PIPELINE_STAGES)
+    if args.input:
+        run_pipeline(input_path=args.input, stages=stages, outliers=args.outliers, plots_dir=args.plots_dir,
+                     sample=args.sample, sample_seed=args.sample_seed)
+        return
+    midi_root = _resolve_midi_root(args.start_path)
+    if not midi_root:
+        return
+    run_pipeline(midi_root, args.output or _default_output(midi_root), stages=stages, outliers=args.outliers,
+                 plots_dir=args.plots_dir, state_defs=state_defs, features=args.features,
+                 progress=_progress_from_args(args), tolerance=args.tolerance, sample=args.sample,
+                 sample_seed=args.sample_seed)
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] == "merge":
+        merge_main(argv[1:])
+        return
+    if argv and argv[0] == "pipeline":
+        pipeline_main(argv[1:])
+        return
+    parser = argparse.ArgumentParser(description="Analyse von Klavier-MIDI-State-Übergängen.")
+    parser.add_argument("start_path", nargs="?", default=".")
+    parser.add_argument("-o", "--output", help="Output-CSV-Datei (.sqlite/.sqlite3/.db: SQLite-Datenbank)")
+    parser.add_argument("--build-store", metavar="STORE",
+                        help="Noten-Events aller MIDI-Dateien in einen gepackten Event-Store schreiben und beenden")
+    parser.add_argument("--store", metavar="STORE",
+                        help="Analyse aus einem Event-Store statt aus den MIDI-Dateien")
+    parser.add_argument("--states", metavar="JSON",
+                        help="State-Definitionen aus einer JSON-Datei statt config.STATE_DEFS")
+    parser.add_argument("--watch", action="store_true",
+                        help="Datenordner beobachten und neue MIDI-Dateien laufend an die CSV anhängen")
+    parser.add_argument("--shard", metavar="i/N", type=parse_shard,
+                        help="Nur Subjects des Shards i von N verarbeiten (Teil-CSV für 'merge')")
+    parser.add_argument("--features", action="store_true",
+                        help="Motorik-Merkmale je Transition mitberechnen (Akkordaufbau, Überlappung, Velocity)")
+    parser.add_argument("--tolerance", metavar="K", type=int, default=0,
+                        help="Akkorde mit bis zu K fehlenden/zusätzlichen Tasten als State erkennen (Default: 0 = exakt)")
+    _add_progress_arguments(parser)
+    add_sample_arguments(parser)
+    args = parser.parse_args(argv)
+    if args.tolerance and args.features:
+        parser.error("--tolerance und --features sind nicht kombinierbar")
+    if args.sample is not None and (args.store or args.build_store or args.watch):
+        parser.error("--sample ist nur für die Analyse der MIDI-Dateien möglich")
+    if args.shard and (args.store or args.build_store or args.watch):
+        parser.error("--shard ist nur für die Analyse der MIDI-Dateien möglich")
+    state_defs = load_state_defs(args.states) if args.states else None
+    _check_tolerance(parser, args.tolerance, state_defs)
+    if args.store:
+        output = args.output or os.path.join(os.path.dirname(os.path.abspath(args.store)), "MIDI_ANALYSIS_STATES.csv")
+        analyze_event_store(args.store, output, state_defs, args.features, _progress_from_args(args), args.tolerance)
+        print("✓ Analyse abgeschlossen:", output)
+        return
+    midi_root = _resolve_midi_root(args.start_path)
+    if not midi_root:
+        return
+    if args.build_store:
+        n_files = build_event_store(midi_root, args.build_store)
+        print(f"✓ Event-Store mit {n_files} Dateien geschrieben:", args.build_store)
+        return
+    if args.watch and split_archive_path(midi_root) is not None:
+        print("✗ --watch ist für Archive nicht möglich, bitte den entpackten Ordner beobachten.")
+        return
+    output = args.output or _default_output(midi_root)
+    if args.watch and is_result_db(output):
+        print("✗ --watch hängt an CSV-Dateien an, bitte eine .csv als Output angeben.")
+        return
+    if args.watch and os.path.isfile(output):
+        watch_folder(midi_root, output, state_defs, features=args.features, tolerance=args.tolerance)
+        return
+    if args.shard:
+        output = shard_output_path(output, args.shard)
+    # Stand vor dem Lauf: Dateien, die währenddessen dazukommen, holt watch_folder nach
+    known = scan_midi_files(midi_root) if args.watch else None
+    analyze_root_folder(midi_root, output, state_defs, args.shard, args.features, _progress_from_args(args),
+                        args.tolerance, args.sample, args.sample_seed)
     print("✓ Analyse abgeschlossen:", output)
+    if args.watch:
+        watch_folder(midi_root, output, state_defs, features=args.features, tolerance=args.tolerance, known=known)
@@ -0,0 +1,404 @@
+"""
+Ähnlichkeit und Clustering der Subjects nach ihren Zeitprofilen (transition_id × block).
+
+Profil eines Subjects: mittlere Übergangszeit je (block, transition_id), gebildet mit
+einem groupby/unstack über die ganze Tabelle. Spalten, die bei weniger als
+min_coverage der Subjects belegt sind, fallen weg; übrige Lücken bleiben NaN.
+
+Distanzen (alle Paare, blockweise über Zeilen-Chunks, ohne Schleife über Paare):
+    - euclidean:   über die bei beiden belegten Spalten, hochskaliert auf alle Spalten
+                   (sqrt(p / p_gemeinsam) · Abstand); Summen als Matrixprodukte mit Masken
+    - correlation: 1 - Pearson-r über die gemeinsam belegten Spalten (mind. 3), ebenfalls
+                   aus Masken-Matrixprodukten (Form des Profils, unabhängig vom Niveau)
+    - dtw:         Dynamic Time Warping über die Blockfolge (Pretest, B1..B8, Posttest);
+                   ein Schritt ist ein Block, lokale Kosten = euclidean über die
+                   Transitionen des Blocks. Alle Paare eines Chunks laufen gleichzeitig durch
+                   die Rekursion; fehlende Blöcke eines Subjects werden übersprungen.
+                   window begrenzt |i - j| (Sakoe-Chiba, in Block-Positionen).
+
+Clustering: hierarchisch (scipy linkage auf der Distanzmatrix, average/complete/single,
+ward nur mit euclidean) oder k-means (euclidean auf den Profilen, Lücken mit dem
+Spaltenmittel gefüllt, beste von n_init Initialisierungen). Cluster-Nummern 1..k in der
+Reihenfolge, in der sie bei den sortierten Subjects zuerst auftreten.
+
+Beispiel:
+    >>> profiles = profile_matrix(load_transitions())
+    >>> result = cluster_subjects(profiles, n_clusters=3, metric="dtw")
+    >>> result.save("subject_clusters.csv")
+"""
+
+import os
+import warnings
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+from scipy.cluster.hierarchy import fcluster, linkage
+from scipy.cluster.vq import kmeans2
+from scipy.spatial.distance import squareform
+
+from .folder_utils import block_sort_key
+from .transition_data import load_transitions, locate_transition_csv
+
+VALUE_COL = "transition_time_s"
+METRICS = ("correlation", "euclidean", "dtw")
+METHODS = ("average", "complete", "single", "ward", "kmeans")
+CLUSTER_CSV_NAME = "subject_clusters.csv"
+# Obergrenze für Zellen eines Chunks (Paare × Spalten bzw. Paare × Blöcke²)
+MAX_CHUNK_CELLS = 1 << 22
+MIN_COMMON_CORRELATION = 3
+
+
+def profile_matrix(
+    df: pd.DataFrame,
+    subject_col: str = "subject",
+    block_col: str = "block",
+    feature_col: str = "transition_id",
+    value_col: str = VALUE_COL,
+    min_coverage: float = 0.5,
+) -> pd.DataFrame:
+    """
+    Subjects × (block, transition_id) mit der mittleren Übergangszeit je Zelle.
+
+    Spalten nach Blockreihenfolge und transition_id sortiert; Spalten mit Daten von
+    weniger als min_coverage der Subjects werden verworfen, sonstige Lücken bleiben NaN.
+    """
+    data = df[[subject_col, block_col, feature_col, value_col]].dropna()
+    data = data.assign(**{subject_col: data[subject_col].astype(str), block_col: data[block_col].astype(str)})
+    means = data.groupby([subject_col, block_col, feature_col], observed=True)[value_col].mean()
+    profiles = means.unstack([block_col, feature_col]).sort_index()
+    blocks = sorted(profiles.columns.get_level_values(0).unique(), key=block_sort_key)
+    order = sorted(profiles.columns, key=lambda col: (blocks.index(col[0]), col[1]))
+    profiles = profiles[order]
+    coverage = profiles.notna().mean()
+    profiles = profiles.loc[:, coverage >= min_coverage]
+    profiles.columns = profiles.columns.set_names(["block", "transition_id"])
+    profiles.index.name = "subject"
+    return profiles
+
+
+def _chunks(n_rows: int, cells_per_row: int, chunk_size: Optional[int]):
+    step = chunk_size or max(1, MAX_CHUNK_CELLS // max(cells_per_row, 1))
+    for start in range(0, n_rows, step):
+        yield slice(start, min(start + step, n_rows))
+
+
+def _masked(values: np.ndarray):
+    """(Werte mit 0 statt NaN, Maske als float) für Summen über gemeinsam belegte Spalten."""
+    mask = ~np.isnan(values)
+    return np.where(mask, values, 0.0), mask.astype(np.float64)
+
+
+def _sq_euclidean_parts(a0, am, b0, bm):
+    """Summe der quadrierten Differenzen und Anzahl gemeinsamer Spalten je Paar (a × b)."""
+    sq = (a0 ** 2) @ bm.T + am @ (b0 ** 2).T - 2 * (a0 @ b0.T)
+    return np.maximum(sq, 0.0), am @ bm.T
+
+
+def _euclidean(values: np.ndarray, chunk_size: Optional[int]) -> np.ndarray:
+    n, p = values.shape
+    x0, mask = _masked(values)
+    out = np.empty((n, n))
+    for rows in _chunks(n, n * p, chunk_size):
+        sq, common = _sq_euclidean_parts(x0[rows], mask[rows], x0, mask)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            out[rows] = np.where(common > 0, np.sqrt(sq * p / common), np.nan)
+    return out
+
+
+def _correlation(values: np.ndarray, chunk_size: Optional[int]) -> np.ndarray:
+    n, p = values.shape
+    # Zeilen zentrieren (r ist invariant dagegen, verringert aber Auslöschung in den Summen)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        values = values - np.nanmean(values, axis=1, keepdims=True)
+    x0, mask = _masked(values)
+    x0_sq = x0 ** 2
+    out = np.empty((n, n))
+    for rows in _chunks(n, n * p, chunk_size):
+        a0, am = x0[rows], mask[rows]
+        common = am @ mask.T
+        sum_a, sum_b = a0 @ mask.T, am @ x0.T
+        with np.errstate(divide="ignore", invalid="ignore"):
+            cov = a0 @ x0.T - sum_a * sum_b / common
+            var_a = x0_sq[rows] @ mask.T - sum_a ** 2 / common
+            var_b = am @ x0_sq.T - sum_b ** 2 / common
+            r = cov / np.sqrt(var_a * var_b)
+        valid = (common >= MIN_COMMON_CORRELATION) & (var_a > 0) & (var_b > 0)
+        out[rows] = np.where(valid, 1 - np.clip(r, -1, 1), np.nan)
+    return out
+
+
+def _block_cube(profiles: pd.DataFrame) -> np.ndarray:
+    """Profile als Subjects × Blöcke × Transitionen (volles Raster, fehlende Zellen NaN)."""
+    blocks = list(dict.fromkeys(profiles.columns.get_level_values(0)))
+    transitions = sorted(profiles.columns.get_level_values(1).unique())
+    grid = pd.MultiIndex.from_product([blocks, transitions])
+    values = profiles.reindex(columns=grid).to_numpy(np.float64)
+    return values.reshape(len(profiles), len(blocks), len(transitions))
+
+
+def _dtw(profiles: pd.DataFrame, window: Optional[int], chunk_size: Optional[int]) -> np.ndarray:
+    cube = _block_cube(profiles)
+    n, n_blocks, n_trans = cube.shape
+    flat = cube.reshape(n * n_blocks, n_trans)
+    x0, mask = _masked(flat)
+    missing = ~mask.reshape(n, n_blocks, n_trans).any(axis=2)  # Subject ohne Daten im Block
+    band = np.zeros((n_blocks, n_blocks), dtype=bool)
+    if window is not None:
+        positions = np.arange(n_blocks)
+        band = np.abs(positions[:, None] - positions[None, :]) > window
+    out = np.empty((n, n))
+    for rows in _chunks(n, n * n_blocks * n_blocks, chunk_size):
+        c = rows.stop - rows.start
+        a_rows = slice(rows.start * n_blocks, rows.stop * n_blocks)
+        sq, common = _sq_euclidean_parts(x0[a_rows], mask[a_rows], x0, mask)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            local = np.where(common > 0, np.sqrt(sq * n_trans / common), np.inf)
+        # (c·B, n·B) -> (c, n, B_a, B_b)
+        local = local.reshape(c, n_blocks, n, n_blocks).transpose(0, 2, 1, 3)
+        local[:, :, band] = np.inf
+
+        skip_a = missing[rows][:, None, :]   # (c, 1, B)
+        skip_b = missing[None, :, :]         # (1, n, B)
+        acc = np.full((c, n, n_blocks + 1, n_blocks + 1), np.inf)
+        acc[:, :, 0, 0] = 0.0
+        # Randzeilen: nur über fehlende Blöcke des jeweils anderen Subjects erreichbar
+        for j in range(1, n_blocks + 1):
+            acc[:, :, 0, j] = np.where(skip_b[:, :, j - 1], acc[:, :, 0, j - 1], np.inf)
+        for i in range(1, n_blocks + 1):
+            acc[:, :, i, 0] = np.where(skip_a[:, :, i - 1], acc[:, :, i - 1, 0], np.inf)
+            for j in range(1, n_blocks + 1):
+                step = local[:, :, i - 1, j - 1] + np.minimum(
+                    np.minimum(acc[:, :, i - 1, j], acc[:, :, i, j - 1]), acc[:, :, i - 1, j - 1])
+                step = np.where(skip_b[:, :, j - 1], acc[:, :, i, j - 1], step)
+                acc[:, :, i, j] = np.where(skip_a[:, :, i - 1], acc[:, :, i - 1, j], step)
+        result = acc[:, :, n_blocks, n_blocks]
+        out[rows] = np.where(np.isfinite(result), result, np.nan)
+    return out
+
+
+def pairwise_distances(
+    profiles: pd.DataFrame,
+    metric: str = "correlation",
+    window: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+) -> pd.DataFrame:
+    """
+    Symmetrische Distanzmatrix Subjects × Subjects (NaN: zu wenig gemeinsame Daten).
+
+    Args:
+        profiles: Ergebnis von profile_matrix
+        metric: "correlation", "euclidean" oder "dtw"
+        window: nur dtw, maximale Verschiebung in Blöcken (Default: unbegrenzt)
+        chunk_size: Subjects je Chunk (Default: aus MAX_CHUNK_CELLS)
+    """
+    if metric not in METRICS:
+        raise ValueError(f"Unbekannte Metrik {metric!r}, erlaubt: {', '.join(METRICS)}")
+    values = profiles.to_numpy(np.float64)
+    if metric == "euclidean":
+        dist = _euclidean(values, chunk_size)
+    elif metric == "correlation":
+        dist = _correlation(values, chunk_size)
+    else:
+        dist = _dtw(profiles, window, chunk_size)
+    # Rundungsfehler der Matrixprodukte: exakt symmetrisch mit Nulldiagonale
+    dist = (dist + dist.T) / 2
+    np.fill_diagonal(dist, 0.0)
+    return pd.DataFrame(dist, index=profiles.index, columns=profiles.index)
+
+
+def silhouette_scores(distances: np.ndarray, labels: np.ndarray) -> np.ndarray:
+    """Silhouette je Subject aus einer vollständigen Distanzmatrix (Einzel-Cluster: 0)."""
+    clusters, codes = np.unique(labels, return_inverse=True)
+    if len(clusters) < 2:
+        return np.zeros(len(labels))
+    onehot = np.eye(len(clusters))[codes]
+    sums = distances @ onehot
+    sizes = onehot.sum(axis=0)
+    rows = np.arange(len(labels))
+    own_size = sizes[codes]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        a = sums[rows, codes] / (own_size - 1)
+        other = sums / sizes
+    other[rows, codes] = np.inf
+    b = other.min(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        score = (b - a) / np.maximum(a, b)
+    return np.where(own_size > 1, np.nan_to_num(score), 0.0)
+
+
+def _fill_missing(profiles: pd.DataFrame) -> np.ndarray:
+    values = profiles.to_numpy(np.float64)
+    return np.where(np.isnan(values), np.nanmean(values, axis=0), values)
+
+
+def _kmeans(values: np.ndarray, n_clusters: int, seed: int, n_init: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    best, best_inertia = None, np.inf
+    for _ in range(n_init):
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")  # leere Cluster: diese Initialisierung verliert ohnehin
+            centers, labels = kmeans2(values, n_clusters, minit="++", seed=rng)
+        inertia = float(((values - centers[labels]) ** 2).sum())
+        if len(np.unique(labels)) == n_clusters and inertia < best_inertia:
+            best, best_inertia = labels, inertia
+    if best is None:
+        raise ValueError(f"k-means fand keine Lösung mit {n_clusters} nicht leeren Clustern.")
+    return best
+
+
+def _relabel(labels: np.ndarray) -> np.ndarray:
+    """Cluster-Nummern 1..k in der Reihenfolge des ersten Auftretens."""
+    _, first = np.unique(labels, return_index=True)
+    order = labels[np.sort(first)]
+    mapping = {old: new for new, old in enumerate(order, start=1)}
+    return np.array([mapping[label] for label in labels], dtype=np.int64)
+
+
+class ClusterResult:
+    """
+    Cluster-Zuordnung der Subjects.
+
+    labels: Series subject -> Cluster (1..k); distances: verwendete Distanzmatrix;
+    linkage: scipy-Linkage-Matrix (nur hierarchisch, z.B. für ein Dendrogramm)
+    """
+
+    __slots__ = ("labels", "silhouette", "distances", "linkage", "method", "metric")
+
+    def __init__(self, labels, silhouette, distances, linkage, method, metric):
+        self.labels: pd.Series = labels
+        self.silhouette: pd.Series = silhouette
+        self.distances: pd.DataFrame = distances
+        self.linkage: Optional[np.ndarray] = linkage
+        self.method = method
+        self.metric = metric
+
+    @property
+    def n_clusters(self) -> int:
+        return int(self.labels.nunique())
+
+    def to_frame(self) -> pd.DataFrame:
+        """subject, cluster, silhouette (eine Zeile je Subject)."""
+        return pd.DataFrame({
+            "subject": self.labels.index,
+            "cluster": self.labels.to_numpy(),
+            "silhouette": self.silhouette.to_numpy(),
+        })
+
+    def summary(self) -> pd.DataFrame:
+        """Größe und mittlere Silhouette je Cluster."""
+        frame = self.to_frame()
+        return frame.groupby("cluster").agg(n_subjects=("subject", "size"), silhouette=("silhouette", "mean")).reset_index()
+
+    def cluster_profiles(self, profiles: pd.DataFrame) -> pd.DataFrame:
+        """Mittleres Profil je Cluster (Cluster × (block, transition_id))."""
+        return profiles.groupby(self.labels.reindex(profiles.index).rename("cluster")).mean()
+
+    def save(self, path: str) -> None:
+        """Labels als CSV (subject, cluster, silhouette)."""
+        self.to_frame().to_csv(path, index=False, encoding="utf-8-sig")
+
+
+def cluster_subjects(
+    profiles: pd.DataFrame,
+    n_clusters: int = 3,
+    method: str = "average",
+    metric: Optional[str] = None,
+    window: Optional[int] = None,
+    seed: int = 0,
+    n_init: int = 10,
+    distances: Optional[pd.DataFrame] = None,
+) -> ClusterResult:
+    """
+    Clustert die Subjects nach ihren Profilen.
+
+    Args:
+        profiles: Ergebnis von profile_matrix
+        n_clusters: Anzahl Cluster
+        method: "average", "complete", "single", "ward" (hierarchisch) oder "kmeans"
+        metric: Distanz für hierarchische Verfahren (Default "correlation", bei ward und
+            kmeans nur "euclidean")
+        window: Sakoe-Chiba-Fenster für metric="dtw"
+        seed, n_init: k-means-Initialisierungen
+        distances: bereits berechnete Distanzmatrix (sonst pairwise_distances)
+
+    Raises:
+        ValueError: unbekanntes Verfahren, unpassende Metrik, NaN-Distanzen oder
+            n_clusters außerhalb von 1..Anzahl Subjects
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unbekanntes Verfahren {method!r}, erlaubt: {', '.join(METHODS)}")
+    euclidean_only = method in ("ward", "kmeans")
+    metric = metric or ("euclidean" if euclidean_only else "correlation")
+    if euclidean_only and metric != "euclidean":
+        raise ValueError(f"{method} setzt metric='euclidean' voraus.")
+    if not 1 <= n_clusters <= len(profiles):
+        raise ValueError(f"n_clusters muss zwischen 1 und {len(profiles)} liegen.")
+
+    if method == "kmeans":
+        filled = _fill_missing(profiles)
+        labels = _kmeans(filled, n_clusters, seed, n_init)
+        # Silhouette auf denselben (gefüllten) Profilen, auf denen k-means rechnet
+        dist = pairwise_distances(pd.DataFrame(filled, index=profiles.index), "euclidean")
+        tree = None
+    else:
+        dist = distances if distances is not None else pairwise_distances(profiles, metric, window)
+        if dist.isna().to_numpy().any():
+            raise ValueError("Distanzmatrix enthält NaN (zu wenig gemeinsame Zellen); min_coverage erhöhen.")
+        tree = linkage(squareform(dist.to_numpy(), checks=False), method=method)
+        labels = fcluster(tree, n_clusters, criterion="maxclust")
+
+    labels = _relabel(np.asarray(labels))
+    silhouette = silhouette_scores(dist.to_numpy(), labels)
+    return ClusterResult(
+        labels=pd.Series(labels, index=profiles.index, name="cluster"),
+        silhouette=pd.Series(silhouette, index=profiles.index, name="silhouette"),
+        distances=dist,
+        linkage=tree,
+        method=method,
+        metric=metric,
+    )
+
+
+def print_section(title: str, df: pd.DataFrame) -> None:
+    print(f"\n=== {title} ===")
+    if df.empty:
+        print("Keine Daten.")
+        return
+    print(df.to_string(index=False))
+
+
+def main(
+    csv_path: str | None = None,
+    n_clusters: int = 3,
+    method: str = "average",
+    metric: str | None = None,
+    window: int | None = None,
+    min_coverage: float = 0.5,
+    output: str | None = None,
+) -> ClusterResult | None:
+    # Cluster labels are written next to the transition table unless output is given
+    path = locate_transition_csv(csv_path)
+    print(f"✓ Lade Transitionen aus: {path}")
+    df = load_transitions(path)
+    if df.empty:
+        print("CSV ist leer.")
+        return None
+
+    profiles = profile_matrix(df, min_coverage=min_coverage)
+    print(f"✓ Profile: {profiles.shape[0]} Subjects × {profiles.shape[1]} Zellen (block × transition_id)")
+    result = cluster_subjects(profiles, n_clusters, method, metric, window)
+    print_section(f"Cluster ({result.method}, {result.metric})", result.summary())
+    by_block = result.cluster_profiles(profiles).T.groupby(level="block", sort=False).mean().T
+    print_section("Mittlere Übergangszeit je Cluster und Block", by_block.reset_index())
+    print_section("Cluster je Subject", result.to_frame())
+
+    output = output or os.path.join(os.path.dirname(path), CLUSTER_CSV_NAME)
+    result.save(output)
+    print(f"✓ Cluster-Labels gespeichert: {output}")
+    return result
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,5 @@
+import json
+import re
 from typing import Dict, Set, Tuple
 
 # ---------------------------------------------------------------------------
@@ -20,6 +22,71 @@ COMBO_TO_STATE: Dict[frozenset, int] = {
     frozenset(notes): state for state, notes in STATE_DEFS.items()
 }
 
+NOTE_NAME_PATTERN = re.compile(r"^([A-Ga-g])([#b]?)(-?\d+)$")
+NOTE_OFFSETS = {"c": 0, "d": 2, "e": 4, "f": 5, "g": 7, "a": 9, "b": 11}
+
+
+def note_to_pitch(note) -> int:
+    """
+    Wandelt eine Note (MIDI-Nummer oder Name wie "F4", "C#5", "Eb4") in eine MIDI-Nummer um.
+
+    Beispiel:
+        >>> note_to_pitch("F4")
+        65
+        >>> note_to_pitch(72)
+        72
+    """
+    if isinstance(note, int):
+        pitch = note
+    else:
+        text = str(note).strip()
+        match = NOTE_NAME_PATTERN.match(text)
+        if text.isdigit():
+            pitch = int(text)
+        elif match:
+            name, accidental, octave = match.groups()
+            pitch = 12 * (int(octave) + 1) + NOTE_OFFSETS[name.lower()]
+            pitch += {"#": 1, "b": -1}.get(accidental, 0)
+        else:
+            raise ValueError(f"Ungültige Note: {note!r}")
+    if not 0 <= pitch <= 127:
+        raise ValueError(f"Note außerhalb des MIDI-Bereichs: {note!r}")
+    return pitch
+
+
+def load_state_defs(path: str) -> Dict[int, Set[int]]:
+    """
+    Lädt State-Definitionen aus einer JSON-Datei.
+
+    Erwartetes Format (Noten als MIDI-Nummern oder Namen, Akkordgrößen beliebig):
+        {"states": {"1": ["F4", "G4", "C5", "D5", "F5", "G5"], "2": [60, 62, 64]}}
+    Der äußere "states"-Schlüssel ist optional.
+
+    Args:
+        path: Pfad zur JSON-Datei
+
+    Returns:
+        Dict State-ID -> Menge von MIDI-Nummern (gleiche Form wie STATE_DEFS)
+    """
+    with open(path, encoding="utf-8") as fh:
+        raw = json.load(fh)
+    raw = raw.get("states", raw)
+    state_defs: Dict[int, Set[int]] = {}
+    seen: Dict[frozenset, int] = {}
+    for key, notes in raw.items():
+        state = int(key)
+        pitches = {note_to_pitch(n) for n in notes}
+        if not pitches:
+            raise ValueError(f"State {state} hat keine Noten.")
+        combo = frozenset(pitches)
+        if combo in seen:
+            raise ValueError(f"State {state} ist identisch mit State {seen[combo]}.")
+        seen[combo] = state
+        state_defs[state] = pitches
+    if not state_defs:
+        raise ValueError(f"Keine State-Definitionen in {path} gefunden.")
+    return state_defs
+
 # ---- Übergangsabfolgen für Test und Blöcke ----------------------
 # Reihenfolge der Übergänge aus "Übergang Abfolge" Dokument
 TEST_TRANSITION_SEQUENCE = [
@@ -0,0 +1,168 @@
+"""
+Gepackter, spaltenweiser Event-Store für alle Noten-Events eines Korpus.
+
+Der Build-Schritt dekodiert jede MIDI-Datei genau einmal und schreibt die Noten-Events
+aller Dateien hintereinander in je eine .npy-Datei pro Spalte. Ein Offset-Index
+(index.json) hält pro Quelldatei subject, block und den Bereich [start, stop).
+Leser mappen die Spalten per np.load(mmap_mode="r") und bekommen Views ohne Kopie.
+
+Die Dateien liegen nach Subject und innerhalb eines Subjects nach Block gruppiert (jeweils
+in der Reihenfolge des ersten Auftretens), damit Subject und (Subject, Block) je einen
+zusammenhängenden Bereich haben. Subject ist der Ordnername: gleichnamige Ordner an
+verschiedenen Stellen landen zusammen in einem Subject.
+
+Layout:
+    <store>/tick.npy, time_s.npy, pitch.npy, velocity.npy, is_on.npy
+    <store>/index.json
+"""
+
+import json
+import os
+from typing import Callable, Dict, Hashable, Iterator, List, Tuple
+
+import numpy as np
+
+from .folder_utils import parse_subject_and_block, normalize_block_name
+from .midi_utils import extract_note_events
+from .archives import iter_midi_paths, open_midi_file
+
+STORE_COLUMNS: Dict[str, type] = {
+    "tick": np.int64,
+    "time_s": np.float64,
+    "pitch": np.uint8,
+    "velocity": np.uint8,
+    "is_on": np.bool_,
+}
+INDEX_FILE = "index.json"
+STORE_VERSION = 1
+
+
+def build_event_store(root_folder: str, store_path: str) -> int:
+    """
+    Dekodiert alle MIDI-Dateien unter root_folder und schreibt sie in einen Event-Store.
+
+    Dateien eines Subjects (und darin eines Blocks) werden zusammenhängend abgelegt, damit
+    `EventStore.subject_events` und `EventStore.block_events` einen View liefern können.
+
+    Args:
+        root_folder: Ordner "Daten (MIDI)" (oder ein beliebiger Unterordner, auch in einem Archiv)
+        store_path: Zielordner des Stores (wird angelegt/überschrieben)
+
+    Returns:
+        Anzahl der gespeicherten Dateien
+    """
+    files = []
+    for dirpath, filename in iter_midi_paths(root_folder):
+        full = os.path.join(dirpath, filename)
+        try:
+            mid = open_midi_file(full)
+            notes = extract_note_events(mid)
+        except Exception as e:
+            print(f"⚠ Fehler beim Verarbeiten von {filename}: {e}")
+            continue
+        subject, block = parse_subject_and_block(dirpath, filename)
+        entry = {
+            "subject": subject,
+            "block": normalize_block_name(block),
+            "source": os.path.relpath(full, root_folder).replace(os.sep, "/"),
+            "ticks_per_beat": mid.ticks_per_beat,
+        }
+        files.append((entry, notes))
+
+    # Nach Subject, dann Block gruppieren (stabil, Reihenfolge des ersten Auftretens)
+    first_seen: Dict[Tuple[str, ...], int] = {}
+    for entry, _ in files:
+        first_seen.setdefault((entry["subject"],), len(first_seen))
+        first_seen.setdefault((entry["subject"], entry["block"]), len(first_seen))
+    files.sort(key=lambda item: (first_seen[(item[0]["subject"],)], first_seen[(item[0]["subject"], item[0]["block"])]))
+
+    columns: Dict[str, List[np.ndarray]] = {name: [] for name in STORE_COLUMNS}
+    entries = []
+    offset = 0
+    for entry, notes in files:
+        n = len(notes["tick"])
+        for name in STORE_COLUMNS:
+            columns[name].append(notes[name])
+        entries.append({**entry, "start": offset, "stop": offset + n})
+        offset += n
+
+    os.makedirs(store_path, exist_ok=True)
+    for name, dtype in STORE_COLUMNS.items():
+        parts = columns[name]
+        data = np.concatenate(parts).astype(dtype, copy=False) if parts else np.empty(0, dtype=dtype)
+        np.save(os.path.join(store_path, f"{name}.npy"), data)
+    with open(os.path.join(store_path, INDEX_FILE), "w", encoding="utf-8") as fh:
+        json.dump({"version": STORE_VERSION, "n_events": offset, "files": entries}, fh, indent=1)
+    return len(entries)
+
+
+def _contiguous_ranges(files: List[dict], key: Callable[[dict], Hashable]) -> Dict[Hashable, Tuple[int, int]]:
+    """[start, stop) je Schlüssel; ValueError, wenn die Dateien eines Schlüssels nicht zusammenhängen."""
+    ranges: Dict[Hashable, Tuple[int, int]] = {}
+    last = None
+    for entry in files:
+        k = key(entry)
+        if k in ranges and k != last:
+            raise ValueError(f"Event-Store: Dateien von {k} liegen nicht zusammenhängend, bitte neu bauen.")
+        start = ranges[k][0] if k in ranges else entry["start"]
+        ranges[k] = (start, entry["stop"])
+        last = k
+    return ranges
+
+
+class EventStore:
+    """
+    Lesezugriff auf einen mit `build_event_store` gebauten Store.
+
+    Alle zurückgegebenen Arrays sind schreibgeschützte Views auf die gemappten Spalten.
+
+    Beispiel:
+        >>> store = EventStore("notes.store")
+        >>> for entry, notes in store.iter_files():
+        ...     events = detect_states_from_notes(notes["time_s"], notes["pitch"], notes["is_on"])
+    """
+
+    def __init__(self, store_path: str):
+        self.path = store_path
+        with open(os.path.join(store_path, INDEX_FILE), encoding="utf-8") as fh:
+            index = json.load(fh)
+        if index.get("version") != STORE_VERSION:
+            raise ValueError(f"Nicht unterstützte Store-Version: {index.get('version')}")
+        self.files: List[dict] = index["files"]
+        self.columns: Dict[str, np.ndarray] = {
+            name: np.load(os.path.join(store_path, f"{name}.npy"), mmap_mode="r")
+            for name in STORE_COLUMNS
+        }
+        self._by_source = {entry["source"]: entry for entry in self.files}
+        self._subject_ranges = _contiguous_ranges(self.files, lambda entry: entry["subject"])
+        self._block_ranges = _contiguous_ranges(self.files, lambda entry: (entry["subject"], entry["block"]))
+
+    def __len__(self) -> int:
+        return len(self.files)
+
+    @property
+    def subjects(self) -> List[str]:
+        return list(self._subject_ranges)
+
+    def _slice(self, start: int, stop: int) -> Dict[str, np.ndarray]:
+        return {name: col[start:stop] for name, col in self.columns.items()}
+
+    def file_events(self, source: str) -> Dict[str, np.ndarray]:
+        """Views auf die Noten-Events einer Quelldatei (Pfad relativ zum Datenordner)."""
+        entry = self._by_source[source]
+        return self._slice(entry["start"], entry["stop"])
+
+    def subject_events(self, subject: str) -> Dict[str, np.ndarray]:
+        """Views auf alle Noten-Events eines Subjects (alle Blöcke hintereinander)."""
+        start, stop = self._subject_ranges[subject]
+        return self._slice(start, stop)
+
+    def block_events(self, subject: str, block: str) -> Dict[str, np.ndarray]:
+        """Views auf die Noten-Events eines Subjects in einem Block (normalisierter Name, z.B. "B3")."""
+        start, stop = self._block_ranges[(subject, block)]
+        return self._slice(start, stop)
+
+    def iter_files(self) -> Iterator[Tuple[dict, Dict[str, np.ndarray]]]:
+        """Liefert (Index-Eintrag, Views) für jede Datei in Speicherreihenfolge."""
+        for entry in self.files:
+            yield entry, self._slice(entry["start"], entry["stop"])
@@ -0,0 +1,176 @@
+"""
+Kompakte, spaltenweise Container zwischen State-Erkennung, Transitionen und Filterung.
+
+StateEvents hält die erkannten State-Wechsel einer Datei in typisierten NumPy-Arrays;
+die zusätzlich gedrückten Tasten liegen CSR-artig in einem flachen Array mit Offsets.
+Optionale Motorik-Merkmale je Event (Feature-Modus der Erkennung) liegen in `features`,
+die fehlenden Tasten toleranter Treffer (Toleranz-Modus) ebenfalls CSR-artig.
+TransitionTable hält die Transitionen ebenso spaltenweise. Ein pandas-DataFrame entsteht
+erst an der Ausgabegrenze über `to_frame()`.
+"""
+
+from array import array
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+
+class StateEvents:
+    __slots__ = (
+        "time_s", "state", "total_keys_pressed", "extra_offsets", "extra_keys", "features",
+        "missing_offsets", "missing_keys",
+    )
+
+    def __init__(
+        self,
+        time_s: np.ndarray,
+        state: np.ndarray,
+        total_keys_pressed: np.ndarray,
+        extra_offsets: np.ndarray,
+        extra_keys: np.ndarray,
+        features: Optional[Dict[str, np.ndarray]] = None,
+        missing_offsets: Optional[np.ndarray] = None,
+        missing_keys: Optional[np.ndarray] = None,
+    ):
+        self.time_s = time_s
+        self.state = state
+        self.total_keys_pressed = total_keys_pressed
+        # extra_keys[extra_offsets[i]:extra_offsets[i + 1]] = Zusatztasten von Event i
+        self.extra_offsets = extra_offsets
+        self.extra_keys = extra_keys
+        # Spaltenname -> Array mit einem Wert je Event (nur im Feature-Modus gesetzt)
+        self.features = features
+        # Wie extra_*, aber fehlende Akkordtasten (nur im Toleranz-Modus gesetzt)
+        self.missing_offsets = missing_offsets
+        self.missing_keys = missing_keys
+
+    def __len__(self) -> int:
+        return len(self.state)
+
+    @property
+    def empty(self) -> bool:
+        return len(self.state) == 0
+
+    def extra_keys_at(self, i: int) -> List[int]:
+        return self.extra_keys[self.extra_offsets[i]:self.extra_offsets[i + 1]].tolist()
+
+    def missing_keys_at(self, i: int) -> List[int]:
+        if self.missing_offsets is None:
+            return []
+        return self.missing_keys[self.missing_offsets[i]:self.missing_offsets[i + 1]].tolist()
+
+    def to_frame(self) -> pd.DataFrame:
+        """DataFrame im bisherigen Format (extra_keys als Liste bzw. None)."""
+        if self.empty:
+            return pd.DataFrame()
+        def ragged(offsets: np.ndarray, keys: np.ndarray) -> list:
+            offsets, keys = offsets.tolist(), keys.tolist()
+            return [keys[a:b] or None for a, b in zip(offsets[:-1], offsets[1:])]
+
+        missing = {}
+        if self.missing_offsets is not None:
+            missing["missing_keys"] = ragged(self.missing_offsets, self.missing_keys)
+        return pd.DataFrame({
+            "time_s": self.time_s,
+            "state": self.state,
+            "extra_keys": ragged(self.extra_offsets, self.extra_keys),
+            **missing,
+            "total_keys_pressed": self.total_keys_pressed,
+            **(self.features or {}),
+        })
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "StateEvents":
+        """Umkehrung von to_frame (für Aufrufer, die noch DataFrames übergeben)."""
+        builder = StateEventBuilder(missing="missing_keys" in df.columns)
+        if not df.empty:
+            extra = df["extra_keys"] if "extra_keys" in df.columns else [None] * len(df)
+            total = df["total_keys_pressed"] if "total_keys_pressed" in df.columns else [0] * len(df)
+            missing = df["missing_keys"] if builder.missing_offsets is not None else [None] * len(df)
+            for t, state, keys, n, lost in zip(df["time_s"], df["state"], extra, total, missing):
+                builder.append(t, int(state), int(n), keys or (), lost or ())
+        return builder.build()
+
+
+class StateEventBuilder:
+    """Sammelt Events während der Erkennung in array.array-Puffern (keine Dicts pro Event)."""
+
+    __slots__ = ("time_s", "state", "total_keys_pressed", "extra_offsets", "extra_keys", "missing_offsets", "missing_keys")
+
+    def __init__(self, missing: bool = False):
+        self.time_s = array("d")
+        self.state = array("h")
+        self.total_keys_pressed = array("h")
+        self.extra_offsets = array("i", [0])
+        self.extra_keys = array("B")
+        # Fehlende Tasten nur im Toleranz-Modus mitführen
+        self.missing_offsets = array("i", [0]) if missing else None
+        self.missing_keys = array("B") if missing else None
+
+    def append(self, time_s: float, state: int, total_keys_pressed: int, extra_keys=(), missing_keys=()) -> None:
+        self.time_s.append(time_s)
+        self.state.append(state)
+        self.total_keys_pressed.append(total_keys_pressed)
+        if extra_keys:
+            self.extra_keys.extend(extra_keys)
+        self.extra_offsets.append(len(self.extra_keys))
+        if self.missing_offsets is not None:
+            if missing_keys:
+                self.missing_keys.extend(missing_keys)
+            self.missing_offsets.append(len(self.missing_keys))
+
+    def build(self) -> StateEvents:
+        missing = {}
+        if self.missing_offsets is not None:
+            missing = {
+                "missing_offsets": np.frombuffer(self.missing_offsets, dtype=np.int32),
+                "missing_keys": np.frombuffer(self.missing_keys, dtype=np.uint8),
+            }
+        return StateEvents(
+            np.frombuffer(self.time_s, dtype=np.float64),
+            np.frombuffer(self.state, dtype=np.int16),
+            np.frombuffer(self.total_keys_pressed, dtype=np.int16),
+            np.frombuffer(self.extra_offsets, dtype=np.int32),
+            np.frombuffer(self.extra_keys, dtype=np.uint8),
+            **missing,
+        )
+
+
+class TransitionTable:
+    """
+    Spaltenweise Transitionen einer Datei.
+
+    Beispiel:
+        >>> table = compute_transitions(events)
+        >>> table = table.filter(np.isin(table["transition_id"], sequence))
+        >>> df = table.to_frame(subject="BE16MI", block="B1")
+    """
+
+    __slots__ = ("columns",)
+
+    def __init__(self, columns: Optional[Dict[str, np.ndarray]] = None):
+        self.columns: Dict[str, np.ndarray] = columns or {}
+
+    def __len__(self) -> int:
+        return len(next(iter(self.columns.values()))) if self.columns else 0
+
+    @property
+    def empty(self) -> bool:
+        return len(self) == 0
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.columns[name]
+
+    def __setitem__(self, name: str, values: np.ndarray) -> None:
+        self.columns[name] = values
+
+    def filter(self, mask: np.ndarray) -> "TransitionTable":
+        return TransitionTable({name: col[mask] for name, col in self.columns.items()})
+
+    def to_frame(self, **constants) -> pd.DataFrame:
+        """DataFrame aller Spalten; Schlüsselwort-Argumente werden als konstante Spalten angehängt."""
+        df = pd.DataFrame(self.columns)
+        for name, value in constants.items():
+            df[name] = value
+        return df
@@ -1,12 +1,22 @@
 import os
 import re
+from .archives import ARCHIVE_SUFFIXES, is_archive, find_data_folder_in_archive
+
+# Reihenfolge der normalisierten Blöcke (kleingeschrieben) in Tabellen und Plots
+BLOCK_ORDER = ["pretest", "b1", "b2", "b3", "b4", "b5", "b6", "b7", "b8", "posttest"]
 
 def find_midi_data_folder(start_path="."):
+    # Archiv als Startpfad: "Daten (MIDI)" im Archiv (virtueller Pfad, siehe archives)
+    if is_archive(start_path):
+        return find_data_folder_in_archive(start_path)
     current = os.path.abspath(start_path)
     while True:
         candidate = os.path.join(current, "Daten (MIDI)")
         if os.path.isdir(candidate):
             return candidate
+        for suffix in ARCHIVE_SUFFIXES:
+            if is_archive(candidate + suffix):
+                return find_data_folder_in_archive(candidate + suffix)
         parent = os.path.dirname(current)
         if parent == current:
             break
@@ -69,3 +79,8 @@ def normalize_block_name(block: str) -> str:
     
     # Letzter Fallback: Original zurückgeben
     return block
+
+def block_sort_key(block: str):
+    """Sortierschlüssel: Pretest, B1..B8, Posttest, danach übrige Blöcke alphabetisch."""
+    name = str(block).lower()
+    return (0, BLOCK_ORDER.index(name), "") if name in BLOCK_ORDER else (1, 0, name)
@@ -3,6 +3,7 @@ Creates ONE learning-curve plot (transition time) with 3 curves:
 - all together (all)
 - frequent (h)
 - rare (s)
+plus a within-block plot (rolling median over the detected transition index idx_from, one line per block).
 """
 
 from __future__ import annotations
@@ -10,6 +11,10 @@ import os
 import pandas as pd
 import matplotlib.pyplot as plt
 
+from midi_state_analysis.folder_utils import BLOCK_ORDER
+from midi_state_analysis.transition_data import load_transitions
+from midi_state_analysis.rolling_curves import rolling_curves
+
 
 # =========================
 # CONFIG
@@ -21,17 +26,21 @@ COL_GROUP = "group"              # not plotted anymore, but kept for compatibili
 COL_FREQ  = "freq"               # 'h' / 's'
 COL_TT    = "transition_time_s"
 
-BLOCK_ORDER = ["pretest", "b1", "b2", "b3", "b4", "b5", "b6", "b7", "b8", "posttest"]
-
 OUT_DIR = "plots"
-os.makedirs(OUT_DIR, exist_ok=True)
+
+
+def _normalize_labels(series: pd.Series) -> pd.Series:
+    # strip/lower once per category instead of once per row
+    return series.astype("category").map(lambda v: str(v).strip().lower())
 
 
 def _prep(df: pd.DataFrame) -> pd.DataFrame:
     df = df.copy()
 
-    df[COL_BLOCK] = df[COL_BLOCK].astype(str).str.strip().str.lower()
-    df[COL_FREQ]  = df[COL_FREQ].astype(str).str.strip().str.lower()
+    if COL_FREQ not in df.columns and "state_from_freq" in df.columns:
+        df[COL_FREQ] = df["state_from_freq"]
+    df[COL_BLOCK] = _normalize_labels(df[COL_BLOCK])
+    df[COL_FREQ]  = _normalize_labels(df[COL_FREQ])
     df[COL_TT]    = pd.to_numeric(df[COL_TT], errors="coerce")
 
     df = df.dropna(subset=[COL_BLOCK, COL_FREQ, COL_TT])
@@ -78,9 +87,40 @@ def plot_learning_curve_combined(means: pd.DataFrame, title: str, out_path: str)
     plt.close()
 
 
-def main() -> None:
-    df = pd.read_csv(CSV_PATH)
-    df = _prep(df)
+def plot_within_block_curves(curves: pd.DataFrame, out_path: str, value_col: str = "rolling_median_s") -> None:
+    # curves = rolling_curves(df): mean over subjects per block and transition index (position = idx_from)
+    curves = curves.assign(**{COL_BLOCK: _normalize_labels(curves[COL_BLOCK])})
+    curves = curves[curves[COL_BLOCK].isin(BLOCK_ORDER)]
+    mean_curve = (
+        curves.groupby([COL_BLOCK, "position"], observed=True)[value_col]
+              .mean()
+              .reset_index()
+    )
+    plateau = curves.groupby(COL_BLOCK, observed=True)["plateau_position"].median()
+
+    plt.figure(figsize=(12, 5))
+    for blk in BLOCK_ORDER:
+        sub = mean_curve[mean_curve[COL_BLOCK] == blk]
+        if sub.empty:
+            continue
+        line, = plt.plot(sub["position"], sub[value_col], linewidth=1.5, label=blk)
+        if blk in plateau.index and pd.notna(plateau[blk]):
+            plt.axvline(plateau[blk], color=line.get_color(), linestyle=":", alpha=0.6)
+
+    plt.title("Within-block learning curves (dotted: median plateau onset)")
+    plt.xlabel("Detected transition index in block (idx_from)")
+    plt.ylabel("Transition time (s), rolling median")
+    plt.grid(True, axis="y", alpha=0.3)
+    plt.legend(loc="center left", bbox_to_anchor=(1.02, 0.5))
+    plt.tight_layout()
+    plt.savefig(out_path, dpi=200)
+    plt.close()
+
+
+def run(raw: pd.DataFrame, out_dir: str = OUT_DIR) -> None:
+    # raw = transition table as returned by load_transitions (or the pipeline)
+    os.makedirs(out_dir, exist_ok=True)
+    df = _prep(raw)
 
     means_all = compute_means(df, "all")
     means_h   = compute_means(df[df[COL_FREQ] == "h"], "frequent (h)")
@@ -91,10 +131,19 @@ def main() -> None:
     plot_learning_curve_combined(
         means,
         "Learning curve during the acquisition phase",
-        os.path.join(OUT_DIR, "learning_curve_all_h_s.png")
+        os.path.join(out_dir, "learning_curve_all_h_s.png")
     )
 
-    print("Done. Saved plot to:", OUT_DIR)
+    plot_within_block_curves(
+        rolling_curves(raw),
+        os.path.join(out_dir, "within_block_curves.png")
+    )
+
+    print("Done. Saved plots to:", out_dir)
+
+
+def main() -> None:
+    run(load_transitions(CSV_PATH))
 
 
 if __name__ == "__main__":
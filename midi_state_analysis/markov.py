@@ -0,0 +1,227 @@
+"""
+Übergangsmatrizen und Markov-Kennzahlen je Subject × Block.
+
+Alle Matrizen entstehen in einem Schritt: jede Transition bekommt den flachen Code
+((subject · B + block) · S + state_from) · S + state_to, np.bincount zählt Häufigkeiten
+und summiert Übergangszeiten. Ergebnis ist ein 4-D-Array (Subject, Block, von, nach)
+plus Label-Index (subjects, blocks, states).
+
+Abgeleitete Kennzahlen (vektorisiert über alle Subject × Block):
+    - Übergangswahrscheinlichkeiten P (Zeilen normiert)
+    - Entropie je Zeile und Entropierate Σ π_i · H_i (Bit)
+    - stationäre Verteilung π (Potenziteration der "lazy" Kette (P + I) / 2)
+    - Abweichung von der erwarteten Matrix aus TEST_/BLOCK_TRANSITION_SEQUENCE
+
+Hinweis: die Ergebnis-CSV enthält nur Transitionen der erwarteten Sequenz; unerwartete
+Übergänge tauchen also nur auf, wenn eine ungefilterte Tabelle übergeben wird.
+
+Beispiel:
+    >>> matrices = TransitionMatrices.from_frame(load_transitions())
+    >>> matrices.counts.shape          # (Subjects, Blöcke, 9, 9)
+    >>> markov_summary(matrices)
+"""
+
+import json
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .config import STATE_DEFS, get_transition_sequence, map_transition_index_to_states
+from .folder_utils import block_sort_key
+from .transition_data import classify_block
+
+
+class TransitionMatrices:
+    """
+    Zähl- und Zeitsummen-Matrizen aller Subjects × Blöcke.
+
+    counts[i, j, a, b]:     Anzahl Übergänge states[a] -> states[b] von subjects[i] in blocks[j]
+    time_sum_s[i, j, a, b]: Summe der Übergangszeiten dazu (Mittel über `mean_time_s`)
+    """
+
+    __slots__ = ("counts", "time_sum_s", "subjects", "blocks", "states")
+
+    def __init__(
+        self,
+        counts: np.ndarray,
+        time_sum_s: np.ndarray,
+        subjects: Sequence[str],
+        blocks: Sequence[str],
+        states: Sequence[int],
+    ):
+        self.counts = counts
+        self.time_sum_s = time_sum_s
+        self.subjects: List[str] = list(subjects)
+        self.blocks: List[str] = list(blocks)
+        self.states: List[int] = list(states)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, states: Optional[Sequence[int]] = None) -> "TransitionMatrices":
+        """
+        Baut alle Matrizen aus einer Transitionstabelle (subject, block, state_from, state_to,
+        transition_time_s). Zeilen mit States außerhalb von `states` werden ignoriert.
+        """
+        states = sorted(states if states is not None else STATE_DEFS)
+        subject_codes, subjects = pd.factorize(df["subject"].astype(str), sort=True)
+        blocks = sorted(pd.unique(df["block"].astype(str)), key=block_sort_key)
+        block_codes = pd.Categorical(df["block"].astype(str), categories=blocks).codes
+
+        # State-ID -> Zeilen-/Spaltenindex über eine Lookup-Tabelle
+        state_from = df["state_from"].to_numpy(np.int64)
+        state_to = df["state_to"].to_numpy(np.int64)
+        max_state = max(max(states), int(state_from.max(initial=0)), int(state_to.max(initial=0)))
+        lookup = np.full(max_state + 1, -1, dtype=np.int64)
+        lookup[states] = np.arange(len(states))
+        from_idx = lookup[state_from]
+        to_idx = lookup[state_to]
+
+        times = df["transition_time_s"].to_numpy(float)
+        valid = (from_idx >= 0) & (to_idx >= 0) & (subject_codes >= 0) & (block_codes >= 0) & ~np.isnan(times)
+        n_s, n_b, n_states = len(subjects), len(blocks), len(states)
+        flat = ((subject_codes[valid] * n_b + block_codes[valid]) * n_states + from_idx[valid]) * n_states + to_idx[valid]
+        size = n_s * n_b * n_states * n_states
+        shape = (n_s, n_b, n_states, n_states)
+        counts = np.bincount(flat, minlength=size).astype(np.int32).reshape(shape)
+        time_sum = np.bincount(flat, weights=times[valid], minlength=size).reshape(shape)
+        return cls(counts, time_sum, list(subjects), blocks, states)
+
+    @property
+    def mean_time_s(self) -> np.ndarray:
+        """Mittlere Übergangszeit je Zelle (NaN ohne Beobachtung)."""
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(self.counts > 0, self.time_sum_s / self.counts, np.nan)
+
+    @property
+    def probabilities(self) -> np.ndarray:
+        """Zeilen-normierte Übergangswahrscheinlichkeiten (NaN-Zeilen für nie verlassene States)."""
+        rows = self.counts.sum(axis=-1, keepdims=True)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return self.counts / rows
+
+    def index(self, subject: str, block: str) -> tuple:
+        """Position (i, j) von subject und block im 4-D-Array."""
+        return self.subjects.index(subject), self.blocks.index(block)
+
+    def pooled(self) -> "TransitionMatrices":
+        """Über alle Subjects summiert (ein "Subject" namens "alle")."""
+        return TransitionMatrices(
+            self.counts.sum(axis=0, keepdims=True),
+            self.time_sum_s.sum(axis=0, keepdims=True),
+            ["alle"], self.blocks, self.states,
+        )
+
+    def expected_counts(self) -> np.ndarray:
+        """Erwartete Zählmatrix je Block (Blöcke × S × S) aus der Test- bzw. Block-Sequenz."""
+        n_states = len(self.states)
+        position = {state: i for i, state in enumerate(self.states)}
+        expected = np.zeros((len(self.blocks), n_states, n_states), dtype=np.int32)
+        for j, block in enumerate(self.blocks):
+            block_type = "Test" if classify_block(block) == "Test" else "Block"
+            for code in get_transition_sequence(block_type):
+                a, b = map_transition_index_to_states(code)
+                if a in position and b in position:
+                    expected[j, position[a], position[b]] += 1
+        return expected
+
+    def save(self, path: str) -> None:
+        """Speichert Arrays und Label-Index komprimiert als .npz."""
+        labels = {"subjects": self.subjects, "blocks": self.blocks, "states": self.states}
+        np.savez_compressed(path, counts=self.counts, time_sum_s=self.time_sum_s, labels=json.dumps(labels))
+
+    @classmethod
+    def load(cls, path: str) -> "TransitionMatrices":
+        with np.load(path) as data:
+            labels = json.loads(str(data["labels"]))
+            return cls(data["counts"], data["time_sum_s"], labels["subjects"], labels["blocks"], labels["states"])
+
+
+def row_entropy(probabilities: np.ndarray) -> np.ndarray:
+    """Shannon-Entropie (Bit) jeder Zeile; 0 für nie verlassene States."""
+    p = np.nan_to_num(probabilities)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        terms = np.where(p > 0, -p * np.log2(p), 0.0)
+    return terms.sum(axis=-1)
+
+
+def stationary_distribution(counts: np.ndarray, tol: float = 1e-12, max_iter: int = 10_000) -> np.ndarray:
+    """
+    Stationäre Verteilung jeder Matrix im Stapel (..., S, S).
+
+    States ohne ausgehende Übergänge springen gemäß der beobachteten Besuchshäufigkeit
+    zurück in die Kette; die "lazy" Kette (P + I) / 2 konvergiert auch bei periodischen
+    Sequenzen und hat dieselbe stationäre Verteilung.
+    """
+    counts = np.asarray(counts, dtype=float)
+    batch_shape, n_states = counts.shape[:-2], counts.shape[-1]
+    c = counts.reshape(-1, n_states, n_states)
+    out_counts = c.sum(axis=2)
+    visits = out_counts + c.sum(axis=1)
+    total = visits.sum(axis=1, keepdims=True)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        occupancy = np.where(total > 0, visits / total, 1.0 / n_states)
+        p = np.where(out_counts[:, :, None] > 0, c / out_counts[:, :, None], occupancy[:, None, :])
+    lazy = (p + np.eye(n_states)) / 2
+    pi = occupancy.copy()
+    for _ in range(max_iter):
+        nxt = np.einsum("bi,bij->bj", pi, lazy)
+        if np.abs(nxt - pi).max(initial=0.0) < tol:
+            pi = nxt
+            break
+        pi = nxt
+    pi[total[:, 0] == 0] = np.nan
+    return pi.reshape(*batch_shape, n_states)
+
+
+def markov_summary(matrices: TransitionMatrices) -> pd.DataFrame:
+    """
+    Kennzahlen je Subject × Block (nur Kombinationen mit Daten).
+
+    Spalten: n_transitions, entropy_rate_bits, mean_time_s, tv_distance (Totalvariation zur
+    erwarteten Übergangsverteilung), completeness (Anteil der erwarteten Übergänge, die
+    gespielt wurden), missing_expected (erwartete Zellen ohne Beobachtung),
+    unexpected_share (Anteil der Übergänge außerhalb der Sequenz) und pi_<state>.
+    """
+    counts = matrices.counts.astype(float)
+    n = counts.sum(axis=(-2, -1))
+    pi = stationary_distribution(counts)
+    entropy_rate = np.einsum("...i,...i->...", np.nan_to_num(pi), row_entropy(matrices.probabilities))
+
+    expected = matrices.expected_counts().astype(float)[None]
+    expected_total = expected.sum(axis=(-2, -1))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        observed_share = counts / n[..., None, None]
+        expected_share = expected / expected_total[..., None, None]
+        tv = 0.5 * np.abs(observed_share - expected_share).sum(axis=(-2, -1))
+        completeness = np.minimum(counts, expected).sum(axis=(-2, -1)) / expected_total
+        unexpected = (counts * (expected == 0)).sum(axis=(-2, -1)) / n
+        mean_time = matrices.time_sum_s.sum(axis=(-2, -1)) / n
+    missing = ((expected > 0) & (counts == 0)).sum(axis=(-2, -1))
+
+    subject_idx, block_idx = np.nonzero(n > 0)
+    sel = (subject_idx, block_idx)
+    result = pd.DataFrame({
+        "subject": np.asarray(matrices.subjects, dtype=object)[subject_idx],
+        "block": np.asarray(matrices.blocks, dtype=object)[block_idx],
+        "n_transitions": n[sel].astype(int),
+        "entropy_rate_bits": entropy_rate[sel],
+        "mean_time_s": mean_time[sel],
+        "tv_distance": tv[sel],
+        "completeness": completeness[sel],
+        "missing_expected": missing[sel],
+        "unexpected_share": unexpected[sel],
+    })
+    for k, state in enumerate(matrices.states):
+        result[f"pi_{state}"] = pi[sel][:, k]
+    return result
+
+
+def matrix_frame(matrices: TransitionMatrices, subject: str, block: str, values: str = "counts") -> pd.DataFrame:
+    """Eine Matrix als beschriftete S × S-Tabelle (values: "counts", "mean_time_s" oder "probabilities")."""
+    i, j = matrices.index(subject, block)
+    data: Dict[str, np.ndarray] = {
+        "counts": matrices.counts,
+        "mean_time_s": matrices.mean_time_s,
+        "probabilities": matrices.probabilities,
+    }
+    return pd.DataFrame(data[values][i, j], index=matrices.states, columns=matrices.states)
@@ -1,4 +1,6 @@
+from typing import Dict
 import mido
+import numpy as np
 
 def get_sec_per_tick(mid: mido.MidiFile) -> float:
     tempo = 500000
@@ -10,3 +12,34 @@ def get_sec_per_tick(mid: mido.MidiFile) -> float:
 
 def merge_music_tracks(mid: mido.MidiFile):
     return mido.merge_tracks(mid.tracks[1:]) if len(mid.tracks) > 1 else mid.tracks[0]
+
+def extract_note_events(mid: mido.MidiFile) -> Dict[str, np.ndarray]:
+    """
+    Dekodiert alle Noten-Events der Musik-Tracks in spaltenweise NumPy-Arrays.
+
+    note_on mit Velocity 0 zählt wie in der State-Erkennung als Loslassen.
+    Die Sekunden werden wie in `detect_states_in_midi` mit dem ersten Tempo berechnet.
+
+    Returns:
+        Dict mit den Spalten "tick" (int64), "time_s" (float64), "pitch" (uint8),
+        "velocity" (uint8) und "is_on" (bool), alle gleich lang.
+    """
+    sec_per_tick = get_sec_per_tick(mid)
+    ticks, pitches, velocities, is_on = [], [], [], []
+    tick = 0
+    for msg in merge_music_tracks(mid):
+        tick += msg.time
+        if msg.type not in ("note_on", "note_off"):
+            continue
+        ticks.append(tick)
+        pitches.append(msg.note)
+        velocities.append(msg.velocity)
+        is_on.append(msg.type == "note_on" and msg.velocity > 0)
+    tick_arr = np.asarray(ticks, dtype=np.int64)
+    return {
+        "tick": tick_arr,
+        "time_s": tick_arr * sec_per_tick,
+        "pitch": np.asarray(pitches, dtype=np.uint8),
+        "velocity": np.asarray(velocities, dtype=np.uint8),
+        "is_on": np.asarray(is_on, dtype=bool),
+    }
@@ -0,0 +1,245 @@
+"""
+Lineares gemischtes Modell transition_time_s ~ block * freq + (1|subject) ohne Iteration über Zeilen.
+
+Die Übergänge einer Versuchsperson sind Messwiederholungen; die OLS-ANOVA in
+anova_Transition behandelt sie als unabhängig und unterschätzt die Standardfehler. Hier
+bekommt jedes Subject einen zufälligen Achsenabschnitt b_i ~ N(0, σ_b²).
+
+Rechenweg:
+    - Designmatrizen X (Zellmittel-Kodierung block × freq, eine 1 pro Zeile) und Z
+      (Subject-Zugehörigkeit) als scipy.sparse; einmalig werden X'X, Z'X, X'y, Z'y und y'y
+      gebildet, danach hängt nichts mehr von der Zeilenzahl ab.
+    - Mit λ = σ_b² / σ² gilt je Subject (I + λ J)⁻¹ = I - λ / (1 + n_i λ) · J, d.h.
+      X'V⁻¹X, X'V⁻¹y und y'V⁻¹y sind Korrekturen der Kreuzprodukte um gewichtete
+      Subject-Summen. β und σ² folgen geschlossen, die (REML-)Likelihood wird nur noch
+      eindimensional über log λ optimiert (Brent, Rand λ = 0 wird mitgeprüft).
+    - Wald-F-Tests für block, freq und block:freq auf den Zellmitteln (Typ III, gleich
+      gewichtete Randmittel); Nenner-Freiheitsgrade nach der Between-Within-Methode
+      (N - Rang[X Z]), da alle Terme innerhalb der Subjects variieren.
+
+Beispiel:
+    >>> result = fit_mixed_model(load_transitions())
+    >>> result.wald_tests()
+    >>> result.cell_table()
+"""
+
+from typing import List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.linalg import cho_factor, cho_solve
+from scipy.optimize import minimize_scalar
+from scipy.stats import f as f_dist, norm
+
+from .folder_utils import block_sort_key
+
+VALUE_COL = "transition_time_s"
+LOG_LAMBDA_BOUNDS = (-12.0, 8.0)
+
+
+def _design(codes: np.ndarray, n_levels: int) -> sparse.csr_matrix:
+    """One-hot-Matrix (Zeilen × n_levels) aus Level-Codes."""
+    n = len(codes)
+    return sparse.csr_matrix((np.ones(n), (np.arange(n), codes)), shape=(n, n_levels))
+
+
+def _difference_contrast(k: int) -> np.ndarray:
+    """(k-1) × k-Kontrast: Level j minus letztes Level."""
+    return np.hstack([np.eye(k - 1), -np.ones((k - 1, 1))])
+
+
+class _Profile:
+    """Suffiziente Statistiken; bewertet die profilierte (REML-)Likelihood für ein λ."""
+
+    def __init__(self, X: sparse.csr_matrix, Z: sparse.csr_matrix, y: np.ndarray, reml: bool):
+        self.n_obs, self.p = X.shape
+        self.reml = reml
+        self.xtx = (X.T @ X).toarray()
+        self.zx = (Z.T @ X).toarray()
+        self.xty = X.T @ y
+        self.zty = Z.T @ y
+        self.yty = float(y @ y)
+        self.n_i = np.asarray(Z.sum(axis=0)).ravel()
+
+    def solve(self, lam: float):
+        """β, Cholesky von X'V₀⁻¹X, y'V₀⁻¹y - β'X'V₀⁻¹y und log|V₀| für V₀ = I + λ ZZ'."""
+        w = lam / (1 + self.n_i * lam)
+        a = self.xtx - self.zx.T @ (w[:, None] * self.zx)
+        c = self.xty - self.zx.T @ (w * self.zty)
+        chol = cho_factor(a)
+        beta = cho_solve(chol, c)
+        quad = self.yty - float(w @ self.zty ** 2) - float(beta @ c)
+        return beta, chol, quad, float(np.log1p(self.n_i * lam).sum())
+
+    def deviance(self, lam: float) -> float:
+        """-2 · (REML-)Log-Likelihood mit herausprofiliertem σ²."""
+        _, chol, quad, logdet_v = self.solve(lam)
+        dof = self.n_obs - self.p if self.reml else self.n_obs
+        dev = dof * (np.log(quad / dof) + 1 + np.log(2 * np.pi)) + logdet_v
+        if self.reml:
+            dev += 2 * np.log(np.diag(chol[0])).sum()
+        return float(dev)
+
+
+class MixedModelResult:
+    """
+    Geschätztes Modell: Zellmittel je block × freq, Kovarianz, Varianzkomponenten.
+
+    cell_means[k] gehört zur Zelle (blocks[k // len(freqs)], freqs[k % len(freqs)]).
+    """
+
+    __slots__ = (
+        "blocks", "freqs", "cell_means", "cov", "cell_counts", "sigma2", "sigma2_subject",
+        "loglik", "reml", "n_obs", "n_subjects", "den_df", "subject_effects",
+    )
+
+    def __init__(self, blocks, freqs, cell_means, cov, cell_counts, sigma2, sigma2_subject,
+                 loglik, reml, n_obs, n_subjects, den_df, subject_effects):
+        self.blocks: List[str] = list(blocks)
+        self.freqs: List[str] = list(freqs)
+        self.cell_means = cell_means
+        self.cov = cov
+        self.cell_counts = cell_counts
+        self.sigma2 = sigma2
+        self.sigma2_subject = sigma2_subject
+        self.loglik = loglik
+        self.reml = reml
+        self.n_obs = n_obs
+        self.n_subjects = n_subjects
+        self.den_df = den_df
+        self.subject_effects = subject_effects
+
+    @property
+    def icc(self) -> float:
+        """Intraklassenkorrelation σ_b² / (σ_b² + σ²)."""
+        return self.sigma2_subject / (self.sigma2_subject + self.sigma2)
+
+    def cell_table(self, confidence: float = 0.95) -> pd.DataFrame:
+        """Modellbasierte Zellmittel mit Standardfehler und Wald-KI."""
+        se = np.sqrt(np.diag(self.cov))
+        z = norm.ppf(1 - (1 - confidence) / 2)
+        return pd.DataFrame({
+            "block": np.repeat(self.blocks, len(self.freqs)),
+            "freq": np.tile(self.freqs, len(self.blocks)),
+            "n": self.cell_counts,
+            "mean_s": self.cell_means,
+            "se_s": se,
+            "ci_lower_s": self.cell_means - z * se,
+            "ci_upper_s": self.cell_means + z * se,
+        })
+
+    def wald_tests(self) -> pd.DataFrame:
+        """Wald-F-Tests (Typ III) für block, freq und block:freq."""
+        n_blocks, n_freqs = len(self.blocks), len(self.freqs)
+        mean_blocks = np.full((1, n_blocks), 1 / n_blocks)
+        mean_freqs = np.full((1, n_freqs), 1 / n_freqs)
+        terms = []
+        if n_blocks > 1:
+            terms.append(("block", np.kron(_difference_contrast(n_blocks), mean_freqs)))
+        if n_freqs > 1:
+            terms.append(("freq", np.kron(mean_blocks, _difference_contrast(n_freqs))))
+        if n_blocks > 1 and n_freqs > 1:
+            terms.append(("block:freq", np.kron(_difference_contrast(n_blocks), _difference_contrast(n_freqs))))
+        rows = []
+        for term, contrast in terms:
+            estimate = contrast @ self.cell_means
+            middle = contrast @ self.cov @ contrast.T
+            num_df = contrast.shape[0]
+            f_stat = float(estimate @ np.linalg.solve(middle, estimate)) / num_df
+            rows.append({
+                "term": term,
+                "num_df": num_df,
+                "den_df": self.den_df,
+                "F": f_stat,
+                "p": float(f_dist.sf(f_stat, num_df, self.den_df)),
+            })
+        return pd.DataFrame(rows)
+
+    def variance_components(self) -> pd.DataFrame:
+        """σ_b² (Subject), σ² (Residuum), ICC und Log-Likelihood in einer Zeile."""
+        return pd.DataFrame([{
+            "n_obs": self.n_obs,
+            "n_subjects": self.n_subjects,
+            "var_subject": self.sigma2_subject,
+            "var_residual": self.sigma2,
+            "icc": self.icc,
+            "method": "REML" if self.reml else "ML",
+            "loglik": self.loglik,
+        }])
+
+
+def fit_mixed_model(
+    df: pd.DataFrame,
+    block_col: str = "block",
+    freq_col: str = "state_from_freq",
+    subject_col: str = "subject",
+    value_col: str = VALUE_COL,
+    reml: bool = True,
+    blocks: Optional[Sequence[str]] = None,
+) -> MixedModelResult:
+    """
+    Schätzt value ~ block * freq + (1|subject) per (REML-)Profil-Likelihood.
+
+    Args:
+        df: Transitionstabelle
+        block_col, freq_col, subject_col, value_col: Spaltennamen
+        reml: REML (Default) oder Maximum Likelihood
+        blocks: Reihenfolge/Auswahl der Blöcke (Default: alle, Pretest, B1..B8, Posttest)
+
+    Raises:
+        ValueError: zu wenige Subjects/Zeilen oder leere block × freq-Zellen
+    """
+    data = df[[block_col, freq_col, subject_col, value_col]].dropna()
+    data = data.assign(**{block_col: data[block_col].astype(str), freq_col: data[freq_col].astype(str)})
+    if blocks is None:
+        blocks = sorted(pd.unique(data[block_col]), key=block_sort_key)
+    else:
+        blocks = [str(block) for block in blocks]
+        data = data[data[block_col].isin(blocks)]
+    freqs = sorted(pd.unique(data[freq_col]))
+    block_codes = pd.Categorical(data[block_col], categories=blocks).codes
+    freq_codes = pd.Categorical(data[freq_col], categories=freqs).codes
+    subject_codes, subjects = pd.factorize(data[subject_col].astype(str), sort=True)
+    y = data[value_col].to_numpy(float)
+
+    n_cells = len(blocks) * len(freqs)
+    cells = block_codes.astype(np.int64) * len(freqs) + freq_codes
+    cell_counts = np.bincount(cells, minlength=n_cells)
+    if (cell_counts == 0).any():
+        empty = [f"{blocks[k // len(freqs)]}/{freqs[k % len(freqs)]}" for k in np.flatnonzero(cell_counts == 0)]
+        raise ValueError(f"Leere Zellen block/freq: {', '.join(empty)}")
+    n_obs, n_subjects = len(y), len(subjects)
+    if n_subjects < 2 or n_obs <= n_cells + n_subjects:
+        raise ValueError("Zu wenige Subjects oder Transitionen für das gemischte Modell.")
+
+    profile = _Profile(_design(cells, n_cells), _design(subject_codes, n_subjects), y, reml)
+    fit = minimize_scalar(lambda log_lam: profile.deviance(np.exp(log_lam)),
+                          bounds=LOG_LAMBDA_BOUNDS, method="bounded", options={"xatol": 1e-8})
+    lam = float(np.exp(fit.x))
+    deviance = float(fit.fun)
+    boundary = profile.deviance(0.0)
+    if boundary <= deviance:
+        lam, deviance = 0.0, boundary
+
+    beta, chol, quad, _ = profile.solve(lam)
+    sigma2 = quad / (n_obs - n_cells if reml else n_obs)
+    cov = sigma2 * cho_solve(chol, np.eye(n_cells))
+    # BLUP der Subject-Abschnitte: λ / (1 + n_i λ) · Σ_i (y - Xβ)
+    weight = lam / (1 + profile.n_i * lam)
+    subject_effects = pd.Series(weight * (profile.zty - profile.zx @ beta), index=subjects, name="subject_effect_s")
+    return MixedModelResult(
+        blocks=blocks,
+        freqs=freqs,
+        cell_means=beta,
+        cov=cov,
+        cell_counts=cell_counts,
+        sigma2=sigma2,
+        sigma2_subject=lam * sigma2,
+        loglik=-deviance / 2,
+        reml=reml,
+        n_obs=n_obs,
+        n_subjects=n_subjects,
+        den_df=n_obs - n_cells - n_subjects + 1,
+        subject_effects=subject_effects,
+    )
@@ -0,0 +1,181 @@
+"""
+Ausreißer-Erkennung für Übergangszeiten je Subject × Block × transition_id.
+
+Alle Gruppen werden gleichzeitig behandelt: Gruppen werden einmal auf ganzzahlige Codes
+abgebildet, Kennzahlen entstehen per np.bincount bzw. gruppiertem Quantil, Entscheidungen
+als Array-Vergleich. Der iterative Grubbs-Test entfernt pro Runde höchstens einen Wert je
+Gruppe und hört für eine Gruppe auf, sobald ihr extremster Wert nicht mehr signifikant ist;
+die Zahl der Runden ist durch die größte Gruppe begrenzt, nicht durch die Zahl der Gruppen.
+
+Methoden:
+    - "grubbs": iterativer Grubbs-Test (zweiseitig, alpha)
+    - "iqr":    außerhalb [Q1 - k·IQR, Q3 + k·IQR]
+    - "mad":    |0.6745 · (x - Median) / MAD| > threshold (modifizierter z-Wert)
+
+Beispiel:
+    >>> mask, audit = detect_outliers(df, method="grubbs")
+    >>> clean = df[~mask]
+"""
+
+from typing import Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy.stats import t as t_dist
+
+VALUE_COL = "transition_time_s"
+OUTLIER_GROUP_COLS = ("subject", "block", "transition_id")
+OUTLIER_METHODS = ("grubbs", "iqr", "mad")
+MIN_GROUP_SIZE = 3
+
+AUDIT_COLUMNS = ["row", VALUE_COL, "method", "score", "critical", "round"]
+
+
+def _group_codes(df: pd.DataFrame, by: Sequence[str]) -> Tuple[np.ndarray, int]:
+    codes = df.groupby(list(by), observed=True, sort=False).ngroup().to_numpy()
+    return codes, int(codes.max()) + 1 if codes.size else 0
+
+
+def _grubbs(values: np.ndarray, codes: np.ndarray, n_groups: int, alpha: float, max_rounds: int | None):
+    n_rows = values.size
+    active = ~np.isnan(values) & (codes >= 0)
+    done = np.zeros(n_groups + 1, dtype=bool)
+    score = np.full(n_rows, np.nan)
+    critical = np.full(n_rows, np.nan)
+    rounds = np.zeros(n_rows, dtype=np.int32)
+    round_no = 0
+    while max_rounds is None or round_no < max_rounds:
+        rows = np.flatnonzero(active & ~done[codes])
+        if rows.size == 0:
+            break
+        round_no += 1
+        c, v = codes[rows], values[rows]
+        n = np.bincount(c, minlength=n_groups)
+        mean = np.bincount(c, v, minlength=n_groups) / np.maximum(n, 1)
+        dev = np.abs(v - mean[c])
+        sd = np.sqrt(np.bincount(c, dev ** 2, minlength=n_groups) / np.maximum(n - 1, 1))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            g = dev / sd[c]
+        g = np.nan_to_num(g, nan=0.0)
+
+        # Extremster Wert je Gruppe: nach (Gruppe, -G) sortieren, ersten Eintrag nehmen
+        order = np.lexsort((-g, c))
+        first = order[np.r_[True, c[order][1:] != c[order][:-1]]]
+        group = c[first]
+        size = n[group].astype(float)
+        testable = size >= MIN_GROUP_SIZE
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t_crit = t_dist.ppf(1 - alpha / (2 * size), size - 2)
+            g_crit = (size - 1) / np.sqrt(size) * np.sqrt(t_crit ** 2 / (size - 2 + t_crit ** 2))
+        reject = testable & (g[first] > g_crit)
+
+        hit = rows[first[reject]]
+        active[hit] = False
+        score[hit] = g[first[reject]]
+        critical[hit] = g_crit[reject]
+        rounds[hit] = round_no
+        done[group[~reject]] = True
+    flagged = rounds > 0
+    return flagged, score, critical, rounds
+
+
+def _robust_bounds(df: pd.DataFrame, codes: np.ndarray, quantiles: Sequence[float]) -> np.ndarray:
+    """Gruppierte Quantile, zurück auf Zeilen abgebildet (Zeilen × len(quantiles))."""
+    values = df[VALUE_COL].to_numpy(float)
+    valid = codes >= 0
+    table = (
+        pd.Series(values[valid]).groupby(codes[valid])
+          .quantile(list(quantiles)).unstack()
+          .reindex(columns=list(quantiles))
+    )
+    out = np.full((len(df), len(quantiles)), np.nan)
+    out[valid] = table.reindex(codes[valid]).to_numpy()
+    return out
+
+
+def detect_outliers(
+    df: pd.DataFrame,
+    method: str = "grubbs",
+    by: Sequence[str] = OUTLIER_GROUP_COLS,
+    alpha: float = 0.05,
+    iqr_factor: float = 1.5,
+    mad_threshold: float = 3.5,
+    max_rounds: int | None = None,
+) -> Tuple[pd.Series, pd.DataFrame]:
+    """
+    Markiert Ausreißer in transition_time_s innerhalb jeder by-Gruppe.
+
+    Args:
+        df: Transitionstabelle (z.B. aus load_transitions)
+        method: "grubbs", "iqr" oder "mad"
+        by: Gruppierung (Default: subject × block × transition_id)
+        alpha: Signifikanzniveau für Grubbs
+        iqr_factor: Faktor k der IQR-Regel
+        mad_threshold: Grenze für den modifizierten z-Wert
+        max_rounds: Höchstzahl Grubbs-Runden (Default: bis keine Gruppe mehr verwirft)
+
+    Returns:
+        (mask, audit): bool-Series mit dem Index von df (True = Ausreißer) und eine Tabelle
+        mit einer Zeile pro Ausreißer (by-Spalten, row, Wert, method, score, critical, round)
+    """
+    if method not in OUTLIER_METHODS:
+        raise ValueError(f"Unbekannte Ausreißer-Methode {method!r}, erlaubt: {', '.join(OUTLIER_METHODS)}")
+    by = list(by)
+    values = df[VALUE_COL].to_numpy(float)
+    codes, n_groups = _group_codes(df, by)
+    if n_groups == 0:
+        return pd.Series(False, index=df.index), pd.DataFrame(columns=[*by, *AUDIT_COLUMNS])
+
+    if method == "grubbs":
+        flagged, score, critical, rounds = _grubbs(values, codes, n_groups, alpha, max_rounds)
+    else:
+        valid = codes >= 0
+        n = np.bincount(codes[valid & ~np.isnan(values)], minlength=n_groups)
+        large_enough = np.zeros(len(df), dtype=bool)
+        large_enough[valid] = n[codes[valid]] >= MIN_GROUP_SIZE
+        if method == "iqr":
+            q1, q3 = _robust_bounds(df, codes, (0.25, 0.75)).T
+            iqr = q3 - q1
+            with np.errstate(divide="ignore", invalid="ignore"):
+                # Abstand zum nächsten Quartil in IQR-Einheiten
+                score = np.maximum(q1 - values, values - q3) / iqr
+            flagged = large_enough & ((values < q1 - iqr_factor * iqr) | (values > q3 + iqr_factor * iqr))
+            critical = np.full(len(df), iqr_factor)
+        else:
+            median = _robust_bounds(df, codes, (0.5,))[:, 0]
+            abs_dev = np.abs(values - median)
+            mad = np.full(len(df), np.nan)
+            mad[valid] = pd.Series(abs_dev[valid]).groupby(codes[valid]).median().reindex(codes[valid]).to_numpy()
+            with np.errstate(divide="ignore", invalid="ignore"):
+                score = 0.6745 * abs_dev / mad
+            flagged = large_enough & (mad > 0) & (score > mad_threshold)
+            critical = np.full(len(df), mad_threshold)
+        rounds = np.zeros(len(df), dtype=np.int32)
+
+    mask = pd.Series(flagged, index=df.index, name="outlier")
+    hits = np.flatnonzero(flagged)
+    audit = df.iloc[hits][by].reset_index(drop=True)
+    audit["row"] = df.index[hits]
+    audit[VALUE_COL] = values[hits]
+    audit["method"] = method
+    audit["score"] = score[hits]
+    audit["critical"] = critical[hits]
+    audit["round"] = rounds[hits]
+    return mask, audit
+
+
+def remove_outliers(df: pd.DataFrame, method: str = "grubbs", **kwargs) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """df ohne Ausreißer plus Audit-Tabelle (Argumente wie detect_outliers)."""
+    mask, audit = detect_outliers(df, method=method, **kwargs)
+    return df[~mask.to_numpy()], audit
+
+
+def outlier_summary(audit: pd.DataFrame, df: pd.DataFrame, by: Sequence[str] = ("block",)) -> pd.DataFrame:
+    """Anzahl und Anteil entfernter Werte je by-Gruppe für die Ausgabe in den Statistik-Skripten."""
+    by = list(by)
+    total = df.groupby(by, observed=True).size().rename("n")
+    removed = audit.groupby(by, observed=True).size().rename("n_outliers")
+    summary = pd.concat([total, removed], axis=1).fillna({"n_outliers": 0})
+    summary["n_outliers"] = summary["n_outliers"].astype(int)
+    summary["share_pct"] = 100 * summary["n_outliers"] / summary["n"]
+    return summary.reset_index()
@@ -0,0 +1,224 @@
+"""
+Gepaarte Vergleiche Pretest vs Posttest je Subject, vektorisiert über alle Gruppen.
+
+Ein groupby bildet die Subject-Mittelwerte je (by-Gruppe, Block); daraus entsteht eine
+Differenzmatrix D (Gruppen × Subjects, a - b) mit NaN für fehlende Zellen (Subject hat
+in einem der beiden Blöcke keine Transition dieser Gruppe). Alle Tests laufen dann
+entlang der Subject-Achse für alle Gruppen gleichzeitig:
+    - gepaarter t-Test (= Einstichproben-t auf D) mit KI der mittleren Differenz
+    - Wilcoxon-Vorzeichen-Rang-Test (Nullen verworfen, p-Wert wie scipy "auto": exakt,
+      Vorzeichen-Enumeration bei Bindungen und kleinem n, sonst Normalapproximation)
+    - Effektstärke dz = mittlere Differenz / SD der Differenzen mit exaktem KI über den
+      Nichtzentralitätsparameter der t-Verteilung (Bisektion für alle Gruppen parallel)
+Kein ttest_rel/wilcoxon-Aufruf pro Gruppe.
+
+Beispiel:
+    >>> paired_tests(load_transitions(), by=("transition_id",))
+"""
+
+from typing import Dict, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy.stats import nct, norm, t as t_dist
+
+VALUE_COL = "transition_time_s"
+PRE, POST = "Pretest", "Posttest"
+EXACT_MAX_N = 50
+
+_WILCOXON_CACHE: Dict[int, np.ndarray] = {}
+
+
+def paired_differences(
+    df: pd.DataFrame,
+    by: Sequence[str] = ("transition_id",),
+    a: str = PRE,
+    b: str = POST,
+) -> Tuple[pd.DataFrame, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Subject-Mittelwerte je Gruppe und Block in einem Durchgang.
+
+    Returns:
+        (Gruppen-Index als DataFrame, Mittelwerte a, Mittelwerte b, Differenzen a - b),
+        die Arrays jeweils Gruppen × Subjects mit NaN für fehlende Zellen
+    """
+    by = list(by)
+    subset = df[df["block"].astype(str).isin([a, b])]
+    means = subset.groupby([*by, "subject", "block"], observed=True)[VALUE_COL].mean()
+    cube = means.unstack("subject").unstack("block")
+    # Spalten: (subject, block) -> getrennte Matrizen für a und b
+    cube = cube.reindex(columns=pd.MultiIndex.from_product([cube.columns.levels[0], [a, b]]))
+    values = cube.to_numpy(float).reshape(len(cube), -1, 2)
+    mean_a, mean_b = values[:, :, 0], values[:, :, 1]
+    groups = cube.index.to_frame(index=False)
+    return groups, mean_a, mean_b, mean_a - mean_b
+
+
+def _wilcoxon_null_cdf(n: int) -> np.ndarray:
+    """CDF der Rangsumme W+ unter H0 für n Paare ohne Bindungen (Index = W)."""
+    cdf = _WILCOXON_CACHE.get(n)
+    if cdf is None:
+        counts = np.zeros(n * (n + 1) // 2 + 1)
+        counts[0] = 1
+        for rank in range(1, n + 1):
+            counts[rank:] = counts[rank:] + counts[:-rank].copy()
+        cdf = _WILCOXON_CACHE[n] = np.cumsum(counts) / 2.0 ** n
+    return cdf
+
+
+def wilcoxon_signed_rank(diffs: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Zweiseitiger Wilcoxon-Test für jede Zeile von diffs (NaN = fehlend, 0 = verworfen).
+
+    p-Wert wie scipy.stats.wilcoxon(method="auto") je Zeile: exakte Verteilung ohne
+    Bindungen und Nullen (n <= 50), bei Bindungen/Nullen und höchstens 13 Paaren alle 2^n
+    Vorzeichenwechsel (als 0/1-Matrix mal Rangvektor), sonst Normalapproximation mit
+    Bindungskorrektur.
+
+    Returns:
+        (W = min(W+, W-), p-Wert, Anzahl verwendeter Paare ohne Nullen) je Zeile
+    """
+    diffs = np.asarray(diffs, dtype=float)
+    n_rows = diffs.shape[0]
+    n_total = (~np.isnan(diffs)).sum(axis=1)
+    n_zero = (diffs == 0).sum(axis=1)
+    row, col = np.nonzero(~np.isnan(diffs) & (diffs != 0))
+    d = diffs[row, col]
+    long = pd.DataFrame({"row": row, "abs": np.abs(d)})
+    ranks = long.groupby("row")["abs"].rank(method="average").to_numpy()
+    n = np.bincount(row, minlength=n_rows)
+    w_plus = np.bincount(row, weights=ranks * (d > 0), minlength=n_rows)
+    total = n * (n + 1) / 2
+    ties = long.groupby(["row", "abs"]).size()
+    tie_term = np.zeros(n_rows)
+    np.add.at(tie_term, ties.index.get_level_values("row"), (ties.to_numpy() ** 3 - ties.to_numpy()).astype(float))
+
+    p = np.full(n_rows, np.nan)
+    has_data = n > 0
+    exact = has_data & (n_total <= EXACT_MAX_N) & (tie_term == 0) & (n_zero == 0)
+    enumerate_signs = has_data & ~exact & (n_total <= 13)
+    approx = has_data & ~exact & ~enumerate_signs
+
+    for size in np.unique(n[exact]):
+        rows = exact & (n == size)
+        cdf = _wilcoxon_null_cdf(int(size))
+        w = np.minimum(w_plus[rows], total[rows] - w_plus[rows]).astype(int)
+        p[rows] = np.minimum(2 * cdf[w], 1.0)
+
+    # Ränge zeilenweise in eine Matrix (Zeilen × n) für die Vorzeichen-Enumeration
+    position = np.arange(len(row)) - np.concatenate([[0], np.cumsum(n)])[row]
+    for size in np.unique(n[enumerate_signs]):
+        rows = np.flatnonzero(enumerate_signs & (n == size))
+        rank_matrix = np.zeros((len(rows), int(size)))
+        member = np.isin(row, rows)
+        rank_matrix[np.searchsorted(rows, row[member]), position[member]] = ranks[member]
+        codes = np.arange(2 ** int(size))[:, None]
+        signs = (codes >> np.arange(int(size))) & 1
+        null = rank_matrix @ signs.T  # W+ unter jeder Vorzeichenkombination
+        observed = w_plus[rows][:, None]
+        tol = 1e-14 * np.maximum(np.abs(observed), 1.0)
+        less = (null <= observed + tol).mean(axis=1)
+        greater = (null >= observed - tol).mean(axis=1)
+        p[rows] = np.minimum(2 * np.minimum(less, greater), 1.0)
+
+    # Normalapproximation ohne Stetigkeitskorrektur
+    var = n * (n + 1) * (2 * n + 1) / 24 - tie_term / 48
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z = (w_plus - total / 2) / np.sqrt(var)
+    p[approx] = np.minimum(2 * norm.sf(np.abs(z[approx])), 1.0)
+
+    w = np.where(has_data, np.minimum(w_plus, total - w_plus), np.nan)
+    return w, p, n
+
+
+def _ncp_interval(t_obs: np.ndarray, df: np.ndarray, confidence: float, n_iter: int = 80) -> Tuple[np.ndarray, np.ndarray]:
+    """KI des Nichtzentralitätsparameters: löst nct.cdf(t_obs, df, ncp) = 1 - α/2 bzw. α/2."""
+    alpha = 1 - confidence
+    bounds = []
+    for target in (1 - alpha / 2, alpha / 2):
+        lo = t_obs - 10 - np.abs(t_obs)
+        hi = t_obs + 10 + np.abs(t_obs)
+        for _ in range(n_iter):
+            mid = (lo + hi) / 2
+            # cdf fällt in ncp: zu großer cdf-Wert -> ncp liegt höher
+            above = nct.cdf(t_obs, df, mid) > target
+            lo = np.where(above, mid, lo)
+            hi = np.where(above, hi, mid)
+        bounds.append((lo + hi) / 2)
+    return bounds[0], bounds[1]
+
+
+def paired_tests(
+    df: pd.DataFrame,
+    by: Sequence[str] = ("transition_id",),
+    a: str = PRE,
+    b: str = POST,
+    confidence: float = 0.95,
+) -> pd.DataFrame:
+    """
+    Gepaarter t-Test, Wilcoxon und dz (a - b) für jede Kombination der by-Spalten.
+
+    Spalten: by…, comparison, n_subjects, mean_a_s, mean_b_s, mean_diff_s, sd_diff_s,
+    ci_lower_s, ci_upper_s, t, df, p_t, wilcoxon_w, p_wilcoxon, dz, dz_ci_lower, dz_ci_upper.
+    Gruppen mit weniger als 2 vollständigen Paaren erhalten NaN.
+    """
+    by = list(by)
+    if not df["block"].astype(str).isin([a, b]).any():
+        return pd.DataFrame()
+    groups, mean_a, mean_b, diffs = paired_differences(df, by, a, b)
+    complete = ~np.isnan(diffs)
+    n = complete.sum(axis=1)
+    # Mittelwerte a/b nur über vollständige Paare, damit mean_a - mean_b = mean_diff
+    with np.errstate(divide="ignore", invalid="ignore"):
+        a_paired = np.where(complete, mean_a, 0.0).sum(axis=1) / n
+        b_paired = np.where(complete, mean_b, 0.0).sum(axis=1) / n
+        mean_diff = np.where(complete, diffs, 0.0).sum(axis=1) / n
+        sq = np.where(complete, (diffs - mean_diff[:, None]) ** 2, 0.0).sum(axis=1)
+        sd = np.sqrt(sq / (n - 1))
+        se = sd / np.sqrt(n)
+        t_stat = mean_diff / se
+        dz = mean_diff / sd
+    valid = n >= 2
+    dof = np.where(valid, n - 1, np.nan)
+    t_crit = t_dist.ppf(1 - (1 - confidence) / 2, dof)
+    p_t = np.where(valid, 2 * t_dist.sf(np.abs(t_stat), dof), np.nan)
+
+    dz_lo = np.full(len(n), np.nan)
+    dz_hi = np.full(len(n), np.nan)
+    finite = valid & np.isfinite(t_stat)
+    if finite.any():
+        lo, hi = _ncp_interval(t_stat[finite], dof[finite], confidence)
+        dz_lo[finite] = lo / np.sqrt(n[finite])
+        dz_hi[finite] = hi / np.sqrt(n[finite])
+
+    w, p_w, _ = wilcoxon_signed_rank(diffs)
+    result = groups.copy()
+    result["comparison"] = f"{a} vs {b}"
+    result["n_subjects"] = n
+    result["mean_a_s"] = a_paired
+    result["mean_b_s"] = b_paired
+    result["mean_diff_s"] = mean_diff
+    result["sd_diff_s"] = np.where(valid, sd, np.nan)
+    result["ci_lower_s"] = mean_diff - t_crit * se
+    result["ci_upper_s"] = mean_diff + t_crit * se
+    result["t"] = np.where(valid, t_stat, np.nan)
+    result["df"] = dof
+    result["p_t"] = p_t
+    result["wilcoxon_w"] = w
+    result["p_wilcoxon"] = p_w
+    result["dz"] = np.where(valid, dz, np.nan)
+    result["dz_ci_lower"] = dz_lo
+    result["dz_ci_upper"] = dz_hi
+    return result
+
+
+def run_paired_comparisons(df: pd.DataFrame, a: str = PRE, b: str = POST) -> pd.DataFrame:
+    """Standardvergleich a vs b je transition_id und je Frequenz (h/s) in einer Tabelle."""
+    tables = [paired_tests(df, [col], a, b).rename(columns={col: "group"}).assign(grouping=col)
+              for col in ("transition_id", "state_from_freq")]
+    tables = [t for t in tables if not t.empty]
+    if not tables:
+        return pd.DataFrame()
+    result = pd.concat(tables, ignore_index=True)
+    front = ["grouping", "group"]
+    return result[front + [c for c in result.columns if c not in front]]
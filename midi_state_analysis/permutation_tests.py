@@ -0,0 +1,150 @@
+"""
+Vektorisierte Permutationstests für Übergangszeiten (h vs s, Test vs Training, je Block).
+
+Austauschbarkeitseinheit ist das Subject: jede Versuchsperson liefert einen Mittelwert
+pro Bedingung, unter H0 sind die beiden Bedingungslabels innerhalb einer Person
+vertauschbar. Eine Permutation entspricht damit einem Vorzeichenwechsel der
+Subject-Differenz. Permutationen werden blockweise als ±1-Matrix (B × Subjects)
+gezogen, die Gruppensummen entstehen per Matrixprodukt. Bei 2^S <= n_perm wird exakt
+über alle Vorzeichenkombinationen gerechnet. Batches laufen parallel in Threads
+(NumPy gibt bei RNG und Matrixprodukt den GIL frei), jeder mit eigenem SeedSequence-Kind.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Sequence
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_N_PERM = 100_000
+BATCH_SIZE = 10_000
+
+
+def subject_condition_means(
+    df: pd.DataFrame,
+    factor: str,
+    levels: Sequence[str],
+    by: Sequence[str] = (),
+) -> pd.DataFrame:
+    """Pivot Subject (× by) × Bedingung mit mittlerer transition_time_s; nur vollständige Paare."""
+    subset = df[df[factor].isin(levels)]
+    keys = ["subject", *by, factor]
+    means = subset.groupby(keys, observed=True)["transition_time_s"].mean().unstack(factor)
+    means = means.reindex(columns=list(levels))
+    return means.dropna()
+
+
+def _count_extreme(diffs: np.ndarray, observed: float, n_perm: int, seed: np.random.SeedSequence) -> int:
+    rng = np.random.default_rng(seed)
+    n_subjects = diffs.size
+    extreme = 0
+    done = 0
+    threshold = abs(observed) - 1e-12
+    while done < n_perm:
+        size = min(BATCH_SIZE, n_perm - done)
+        signs = rng.integers(0, 2, size=(size, n_subjects), dtype=np.int8) * 2 - 1
+        null = signs @ diffs / n_subjects
+        extreme += int(np.count_nonzero(np.abs(null) >= threshold))
+        done += size
+    return extreme
+
+
+def paired_permutation_test(
+    diffs: np.ndarray,
+    n_perm: int = DEFAULT_N_PERM,
+    seed: int | None = 0,
+    n_jobs: int | None = None,
+) -> dict:
+    """
+    Zweiseitiger Permutationstest auf den Mittelwert der Subject-Differenzen.
+
+    Args:
+        diffs: Differenz Bedingung A - B je Subject
+        n_perm: Anzahl zufälliger Permutationen (bei 2^S <= n_perm wird exakt gerechnet)
+        seed: Seed für reproduzierbare Ergebnisse
+        n_jobs: Anzahl Threads (Default: alle Kerne)
+
+    Returns:
+        Dict mit mean_diff, p_value, n_perm und exact
+    """
+    diffs = np.asarray(diffs, dtype=float)
+    n_subjects = diffs.size
+    if n_subjects == 0:
+        return {"mean_diff": np.nan, "p_value": np.nan, "n_perm": 0, "exact": False}
+    observed = diffs.mean()
+    threshold = abs(observed) - 1e-12
+
+    if n_subjects <= 16 and 2 ** n_subjects <= n_perm:
+        # Exakt: alle 2^S Vorzeichenkombinationen als Bitmuster
+        codes = np.arange(2 ** n_subjects, dtype=np.int64)[:, None]
+        signs = ((codes >> np.arange(n_subjects)) & 1) * 2 - 1
+        null = signs @ diffs / n_subjects
+        p_value = np.count_nonzero(np.abs(null) >= threshold) / null.size
+        return {"mean_diff": observed, "p_value": p_value, "n_perm": int(null.size), "exact": True}
+
+    n_jobs = n_jobs or os.cpu_count() or 1
+    n_chunks = max(1, min(n_jobs, -(-n_perm // BATCH_SIZE)))
+    sizes = [n_perm // n_chunks + (i < n_perm % n_chunks) for i in range(n_chunks)]
+    seeds = np.random.SeedSequence(seed).spawn(n_chunks)
+    if n_chunks == 1:
+        extreme = _count_extreme(diffs, observed, sizes[0], seeds[0])
+    else:
+        with ThreadPoolExecutor(max_workers=n_chunks) as pool:
+            extreme = sum(pool.map(_count_extreme, [diffs] * n_chunks, [observed] * n_chunks, sizes, seeds))
+    # +1: die beobachtete Zuordnung zählt als eine der Permutationen
+    p_value = (extreme + 1) / (n_perm + 1)
+    return {"mean_diff": observed, "p_value": p_value, "n_perm": n_perm, "exact": False}
+
+
+def permutation_test_by(
+    df: pd.DataFrame,
+    factor: str,
+    levels: Sequence[str],
+    by: Sequence[str] = (),
+    n_perm: int = DEFAULT_N_PERM,
+    seed: int | None = 0,
+    n_jobs: int | None = None,
+) -> pd.DataFrame:
+    """Permutationstest levels[0] (a) vs levels[1] (b) für jede Kombination der by-Spalten."""
+    means = subject_condition_means(df, factor, levels, by)
+    rows = []
+    groups = means.groupby(level=list(by), observed=True) if by else [((), means)]
+    for keys, group in groups:
+        keys_tuple = keys if isinstance(keys, tuple) else (keys,)
+        a = group[levels[0]].to_numpy()
+        b = group[levels[1]].to_numpy()
+        result = paired_permutation_test(a - b, n_perm=n_perm, seed=seed, n_jobs=n_jobs)
+        row = {"comparison": f"{levels[0]} vs {levels[1]}"}
+        row.update(dict(zip(by, keys_tuple)))
+        row.update({
+            "n_subjects": len(group),
+            "mean_a_s": a.mean() if len(a) else np.nan,
+            "mean_b_s": b.mean() if len(b) else np.nan,
+        })
+        row.update(result)
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def run_permutation_tests(
+    df: pd.DataFrame,
+    n_perm: int = DEFAULT_N_PERM,
+    seed: int | None = 0,
+    n_jobs: int | None = None,
+) -> pd.DataFrame:
+    """Standardvergleiche: h vs s gesamt, Test vs Training, h vs s je Block."""
+    tables = [
+        permutation_test_by(df, "state_from_freq", ["h", "s"], n_perm=n_perm, seed=seed, n_jobs=n_jobs),
+        permutation_test_by(df, "block_type", ["Test", "Training"], n_perm=n_perm, seed=seed, n_jobs=n_jobs),
+        permutation_test_by(df, "state_from_freq", ["h", "s"], by=["block"], n_perm=n_perm, seed=seed, n_jobs=n_jobs),
+    ]
+    tables = [t for t in tables if not t.empty]
+    if not tables:
+        return pd.DataFrame()
+    result = pd.concat(tables, ignore_index=True)
+    if "block" in result.columns:
+        result["block"] = result["block"].astype(object).fillna("alle")
+        front = ["comparison", "block"]
+        result = result[front + [c for c in result.columns if c not in front]]
+    return result
@@ -0,0 +1,110 @@
+"""
+Gesamte Auswertung in einem Prozess: Erkennung -> Transitionen -> Kennzahlen -> ANOVA -> Plots.
+
+Die Transitionstabelle wird genau einmal erzeugt (bzw. mit --input einmal geladen), einmal
+geschrieben (CSV oder SQLite plus Sketches) und danach als DataFrame an die Stufen
+weitergereicht. Schema/block_type (prepare_dataframe) und die optionale Ausreißer-Bereinigung
+laufen ebenfalls nur einmal; die Quantil-Sketches kommen direkt aus dem Erkennungslauf.
+
+Beispiel:
+    midi-analysis pipeline . -o out.csv                 # alle Stufen
+    midi-analysis pipeline --input out.csv --anova      # nur ANOVA auf vorhandener CSV
+"""
+
+from typing import Optional, Sequence
+
+import pandas as pd
+
+from .analyzer import _run_info, _write_output, collect_transitions, midi_paths
+from .progress import ProgressReporter
+from .sampling import report_estimates, sample_table
+from .transition_data import load_transitions, prepare_dataframe
+
+PIPELINE_STAGES = ("stats", "anova", "plots")
+PLOTS_DIR = "plots"  # = graph_learningcurve.OUT_DIR
+
+
+def run_pipeline(
+    midi_root: Optional[str] = None,
+    output: Optional[str] = None,
+    input_path: Optional[str] = None,
+    stages: Sequence[str] = PIPELINE_STAGES,
+    outliers: Optional[str] = None,
+    plots_dir: str = PLOTS_DIR,
+    state_defs: Optional[dict] = None,
+    features: bool = False,
+    progress: Optional[ProgressReporter] = None,
+    tolerance: int = 0,
+    sample: Optional[float] = None,
+    sample_seed: int = 0,
+) -> Optional[pd.DataFrame]:
+    """
+    Führt die gewählten Stufen auf einer gemeinsamen In-Memory-Tabelle aus.
+
+    Args:
+        midi_root: Datenordner/Archiv für die Erkennung (ignoriert, wenn input_path gesetzt ist)
+        output: Ziel der Transitionstabelle (.csv oder .sqlite/.sqlite3/.db)
+        input_path: vorhandene CSV/Datenbank statt neuer Erkennung
+        stages: Teilmenge von PIPELINE_STAGES
+        outliers: "grubbs", "iqr" oder "mad" (einmal für alle Stufen)
+        plots_dir: Zielordner der Plots
+        progress: Fortschritt/Metriken der Erkennung (siehe progress)
+        tolerance: Hamming-Toleranz der State-Erkennung (0 = exakt)
+        sample: Anteil je Block für eine geschichtete Stichprobe der Dateien bzw. der
+            Subject × Block-Zellen von input_path (None = alles), siehe sampling
+        sample_seed: Seed der Stichprobe
+
+    Returns:
+        die (bereinigte) Tabelle, die an die Stufen ging; None ohne Daten
+    """
+    unknown = [stage for stage in stages if stage not in PIPELINE_STAGES]
+    if unknown:
+        raise ValueError(f"Unbekannte Stufe(n): {', '.join(unknown)}")
+    # Stufen erst hier laden: scipy/statsmodels/matplotlib sollen den Import des Pakets nicht bremsen
+    from . import anova_Transition, graph_learningcurve, statistical_analysis
+    from .outliers import outlier_summary, remove_outliers
+
+    plan = None
+    if input_path:
+        print(f"✓ Lade Transitionen aus: {input_path}")
+        df = load_transitions(input_path)
+        # Sketches beschreiben die ganze Tabelle, nicht die Stichprobe
+        sketches = statistical_analysis.load_sketches(input_path) if sample is None else None
+        if sample is not None and not df.empty:
+            plan, df = sample_table(df, sample, sample_seed)
+            print(f"✓ {plan.describe()}")
+    else:
+        sample_info = {} if sample is None else {"sample": sample, "sample_seed": sample_seed}
+        run_info = _run_info(midi_root, state_defs=state_defs, features=features, tolerance=tolerance,
+                             pipeline=list(stages), **sample_info)
+        paths, plan = midi_paths(midi_root, sample=sample, sample_seed=sample_seed)
+        all_dfs, sketches = collect_transitions(midi_root, state_defs, features=features, progress=progress,
+                                                tolerance=tolerance, paths=paths)
+        raw = _write_output(all_dfs, output, sketches, run_info)
+        if raw is None:
+            return None
+        print("✓ Analyse abgeschlossen:", output)
+        df = prepare_dataframe(raw)
+    if df.empty:
+        print("CSV ist leer.")
+        return None
+    if plan is not None:
+        report_estimates(df, plan)
+
+    if outliers:
+        # Ausreißer je Subject × Block × Transition entfernen ("grubbs", "iqr" oder "mad")
+        clean, audit = remove_outliers(df, method=outliers)
+        statistical_analysis.print_section(
+            f"Entfernte Ausreißer ({outliers}, je Subject × Block × Transition)", outlier_summary(audit, df)
+        )
+        df = clean
+        # Die Sketches wurden beim Einlesen gebaut und enthalten die Ausreißer noch
+        sketches = None
+
+    if "stats" in stages:
+        statistical_analysis.run(df, sketches=sketches)
+    if "anova" in stages:
+        anova_Transition.run(df)
+    if "plots" in stages:
+        graph_learningcurve.run(df, plots_dir)
+    return df
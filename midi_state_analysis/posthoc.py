@@ -0,0 +1,195 @@
+"""
+Post-hoc-Paarvergleiche zwischen transition_ids, vektorisiert über alle Blöcke.
+
+Aus suffizienten Statistiken je (Block, transition_id) – n, Mittelwert, Varianz – werden
+alle Paare eines Blocks per Self-Merge gebildet und in einem Durchgang getestet:
+    - Tukey HSD (gepoolte Fehlervarianz des Blocks, Studentized Range)
+    - Games-Howell (ungleiche Varianzen, Welch-Freiheitsgrade, Studentized Range)
+    - Welch-t-Tests mit Holm-Korrektur innerhalb des Blocks
+Ergebnis ist eine einzige, lange Tabelle (eine Zeile pro Paar und Block).
+
+Die Verteilung der Studentized Range wird vektorisiert berechnet (statt scipy.stats.
+studentized_range mit ~10 ms pro Wert): die Range-Verteilung für df=∞ wird einmal pro k
+auf einem Gitter tabelliert, das Integral über den chi-Faktor per Gauß-Legendre-Quadratur
+für alle Paare gleichzeitig ausgewertet (Abweichung zu scipy < 1e-5).
+"""
+
+from typing import Sequence
+
+import numpy as np
+import pandas as pd
+from scipy.special import ndtr
+from scipy.stats import chi, norm, t as t_dist
+
+VALUE_COL = "transition_time_s"
+
+_X_GRID = np.linspace(0.0, 16.0, 1601)
+_Z_GRID = np.linspace(-9.0, 9.0, 1201)
+_LEG_NODES, _LEG_WEIGHTS = np.polynomial.legendre.leggauss(96)
+_RANGE_CDF_CACHE: dict = {}
+
+
+def _range_cdf_inf(x: np.ndarray, k: int) -> np.ndarray:
+    """CDF der Spannweite von k Standardnormalvariablen (df=∞), interpoliert aus einer Tabelle."""
+    k = int(k)
+    table = _RANGE_CDF_CACHE.get(k)
+    if table is None:
+        cdf_z = ndtr(_Z_GRID)
+        spread = np.clip(ndtr(_Z_GRID[None, :] + _X_GRID[:, None]) - cdf_z[None, :], 0.0, None)
+        integrand = k * norm.pdf(_Z_GRID)[None, :] * spread ** (k - 1)
+        table = _RANGE_CDF_CACHE[k] = np.clip(np.trapezoid(integrand, _Z_GRID, axis=1), 0.0, 1.0)
+    return np.interp(x, _X_GRID, table, right=1.0)
+
+
+def studentized_range_sf(q, k, df) -> np.ndarray:
+    """Survival-Funktion der Studentized Range, vektorisiert über q, k und df."""
+    q, k, df = np.broadcast_arrays(np.asarray(q, float), np.asarray(k, float), np.asarray(df, float))
+    q, k, df = q.ravel(), k.ravel(), df.ravel()
+    # Quadratur über s = chi_df / sqrt(df) auf dem Bereich mit nennenswerter Dichte
+    sqrt_df = np.sqrt(df)
+    lo = chi.ppf(1e-12, df) / sqrt_df
+    hi = chi.ppf(1 - 1e-12, df) / sqrt_df
+    half = (hi - lo) / 2
+    s = ((hi + lo) / 2)[:, None] + half[:, None] * _LEG_NODES
+    log_density = chi.logpdf(s * sqrt_df[:, None], df[:, None]) + np.log(sqrt_df)[:, None]
+    weights = half[:, None] * _LEG_WEIGHTS * np.exp(log_density)
+    out = np.empty(q.shape)
+    for kk in np.unique(k):
+        rows = k == kk
+        out[rows] = 1.0 - (weights[rows] * _range_cdf_inf(q[rows, None] * s[rows], kk)).sum(axis=1)
+    return np.clip(out, 0.0, 1.0)
+
+
+def studentized_range_isf(p, k, df, n_iter: int = 50) -> np.ndarray:
+    """Inverse von studentized_range_sf per vektorisierter Bisektion."""
+    p, k, df = np.broadcast_arrays(np.asarray(p, float), np.asarray(k, float), np.asarray(df, float))
+    lo = np.zeros(p.shape)
+    hi = np.full(p.shape, _X_GRID[-1] * 4)
+    for _ in range(n_iter):
+        mid = (lo + hi) / 2
+        above = studentized_range_sf(mid, k, df).reshape(p.shape) > p
+        lo = np.where(above, mid, lo)
+        hi = np.where(above, hi, mid)
+    return (lo + hi) / 2
+
+
+def group_stats(
+    df: pd.DataFrame, by: Sequence[str], group_col: str = "transition_id", min_n: int = 2
+) -> pd.DataFrame:
+    """n, mean und var (ddof=1) je by × group_col, nur Gruppen mit mindestens min_n Werten."""
+    stats = (
+        df.groupby([*by, group_col], observed=True)[VALUE_COL]
+          .agg(n="count", mean="mean", var="var")
+          .reset_index()
+    )
+    return stats[stats["n"] >= min_n]
+
+
+def _holm(p_values: pd.Series, groups: pd.Series) -> pd.Series:
+    """Holm-Korrektur innerhalb jeder Gruppe (schrittweise, monoton); NaN zählt nicht als Test."""
+    frame = pd.DataFrame({"p": p_values.to_numpy(), "g": groups.to_numpy()}, index=p_values.index)
+    frame = frame.sort_values(["g", "p"], kind="stable")  # NaN je Gruppe ans Ende
+    rank = frame.groupby("g", sort=False).cumcount()
+    m = frame.groupby("g", sort=False)["p"].transform("count")
+    scaled = ((m - rank) * frame["p"]).clip(upper=1.0)
+    adjusted = scaled.groupby(frame["g"], sort=False).cummax()
+    return adjusted.reindex(p_values.index)
+
+
+def pairwise_posthoc(
+    df: pd.DataFrame,
+    by: Sequence[str] = ("block",),
+    group_col: str = "transition_id",
+    alpha: float = 0.05,
+) -> pd.DataFrame:
+    """
+    Alle Paarvergleiche von group_col innerhalb jeder by-Gruppe.
+
+    Args:
+        df: Transitionstabelle (z.B. aus load_transitions)
+        by: Gruppierung, innerhalb derer verglichen wird (z.B. ["block"] oder ["block_type"])
+        group_col: Verglichene Faktorstufen
+        alpha: Signifikanzniveau für die reject-Spalten und Tukey-Konfidenzintervalle
+
+    Returns:
+        Tidy-Tabelle mit einer Zeile pro (by, group_a, group_b); diff = mean_b - mean_a
+
+    Gruppen mit nur einem Wert bekommen keine Paare (Games-Howell und Welch brauchen eine
+    Varianz), zählen aber wie bei statsmodels pairwise_tukeyhsd für k, df_error und die
+    gepoolte Fehlervarianz von Tukey mit; Games-Howell nutzt als k nur die Gruppen mit
+    n >= 2. Ist die Fehlervarianz bzw. der Standardfehler eines Paares
+    0, sind Statistik, p-Wert und Konfidenzintervall NaN.
+    """
+    by = list(by)
+    stats = group_stats(df, by, group_col, min_n=1)
+    if stats.empty:
+        return pd.DataFrame()
+    keys = by
+    if not by:
+        stats["_all"] = 0
+        keys = ["_all"]
+
+    # Fehlervarianz (MSE) und Freiheitsgrade je Gruppe für Tukey HSD, inklusive n=1-Gruppen
+    stats["_ss"] = ((stats["n"] - 1) * stats["var"]).fillna(0.0)
+    stats["_has_var"] = stats["n"] >= 2
+    block = stats.groupby(keys, observed=True).agg(
+        k=("n", "size"), k_gh=("_has_var", "sum"), n_total=("n", "sum"), ss=("_ss", "sum")
+    )
+    block["df_error"] = block["n_total"] - block["k"]
+    block["mse"] = block["ss"] / block["df_error"].where(block["df_error"] > 0)
+    block_cols = ["k", "k_gh", "df_error", "mse"]
+    stats = stats[stats["_has_var"]].drop(columns=["_ss", "_has_var"]).merge(block[block_cols].reset_index(), on=keys)
+
+    pairs = stats.merge(stats, on=[*keys, *block_cols], suffixes=("_a", "_b"))
+    pairs = pairs[pairs[f"{group_col}_a"] < pairs[f"{group_col}_b"]].reset_index(drop=True)
+    pairs = pairs[pairs["k"] >= 2]
+    if pairs.empty:
+        return pd.DataFrame()
+
+    n_a, n_b = pairs["n_a"].to_numpy(float), pairs["n_b"].to_numpy(float)
+    v_a, v_b = pairs["var_a"].to_numpy(), pairs["var_b"].to_numpy()
+    diff = pairs["mean_b"].to_numpy() - pairs["mean_a"].to_numpy()
+    k = pairs["k"].to_numpy(float)
+    df_error = pairs["df_error"].to_numpy(float)
+
+    # Tukey HSD (mse = 0: keine Streuung, Test nicht definiert)
+    se_tukey = np.sqrt(pairs["mse"].to_numpy() / 2 * (1 / n_a + 1 / n_b))
+    se_tukey = np.where(se_tukey > 0, se_tukey, np.nan)
+    q_tukey = np.abs(diff) / se_tukey
+    p_tukey = studentized_range_sf(q_tukey, k, df_error)
+    # kritischer q-Wert hängt nur von (k, df_error) ab: einmal je Gruppe berechnen
+    crit_keys, crit_inverse = np.unique(np.column_stack([k, df_error]), axis=0, return_inverse=True)
+    q_crit = studentized_range_isf(alpha, crit_keys[:, 0], crit_keys[:, 1])[crit_inverse.ravel()]
+    half_width = q_crit * se_tukey
+
+    # Games-Howell und Welch
+    se2 = v_a / n_a + v_b / n_b
+    se2 = np.where(se2 > 0, se2, np.nan)
+    df_welch = se2 ** 2 / ((v_a / n_a) ** 2 / (n_a - 1) + (v_b / n_b) ** 2 / (n_b - 1))
+    q_gh = np.abs(diff) / np.sqrt(se2 / 2)
+    p_gh = studentized_range_sf(q_gh, pairs["k_gh"].to_numpy(float), df_welch)
+    t_welch = diff / np.sqrt(se2)
+    p_welch = 2 * t_dist.sf(np.abs(t_welch), df_welch)
+
+    result = pairs[[*keys]].copy() if by else pd.DataFrame(index=pairs.index)
+    result["group_a"] = pairs[f"{group_col}_a"]
+    result["group_b"] = pairs[f"{group_col}_b"]
+    result["n_a"] = pairs["n_a"]
+    result["n_b"] = pairs["n_b"]
+    result["mean_a_s"] = pairs["mean_a"]
+    result["mean_b_s"] = pairs["mean_b"]
+    result["diff_s"] = diff
+    result["tukey_p"] = p_tukey
+    result["tukey_ci_low"] = diff - half_width
+    result["tukey_ci_high"] = diff + half_width
+    result["tukey_reject"] = p_tukey < alpha
+    result["gh_p"] = p_gh
+    result["gh_reject"] = p_gh < alpha
+    result["welch_t"] = t_welch
+    result["welch_df"] = df_welch
+    result["welch_p"] = p_welch
+    group_ids = pairs.groupby(keys, observed=True, sort=False).ngroup()
+    result["welch_p_holm"] = _holm(pd.Series(p_welch, index=pairs.index), group_ids)
+    result["welch_reject_holm"] = result["welch_p_holm"] < alpha
+    result = result.rename(columns={"group_a": f"{group_col}_a", "group_b": f"{group_col}_b"})
+    return result.sort_values([*by, f"{group_col}_a", f"{group_col}_b"]).reset_index(drop=True)
@@ -0,0 +1,198 @@
+"""
+Fortschritt und Metriken langer Analyse-Läufe.
+
+`ProgressReporter` zählt verarbeitete Dateien, MIDI-Events, Transitionen und Fehler und
+leitet daraus Raten (pro Sekunde), ETA und Worker-Auslastung (Anteil der Wandzeit, in der
+die Worker tatsächlich Dateien verarbeitet haben) ab. Ausgaben:
+    - Terminal: eine laufend überschriebene Zeile auf stderr, nur wenn stderr ein TTY ist
+    - JSON-Lines: alle `interval_s` Sekunden ein Snapshot pro Zeile (angehängt)
+    - Prometheus-Textfile: alle `interval_s` Sekunden atomar ersetzt (node_exporter
+      textfile collector)
+Ohne TTY und ohne Dateipfade bleibt der Lauf still.
+
+Beispiel:
+    >>> progress = ProgressReporter(jsonl_path="run.progress.jsonl")
+    >>> analyze_root_folder("Daten (MIDI)", "out.csv", progress=progress)
+"""
+
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from typing import Callable, Optional, TextIO
+
+METRIC_PREFIX = "midi_analysis"
+# (Snapshot-Feld, Prometheus-Typ, Hilfetext)
+METRICS = (
+    ("files_done", "counter", "Verarbeitete MIDI-Dateien"),
+    ("files_total", "gauge", "MIDI-Dateien in diesem Lauf"),
+    ("events", "counter", "Gelesene MIDI-Events"),
+    ("transitions", "counter", "Erzeugte Transitionen"),
+    ("errors", "counter", "Dateien mit Fehlern"),
+    ("files_per_s", "gauge", "Dateien pro Sekunde"),
+    ("events_per_s", "gauge", "MIDI-Events pro Sekunde"),
+    ("transitions_per_s", "gauge", "Transitionen pro Sekunde"),
+    ("eta_s", "gauge", "Geschätzte Restlaufzeit in Sekunden"),
+    ("worker_utilization", "gauge", "Anteil der Wandzeit, in der die Worker beschäftigt waren"),
+    ("elapsed_s", "gauge", "Laufzeit in Sekunden"),
+    ("finished", "gauge", "1 nach Abschluss des Laufs"),
+)
+
+
+class ProgressReporter:
+    """
+    Sammelt Zähler eines Laufs und schreibt sie periodisch auf Terminal/Datei.
+
+    Args:
+        jsonl_path: Datei für JSON-Lines-Snapshots (None: aus)
+        textfile_path: Prometheus-Textfile, z.B. ".../textfile_collector/midi.prom" (None: aus)
+        interval_s: Abstand der Datei-Snapshots in Sekunden
+        workers: Anzahl paralleler Worker (Nenner der Auslastung)
+        stream: Terminal-Ausgabe (Default: sys.stderr); nur aktiv, wenn isatty()
+        clock: Zeitquelle (monoton)
+    """
+
+    def __init__(
+        self,
+        jsonl_path: Optional[str] = None,
+        textfile_path: Optional[str] = None,
+        interval_s: float = 5.0,
+        workers: int = 1,
+        stream: Optional[TextIO] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.jsonl_path = jsonl_path
+        self.textfile_path = textfile_path
+        self.interval_s = interval_s
+        self.workers = max(1, workers)
+        self.stream = stream if stream is not None else sys.stderr
+        self.tty = bool(getattr(self.stream, "isatty", lambda: False)())
+        self.clock = clock
+        self.files_total = 0
+        self.files_done = 0
+        self.events = 0
+        self.transitions = 0
+        self.errors = 0
+        self.busy_s = 0.0
+        self.finished = False
+        self._started = clock()
+        self._last_file_write = float("-inf")
+        self._last_line_write = float("-inf")
+        self._line_width = 0
+
+    def start(self, files_total: int) -> None:
+        """Beginnt die Zeitmessung für einen Lauf über files_total Dateien."""
+        self.files_total = files_total
+        self._started = self.clock()
+        self._emit(force=True)
+
+    def file_done(self, events: int = 0, transitions: int = 0, busy_s: float = 0.0, error: bool = False) -> None:
+        """Meldet eine fertige Datei (busy_s: Verarbeitungszeit im Worker)."""
+        self.files_done += 1
+        self.events += events
+        self.transitions += transitions
+        self.busy_s += busy_s
+        self.errors += bool(error)
+        self._emit()
+
+    def log(self, message: str) -> None:
+        """Gibt eine Meldung aus, ohne die Fortschrittszeile zu zerstückeln."""
+        self._clear_line()
+        print(message)
+        self._last_line_write = float("-inf")
+
+    def close(self) -> None:
+        """Schreibt den Endstand (finished=1) und beendet die Terminalzeile."""
+        if self.finished:
+            return
+        self.finished = True
+        self._emit(force=True)
+        if self.tty and self._line_width:
+            self.stream.write("\n")
+            self.stream.flush()
+
+    def __enter__(self) -> "ProgressReporter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def snapshot(self) -> dict:
+        """Aktueller Stand als Dict (Felder wie in METRICS plus timestamp)."""
+        elapsed = max(self.clock() - self._started, 1e-9)
+        files_per_s = self.files_done / elapsed
+        remaining = max(self.files_total - self.files_done, 0)
+        return {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "elapsed_s": round(elapsed, 3),
+            "files_done": self.files_done,
+            "files_total": self.files_total,
+            "events": self.events,
+            "transitions": self.transitions,
+            "errors": self.errors,
+            "files_per_s": round(files_per_s, 3),
+            "events_per_s": round(self.events / elapsed, 1),
+            "transitions_per_s": round(self.transitions / elapsed, 1),
+            "eta_s": round(remaining / files_per_s, 1) if files_per_s > 0 else None,
+            "worker_utilization": round(min(self.busy_s / (elapsed * self.workers), 1.0), 3),
+            "finished": int(self.finished),
+        }
+
+    def _emit(self, force: bool = False) -> None:
+        now = self.clock()
+        files_due = self.jsonl_path or self.textfile_path
+        files_due = files_due and (force or now - self._last_file_write >= self.interval_s)
+        line_due = self.tty and (force or now - self._last_line_write >= 0.2)
+        if not (files_due or line_due):
+            return
+        snap = self.snapshot()
+        if files_due:
+            self._last_file_write = now
+            if self.jsonl_path:
+                with open(self.jsonl_path, "a", encoding="utf-8") as fh:
+                    fh.write(json.dumps(snap) + "\n")
+            if self.textfile_path:
+                write_prometheus_textfile(snap, self.textfile_path)
+        if line_due:
+            self._last_line_write = now
+            self._write_line(snap)
+
+    def _write_line(self, snap: dict) -> None:
+        eta = "–" if snap["eta_s"] is None else _format_seconds(snap["eta_s"])
+        line = (
+            f"{snap['files_done']}/{snap['files_total']} Dateien | "
+            f"{snap['files_per_s']:.1f} Dateien/s | {snap['events_per_s']:.0f} Events/s | "
+            f"{snap['transitions_per_s']:.0f} Transitionen/s | ETA {eta} | "
+            f"Fehler {snap['errors']} | Auslastung {snap['worker_utilization']:.0%}"
+        )
+        self.stream.write("\r" + line.ljust(self._line_width))
+        self.stream.flush()
+        self._line_width = len(line)
+
+    def _clear_line(self) -> None:
+        if self.tty and self._line_width:
+            self.stream.write("\r" + " " * self._line_width + "\r")
+            self.stream.flush()
+            self._line_width = 0
+
+
+def _format_seconds(seconds: float) -> str:
+    minutes, secs = divmod(int(round(seconds)), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{secs:02d}" if hours else f"{minutes}:{secs:02d}"
+
+
+def write_prometheus_textfile(snap: dict, path: str) -> None:
+    """Schreibt einen Snapshot im Prometheus-Textformat (tmp-Datei + os.replace, atomar)."""
+    lines = []
+    for field, kind, help_text in METRICS:
+        value = snap.get(field)
+        if value is None:
+            continue
+        name = f"{METRIC_PREFIX}_{field}" + ("_total" if kind == "counter" else "")
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}", f"{name} {value}"]
+    tmp = f"{path}.tmp.{os.getpid()}"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        fh.write("\n".join(lines) + "\n")
+    os.replace(tmp, path)
@@ -0,0 +1,252 @@
+"""
+Mergeable Quantil-Sketches (t-digest) für Übergangszeiten.
+
+Pro Gruppe (transition_id, block, state_from_freq) wird ein t-digest geführt, der während
+der Analyse Datei für Datei aktualisiert wird. Sketches aus parallelen Workern oder Shards
+lassen sich verlustarm zusammenführen; Perzentile (z.B. Median, p90, p99) und
+Boxplot-Kennzahlen entstehen dann ohne die vollständige Transitionstabelle.
+
+Kompression nach der üblichen Merge-Regel mit der k1-Skalenfunktion
+k(q) = δ/(2π)·asin(2q-1): ab q_links = 0 (k = -δ/4) nimmt ein Centroid sortierte Werte auf,
+solange k(q_rechts) - k(q_links) <= 1 bleibt. Die Grenze jedes Centroids wird per
+searchsorted auf den kumulierten Gewichten gefunden (eine Iteration je Centroid, nicht je
+Wert). Quantile werden über das kumulierte Gewicht interpoliert (Rang des Centroid-
+Schwerpunkts), sodass ein verlustfreier Sketch numpy.quantile (linear) exakt wiedergibt.
+"""
+
+import json
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+SKETCH_GROUP_COLS = ["transition_id", "block", "state_from_freq"]
+DEFAULT_QUANTILES = (0.25, 0.5, 0.75, 0.9, 0.99)
+
+
+class TDigest:
+    __slots__ = ("compression", "means", "weights", "count", "total", "total_sq", "min", "max", "_buffer")
+
+    def __init__(self, compression: float = 200.0):
+        self.compression = compression
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+        self.count = 0
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+        self._buffer: List[np.ndarray] = []
+
+    def update(self, values: Iterable[float]) -> None:
+        """Fügt Rohwerte hinzu (NaN wird ignoriert)."""
+        arr = np.asarray(values, dtype=float).ravel()
+        arr = arr[~np.isnan(arr)]
+        if arr.size == 0:
+            return
+        self.count += arr.size
+        self.total += float(arr.sum())
+        self.total_sq += float(np.dot(arr, arr))
+        self.min = min(self.min, float(arr.min()))
+        self.max = max(self.max, float(arr.max()))
+        self._buffer.append(arr)
+        if sum(b.size for b in self._buffer) > 5 * self.compression:
+            self._compress()
+
+    def merge(self, other: "TDigest") -> "TDigest":
+        """Führt einen anderen Sketch in diesen zusammen (in-place, gibt self zurück)."""
+        other._compress()
+        self.count += other.count
+        self.total += other.total
+        self.total_sq += other.total_sq
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress(other.means, other.weights)
+        return self
+
+    def _compress(self, extra_means: np.ndarray | None = None, extra_weights: np.ndarray | None = None) -> None:
+        parts_m, parts_w = [self.means], [self.weights]
+        if self._buffer:
+            buf = np.concatenate(self._buffer)
+            parts_m.append(buf)
+            parts_w.append(np.ones_like(buf))
+            self._buffer = []
+        if extra_means is not None:
+            parts_m.append(extra_means)
+            parts_w.append(extra_weights)
+        means = np.concatenate(parts_m)
+        weights = np.concatenate(parts_w)
+        if means.size == 0:
+            return
+        order = np.argsort(means, kind="stable")
+        means, weights = means[order], weights[order]
+        cum = np.cumsum(weights)
+        q_right = cum / cum[-1]
+        scale = self.compression / (2 * np.pi)
+        starts = []
+        start, q_left = 0, 0.0
+        while start < means.size:
+            starts.append(start)
+            k_limit = scale * np.arcsin(2 * q_left - 1) + 1
+            q_limit = (1 + np.sin(k_limit / scale)) / 2 if k_limit < scale * np.pi / 2 else 1.0
+            # mindestens ein Wert je Centroid, auch wenn er allein die Grenze überschreitet
+            start = max(int(np.searchsorted(q_right, q_limit, side="right")), start + 1)
+            q_left = q_right[start - 1]
+        starts = np.asarray(starts)
+        new_w = np.add.reduceat(weights, starts)
+        self.means = np.add.reduceat(means * weights, starts) / new_w
+        self.weights = new_w
+
+    def quantile(self, q) -> np.ndarray:
+        """Schätzt Quantile (Skalar oder Array in [0, 1]) wie numpy.quantile (linear)."""
+        self._compress()
+        q = np.asarray(q, dtype=float)
+        if self.count == 0:
+            return np.full(q.shape, np.nan)
+        # Rang (0-basiert) des Schwerpunkts jedes Centroids; Gewicht 1 -> Rang des Werts
+        cum = np.cumsum(self.weights)
+        ranks = cum - (self.weights + 1) / 2
+        n = cum[-1]
+        xp = np.concatenate(([0.0], ranks, [n - 1]))
+        fp = np.concatenate(([self.min], self.means, [self.max]))
+        return np.interp(q * (n - 1), xp, fp)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else np.nan
+
+    @property
+    def std(self) -> float:
+        if self.count < 2:
+            return np.nan
+        var = (self.total_sq - self.total ** 2 / self.count) / (self.count - 1)
+        return float(np.sqrt(max(var, 0.0)))
+
+    def to_dict(self) -> dict:
+        self._compress()
+        return {
+            "compression": self.compression,
+            "count": self.count,
+            "sum": self.total,
+            "sum_sq": self.total_sq,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+            "means": self.means.tolist(),
+            "weights": self.weights.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "TDigest":
+        digest = cls(data["compression"])
+        digest.count = data["count"]
+        digest.total = data["sum"]
+        digest.total_sq = data["sum_sq"]
+        digest.min = data["min"] if data["min"] is not None else np.inf
+        digest.max = data["max"] if data["max"] is not None else -np.inf
+        digest.means = np.asarray(data["means"], dtype=float)
+        digest.weights = np.asarray(data["weights"], dtype=float)
+        return digest
+
+
+class TransitionSketches:
+    """
+    Sammlung von t-digests pro (transition_id, block, state_from_freq).
+
+    Beispiel:
+        >>> sketches = TransitionSketches()
+        >>> sketches.update_from_frame(transitions_df)
+        >>> sketches.save("MIDI_ANALYSIS_STATES.sketches.json")
+        >>> TransitionSketches.load("MIDI_ANALYSIS_STATES.sketches.json").summary(["transition_id"])
+    """
+
+    def __init__(self, compression: float = 200.0):
+        self.compression = compression
+        self.digests: Dict[Tuple, TDigest] = {}
+
+    def __len__(self) -> int:
+        return len(self.digests)
+
+    def update_from_frame(self, df: pd.DataFrame, value_col: str = "transition_time_s") -> None:
+        for keys, values in df.groupby(SKETCH_GROUP_COLS, sort=False)[value_col]:
+            key = (int(keys[0]), str(keys[1]), str(keys[2]))
+            digest = self.digests.get(key)
+            if digest is None:
+                digest = self.digests[key] = TDigest(self.compression)
+            digest.update(values.to_numpy())
+
+    def merge(self, other: "TransitionSketches") -> "TransitionSketches":
+        for key, digest in other.digests.items():
+            if key in self.digests:
+                self.digests[key].merge(digest)
+            else:
+                self.digests[key] = TDigest(digest.compression).merge(digest)
+        return self
+
+    def save(self, path: str) -> None:
+        payload = {
+            "group_cols": SKETCH_GROUP_COLS,
+            "compression": self.compression,
+            "groups": [
+                {"key": list(key), "digest": digest.to_dict()}
+                for key, digest in sorted(self.digests.items())
+            ],
+        }
+        with open(path, "w", encoding="utf-8") as fh:
+            json.dump(payload, fh)
+
+    @classmethod
+    def load(cls, path: str) -> "TransitionSketches":
+        with open(path, encoding="utf-8") as fh:
+            payload = json.load(fh)
+        sketches = cls(payload["compression"])
+        for group in payload["groups"]:
+            tid, block, freq = group["key"]
+            sketches.digests[(int(tid), block, freq)] = TDigest.from_dict(group["digest"])
+        return sketches
+
+    def summary(
+        self,
+        group_cols: Sequence[str] = SKETCH_GROUP_COLS,
+        quantiles: Sequence[float] = DEFAULT_QUANTILES,
+    ) -> pd.DataFrame:
+        """
+        Perzentil- und Boxplot-Tabelle, optional auf gröbere Gruppen zusammengeführt.
+
+        Args:
+            group_cols: Teilmenge von SKETCH_GROUP_COLS; übrige Schlüssel werden gemerged
+            quantiles: Zu schätzende Quantile (Spalten p25_s, p50_s, ...)
+
+        Returns:
+            DataFrame mit n, mean_s, std_s, min_s, max_s, Quantilen und den Tukey-Zäunen
+            fence_low_s/fence_high_s (Q1 - 1.5·IQR, Q3 + 1.5·IQR, auf min/max begrenzt). Das
+            sind nicht die Whisker eines Boxplots (extremster Wert innerhalb der Zäune):
+            dafür bräuchte es die Rohwerte.
+        """
+        positions = [SKETCH_GROUP_COLS.index(col) for col in group_cols]
+        merged: Dict[Tuple, TDigest] = {}
+        for key, digest in self.digests.items():
+            sub_key = tuple(key[i] for i in positions)
+            if sub_key not in merged:
+                merged[sub_key] = TDigest(digest.compression)
+            merged[sub_key].merge(digest)
+
+        rows = []
+        for key, digest in merged.items():
+            row = dict(zip(group_cols, key))
+            row.update({"n": digest.count, "mean_s": digest.mean, "std_s": digest.std,
+                        "min_s": digest.min, "max_s": digest.max})
+            for q, value in zip(quantiles, digest.quantile(quantiles)):
+                row[f"p{round(q * 100):02d}_s"] = value
+            q1, q3 = digest.quantile([0.25, 0.75])
+            row["fence_low_s"] = max(digest.min, q1 - 1.5 * (q3 - q1))
+            row["fence_high_s"] = min(digest.max, q3 + 1.5 * (q3 - q1))
+            rows.append(row)
+        if not rows:
+            return pd.DataFrame(columns=list(group_cols))
+        return pd.DataFrame(rows).sort_values(list(group_cols)).reset_index(drop=True)
+
+
+def sketch_path_for(output_csv: str) -> str:
+    """Pfad der Sketch-Datei neben der Ergebnis-CSV (X.csv -> X.sketches.json)."""
+    stem = output_csv[:-4] if output_csv.lower().endswith(".csv") else output_csv
+    return stem + ".sketches.json"
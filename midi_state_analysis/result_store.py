@@ -0,0 +1,212 @@
+"""
+SQLite als optionales Ausgabe-Backend für die Transitionstabelle.
+
+Endet die Output-Datei auf .sqlite/.sqlite3/.db, schreibt die Analyse statt der CSV eine
+lokale SQLite-Datenbank:
+    transitions: eine Zeile pro Transition (Spalten wie in der CSV plus block_type, run_id)
+    runs:        ein Eintrag pro Analyse-Lauf (Zeitpunkt, Datenordner, Optionen, Version)
+Indizes auf (subject, block), transition_id und state_from_freq erlauben den
+Statistik-Skripten, nur die benötigte Teilmenge zu laden (`ResultStore.query`) und einfache
+Kennzahlen direkt in SQL zu berechnen (`ResultStore.aggregate`).
+
+Beispiel:
+    >>> store = ResultStore("MIDI_ANALYSIS_STATES.sqlite")
+    >>> b3 = store.query(["transition_id", "transition_time_s"], block="B3")
+    >>> store.aggregate(["block", "transition_id"])
+"""
+
+import json
+import os
+import sqlite3
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+RESULT_DB_SUFFIXES = (".sqlite", ".sqlite3", ".db")
+TABLE = "transitions"
+VALUE_COL = "transition_time_s"
+INDEXES = {
+    "idx_transitions_subject_block": ("subject", "block"),
+    "idx_transitions_transition_id": ("transition_id",),
+    "idx_transitions_freq": ("state_from_freq",),
+}
+AGGREGATES = ("n", "mean", "std", "median", "min", "max")
+
+
+def is_result_db(path: str) -> bool:
+    return str(path).lower().endswith(RESULT_DB_SUFFIXES)
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _sql_type(dtype) -> str:
+    if pd.api.types.is_bool_dtype(dtype) or pd.api.types.is_integer_dtype(dtype):
+        return "INTEGER"
+    if pd.api.types.is_float_dtype(dtype):
+        return "REAL"
+    return "TEXT"
+
+
+def write_result_db(df: pd.DataFrame, db_path: str, run_info: Optional[dict] = None) -> int:
+    """
+    Ersetzt die Transitionen in db_path durch df und protokolliert den Lauf in `runs`.
+
+    Args:
+        df: Transitionstabelle (wie sie sonst als CSV geschrieben würde, inkl. block_type)
+        db_path: Zieldatei (wird bei Bedarf angelegt)
+        run_info: Provenienz, z.B. {"root_folder": ..., "started_at": ..., "options": {...}}
+
+    Returns:
+        run_id des neuen Laufs
+    """
+    run_info = dict(run_info or {})
+    with sqlite3.connect(db_path) as con:
+        con.execute(
+            "CREATE TABLE IF NOT EXISTS runs ("
+            "run_id INTEGER PRIMARY KEY AUTOINCREMENT, started_at TEXT, finished_at TEXT, "
+            "root_folder TEXT, n_files INTEGER, n_rows INTEGER, options TEXT, version TEXT)"
+        )
+        cursor = con.execute(
+            "INSERT INTO runs (started_at, finished_at, root_folder, n_files, n_rows, options, version) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                run_info.get("started_at"),
+                datetime.now().isoformat(timespec="seconds"),
+                run_info.get("root_folder"),
+                run_info.get("n_files"),
+                len(df),
+                json.dumps(run_info.get("options") or {}, sort_keys=True, default=str),
+                run_info.get("version"),
+            ),
+        )
+        run_id = cursor.lastrowid
+
+        con.execute(f"DROP TABLE IF EXISTS {TABLE}")
+        columns = [*df.columns, "run_id"]
+        types = [_sql_type(df[col].dtype) for col in df.columns] + ["INTEGER"]
+        con.execute(f"CREATE TABLE {TABLE} ({', '.join(f'{_quote(c)} {t}' for c, t in zip(columns, types))})")
+        placeholders = ", ".join("?" * len(columns))
+        # Spaltenweise in Python-Objekte wandeln (NaN -> NULL), dann zeilenweise einfügen
+        data = [
+            [None if pd.isna(v) else v for v in df[col].astype(object).tolist()]
+            for col in df.columns
+        ]
+        data.append([run_id] * len(df))
+        con.executemany(f"INSERT INTO {TABLE} VALUES ({placeholders})", zip(*data))
+        for name, index_cols in INDEXES.items():
+            if all(col in df.columns for col in index_cols):
+                con.execute(f"CREATE INDEX {name} ON {TABLE} ({', '.join(map(_quote, index_cols))})")
+    return run_id
+
+
+class ResultStore:
+    """Lesezugriff auf eine mit `write_result_db` geschriebene Datenbank."""
+
+    def __init__(self, db_path: str):
+        if not os.path.isfile(db_path):
+            raise FileNotFoundError(f"Ergebnis-Datenbank nicht gefunden: {db_path}")
+        self.path = db_path
+        with self._connect() as con:
+            self.columns: List[str] = [row[1] for row in con.execute(f"PRAGMA table_info({TABLE})")]
+        if not self.columns:
+            raise ValueError(f"{db_path} enthält keine Tabelle {TABLE!r}.")
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(f"file:{os.path.abspath(self.path)}?mode=ro", uri=True)
+
+    def _check(self, names: Iterable[str]) -> None:
+        unknown = [name for name in names if name not in self.columns]
+        if unknown:
+            raise KeyError(f"Unbekannte Spalte(n): {', '.join(unknown)}")
+
+    def _where(self, filters: Dict[str, object]) -> tuple:
+        self._check(filters)
+        clauses, params = [], []
+        for col, value in filters.items():
+            if isinstance(value, (list, tuple, set, np.ndarray, pd.Index)):
+                values = list(value)
+                clauses.append(f"{_quote(col)} IN ({', '.join('?' * len(values))})")
+                params.extend(values)
+            else:
+                clauses.append(f"{_quote(col)} = ?")
+                params.append(value)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def query(self, columns: Optional[Sequence[str]] = None, **filters) -> pd.DataFrame:
+        """
+        Lädt ausgewählte Spalten, optional gefiltert (Wert oder Liste je Spalte).
+
+        Beispiel:
+            >>> store.query(["subject", "transition_time_s"], block=["Pretest", "Posttest"])
+        """
+        columns = list(columns) if columns else [c for c in self.columns if c != "run_id"]
+        self._check(columns)
+        where, params = self._where(filters)
+        sql = f"SELECT {', '.join(map(_quote, columns))} FROM {TABLE}{where} ORDER BY rowid"
+        with self._connect() as con:
+            return pd.read_sql_query(sql, con, params=params)
+
+    def distinct(self, column: str, **filters) -> list:
+        """Sortierte, verschiedene Werte einer Spalte."""
+        self._check([column])
+        where, params = self._where(filters)
+        sql = f"SELECT DISTINCT {_quote(column)} FROM {TABLE}{where} ORDER BY 1"
+        with self._connect() as con:
+            return [row[0] for row in con.execute(sql, params)]
+
+    def aggregate(
+        self,
+        group_cols: Sequence[str],
+        value_col: str = VALUE_COL,
+        stats: Sequence[str] = AGGREGATES,
+        **filters,
+    ) -> pd.DataFrame:
+        """
+        Kennzahlen je Gruppe, berechnet in SQLite (Spalten n, mean_s, std_s, median_s, min_s, max_s).
+
+        std aus Summe und Quadratsumme (ddof=1); der Median über Fensterfunktionen.
+        """
+        group_cols = list(group_cols)
+        unknown = [s for s in stats if s not in AGGREGATES]
+        if unknown:
+            raise ValueError(f"Unbekannte Kennzahl(en): {', '.join(unknown)}")
+        self._check([*group_cols, value_col])
+        where, params = self._where(filters)
+        keys = ", ".join(map(_quote, group_cols))
+        value = _quote(value_col)
+        not_null = f"{value} IS NOT NULL"
+        where = f"{where} AND {not_null}" if where else f" WHERE {not_null}"
+        sql = (
+            f"SELECT {keys}, COUNT({value}) AS n, AVG({value}) AS mean_s, "
+            f"SUM({value} * {value}) AS _sumsq, MIN({value}) AS min_s, MAX({value}) AS max_s "
+            f"FROM {TABLE}{where} GROUP BY {keys} ORDER BY {keys}"
+        )
+        with self._connect() as con:
+            table = pd.read_sql_query(sql, con, params=params)
+            if "median" in stats and not table.empty:
+                ranked = (
+                    f"SELECT {keys}, {value} AS v, "
+                    f"ROW_NUMBER() OVER (PARTITION BY {keys} ORDER BY {value}) AS rn, "
+                    f"COUNT(*) OVER (PARTITION BY {keys}) AS cnt FROM {TABLE}{where}"
+                )
+                median_sql = (
+                    f"SELECT {keys}, AVG(v) AS median_s FROM ({ranked}) "
+                    f"WHERE rn IN ((cnt + 1) / 2, (cnt + 2) / 2) GROUP BY {keys}"
+                )
+                medians = pd.read_sql_query(median_sql, con, params=params)
+                table = table.merge(medians, on=group_cols, how="left")
+        n = table["n"].astype(float)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            var = (table["_sumsq"] - n * table["mean_s"] ** 2) / (n - 1)
+        table["std_s"] = np.sqrt(var.clip(lower=0)).where(n > 1)
+        names = {"n": "n", "mean": "mean_s", "std": "std_s", "median": "median_s", "min": "min_s", "max": "max_s"}
+        return table[[*group_cols, *(names[s] for s in stats)]]
+
+    def runs(self) -> pd.DataFrame:
+        """Protokoll aller Analyse-Läufe (neuester zuletzt)."""
+        with self._connect() as con:
+            return pd.read_sql_query("SELECT * FROM runs ORDER BY run_id", con)
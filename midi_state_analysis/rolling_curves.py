@@ -0,0 +1,146 @@
+"""
+Lernkurven innerhalb eines Blocks: gleitender Mittelwert/Median der Übergangszeit je
+Subject × Block über den Index des erkannten Übergangs (idx_from, 0-basiert in der Datei).
+
+Position ist idx_from, nicht die Zeilennummer: fehlen Übergänge (z.B. nach Entfernen von
+Ausreißern), bleibt die Lücke erhalten. Das Fenster umfasst die Positionen
+(idx_from - window, idx_from]; fehlende Positionen zählen nicht zu n_window.
+
+Alle Reihen werden gemeinsam berechnet: die Tabelle wird einmal nach (subject, block,
+idx_from) sortiert, Reihengrenzen ergeben sich aus den Wechselstellen, Fenstergrenzen per
+searchsorted auf einem über die Reihen monotonen Schlüssel. Der gleitende Mittelwert ist
+eine Differenz der globalen kumulierten Summe; der gleitende Median sortiert eine
+(n × window)-Fenstermatrix, die über einen Index-Offset gebildet wird. Keine Schleife und
+kein pandas-rolling pro Gruppe.
+
+Plateau: erste Position, ab der der gleitende Mittelwert bis zum Blockende innerhalb von
+±tolerance (relativ) des Endniveaus bleibt (Endniveau = Mittel der letzten window
+Positionen). Reihen, deren Plateau kürzer als ein Fenster wäre, bekommen keins
+(plateau_position NA).
+
+Beispiel:
+    >>> curves = rolling_curves(load_transitions(), window=9)
+    >>> plateau_summary(curves)
+"""
+
+from typing import Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+VALUE_COL = "transition_time_s"
+SERIES_COLS = ("subject", "block")
+
+
+def _series_starts(keys: Sequence[np.ndarray]) -> np.ndarray:
+    """Startindex der Reihe für jede Zeile (Tabelle bereits nach keys sortiert)."""
+    n = len(keys[0])
+    change = np.zeros(n, dtype=bool)
+    if n:
+        change[0] = True
+    for key in keys:
+        change[1:] |= key[1:] != key[:-1]
+    starts = np.flatnonzero(change)
+    return starts[np.cumsum(change) - 1]
+
+
+def rolling_curves(
+    df: pd.DataFrame,
+    window: int = 9,
+    min_periods: Optional[int] = None,
+    tolerance: float = 0.05,
+    by: Sequence[str] = SERIES_COLS,
+) -> pd.DataFrame:
+    """
+    Gleitende Kennzahlen (nachlaufendes Fenster) für jede Subject × Block-Reihe.
+
+    Args:
+        df: Transitionstabelle mit subject, block, idx_from und transition_time_s
+        window: Fensterbreite in Positionen (idx_from)
+        min_periods: Mindestanzahl Werte im Fenster (Default: window, wie pandas)
+        tolerance: relative Bandbreite um das Endniveau für die Plateau-Erkennung
+        by: Spalten, die eine Reihe definieren
+
+    Returns:
+        Tidy-Tabelle, eine Zeile pro Transition: by-Spalten, idx_from, position (= idx_from,
+        Index des erkannten Übergangs), transition_id, transition_time_s, n_window, rolling_mean_s,
+        rolling_median_s, final_level_s, plateau_position und in_plateau
+    """
+    if window < 1:
+        raise ValueError("window muss mindestens 1 sein.")
+    min_periods = window if min_periods is None else min_periods
+    by = list(by)
+    columns = [*by, "idx_from", *(["transition_id"] if "transition_id" in df.columns else []), VALUE_COL]
+    data = df[columns].sort_values([*by, "idx_from"], kind="stable").reset_index(drop=True)
+    keys = [pd.factorize(data[col], sort=False)[0] for col in by]
+    values = data[VALUE_COL].to_numpy(float)
+    n = len(values)
+    rows = np.arange(n)
+    start = _series_starts(keys) if n else np.zeros(0, dtype=np.int64)
+    position = data["idx_from"].to_numpy(np.int64)
+    # Fensteranfang: erste Zeile der Reihe mit idx_from > position - window
+    series = np.cumsum(rows == start) - 1
+    span = (position.max() - min(position.min(), 0) + window + 1) if n else 1
+    ordered = series * span + position
+    left = np.searchsorted(ordered, ordered - window + 1, side="left")
+    left = np.maximum(left, rows - window + 1)  # doppelte idx_from: höchstens window Zeilen
+
+    # Gleitender Mittelwert über die kumulierte Summe (NaN zählen nicht mit)
+    valid = ~np.isnan(values)
+    csum = np.concatenate([[0.0], np.cumsum(np.where(valid, values, 0.0))])
+    ccount = np.concatenate([[0], np.cumsum(valid)])
+    window_sum = csum[rows + 1] - csum[left]
+    n_window = ccount[rows + 1] - ccount[left]
+    enough = n_window >= max(min_periods, 1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rolling_mean = np.where(enough, window_sum / n_window, np.nan)
+
+    # Gleitender Median: Fenstermatrix über Offsets, Zeilen vor dem Fensteranfang als NaN
+    offsets = np.arange(-window + 1, 1)
+    index = rows[:, None] + offsets[None, :]
+    in_window = index >= left[:, None]
+    windows = np.where(in_window, values[np.clip(index, 0, None)], np.nan) if n else np.empty((0, window))
+    windows.sort(axis=1)  # NaN ans Ende
+    lo = np.clip((n_window - 1) // 2, 0, None)
+    hi = np.clip(n_window // 2, 0, None)
+    median = (windows[rows, lo] + windows[rows, hi]) / 2 if n else np.empty(0)
+    rolling_median = np.where(enough, median, np.nan)
+
+    # Endniveau und Plateau je Reihe
+    is_last = np.ones(n, dtype=bool)
+    if n:
+        is_last[:-1] = start[1:] != start[:-1]
+    last_row = np.flatnonzero(is_last)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        final_level = (window_sum[last_row] / n_window[last_row])[series]
+        outside = ~(np.abs(rolling_mean - final_level) <= tolerance * np.abs(final_level))
+    last_outside = np.full(len(last_row), -1, dtype=np.int64)
+    np.maximum.at(last_outside, series[outside], position[outside])
+    series_length = position[last_row] + 1
+    plateau = last_outside + 1
+    # Ein Plateau muss mindestens ein volles Fenster lang sein
+    plateau_position = np.where(series_length - plateau >= window, plateau, -1)[series]
+
+    result = data.copy()
+    result.insert(len(by) + 1, "position", position)
+    result["n_window"] = n_window
+    result["rolling_mean_s"] = rolling_mean
+    result["rolling_median_s"] = rolling_median
+    result["final_level_s"] = final_level
+    result["plateau_position"] = pd.Series(plateau_position).where(plateau_position >= 0).astype("Int64")
+    result["in_plateau"] = (plateau_position >= 0) & (position >= plateau_position)
+    return result
+
+
+def plateau_summary(curves: pd.DataFrame, by: Sequence[str] = SERIES_COLS) -> pd.DataFrame:
+    """Eine Zeile je Reihe: Länge, Endniveau, Plateau-Position und zugehöriger idx_from."""
+    by = list(by)
+    grouped = curves.groupby(by, observed=True, sort=False)
+    summary = grouped.agg(
+        n=("position", "size"),
+        final_level_s=("final_level_s", "first"),
+        plateau_position=("plateau_position", "first"),
+    ).reset_index()
+    first_in_plateau = curves[curves["in_plateau"]].groupby(by, observed=True, sort=False)["idx_from"].first()
+    summary = summary.merge(first_in_plateau.rename("plateau_idx_from").reset_index(), on=by, how="left")
+    return summary
@@ -0,0 +1,215 @@
+"""
+Geschichtete Stichprobe von Dateien für schnelle Näherungsergebnisse (--sample).
+
+Stichprobeneinheit ist eine Datei bzw. eine Subject × Block-Zelle der Tabelle. Schichten
+sind die normalisierten Blöcke (Pretest, B1..B8, Posttest): jede Schicht bekommt
+max(min_per_stratum, ⌈fraction · N_h⌉) Einheiten, damit jeder Block (und damit jedes
+Muster aus choose_freq_pattern, Test wie Training) vertreten ist und je Schicht eine
+Varianz geschätzt werden kann. Innerhalb einer Schicht werden bevorzugt Subjects gezogen,
+die bisher am seltensten gewählt wurden (Zufall des Seeds bei Gleichstand); so verteilt
+sich die Stichprobe auch gleichmäßig über die Subjects. Die Auswahl hängt nur von der
+Menge der Einheiten und dem Seed ab, nicht von deren Reihenfolge.
+
+Schätzung (sample_estimates): mittlere Übergangszeit je Datei, gemittelt über die
+gezogenen Dateien einer Schicht, Standardfehler mit Endlichkeitskorrektur
+sqrt((1 - n_h/N_h) · s_h² / n_h); Block-Typen und Gesamt als geschichtete Schätzer mit
+Gewichten N_h / N und Satterthwaite-Freiheitsgraden für das t-KI.
+
+Beispiel:
+    >>> plan = sample_paths(paths, fraction=0.2, seed=1)
+    >>> df = analyze(plan.selected())
+    >>> sample_estimates(df, plan)
+"""
+
+import argparse
+import math
+import os
+from typing import List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .folder_utils import block_sort_key, normalize_block_name, parse_subject_and_block
+from .transition_data import classify_block
+
+VALUE_COL = "transition_time_s"
+MIN_PER_STRATUM = 2
+
+
+class SamplePlan:
+    """
+    Alle Einheiten der Grundgesamtheit mit Auswahl-Flag.
+
+    units: DataFrame mit subject, block (normalisiert), unit (Pfad oder None) und selected
+    """
+
+    __slots__ = ("units", "fraction", "seed")
+
+    def __init__(self, units: pd.DataFrame, fraction: float, seed: int):
+        self.units = units
+        self.fraction = fraction
+        self.seed = seed
+
+    @property
+    def n_population(self) -> int:
+        return len(self.units)
+
+    @property
+    def n_selected(self) -> int:
+        return int(self.units["selected"].sum())
+
+    def selected(self) -> List:
+        """Gezogene Einheiten (Pfade) in der ursprünglichen Reihenfolge."""
+        return self.units.loc[self.units["selected"], "unit"].tolist()
+
+    def population_counts(self) -> pd.Series:
+        """N_h: Anzahl Einheiten je Block in der Grundgesamtheit."""
+        return self.units.groupby("block", sort=False).size()
+
+    def describe(self) -> str:
+        return (f"Stichprobe: {self.n_selected} von {self.n_population} Dateien "
+                f"({self.fraction:.0%} je Block, mind. {MIN_PER_STRATUM}, Seed {self.seed})")
+
+
+def stratified_sample(
+    units: pd.DataFrame,
+    fraction: float,
+    seed: int = 0,
+    min_per_stratum: int = MIN_PER_STRATUM,
+) -> SamplePlan:
+    """
+    Zieht je Block-Schicht ⌈fraction · N_h⌉ (mindestens min_per_stratum) Einheiten.
+
+    Args:
+        units: eine Zeile je Einheit mit subject, block (normalisiert) und unit
+        fraction: Anteil je Schicht, 0 < fraction <= 1
+        seed: Seed für reproduzierbare Auswahl
+    """
+    if not 0 < fraction <= 1:
+        raise ValueError("fraction muss in (0, 1] liegen.")
+    units = units.reset_index(drop=True)
+    rng = np.random.default_rng(seed)
+    # Reihenfolge-unabhängig: Zufallszahlen werden in sortierter Reihenfolge vergeben
+    order = np.lexsort((units["unit"].astype(str), units["subject"].astype(str), units["block"].astype(str)))
+    tiebreak = np.empty(len(units))
+    tiebreak[order] = rng.random(len(units))
+
+    selected = np.zeros(len(units), dtype=bool)
+    times_chosen = {}
+    for block in sorted(pd.unique(units["block"]), key=block_sort_key):
+        members = np.flatnonzero(units["block"].to_numpy() == block)
+        n_take = min(len(members), max(min_per_stratum, math.ceil(fraction * len(members))))
+        subjects = units["subject"].to_numpy()[members]
+        rank = sorted(range(len(members)), key=lambda i: (times_chosen.get(subjects[i], 0), tiebreak[members[i]]))
+        for i in rank[:n_take]:
+            selected[members[i]] = True
+            times_chosen[subjects[i]] = times_chosen.get(subjects[i], 0) + 1
+    return SamplePlan(units.assign(selected=selected), fraction, seed)
+
+
+def sample_paths(paths: Sequence[str], fraction: float, seed: int = 0) -> SamplePlan:
+    """Stichprobe über MIDI-Pfade (subject aus dem Ordner-, block aus dem Dateinamen)."""
+    subjects, blocks = [], []
+    for path in paths:
+        subject, block = parse_subject_and_block(*os.path.split(path))
+        subjects.append(subject)
+        blocks.append(normalize_block_name(block))
+    units = pd.DataFrame({"subject": subjects, "block": blocks, "unit": list(paths)})
+    return stratified_sample(units, fraction, seed)
+
+
+def sample_table(df: pd.DataFrame, fraction: float, seed: int = 0) -> Tuple[SamplePlan, pd.DataFrame]:
+    """Stichprobe über die Subject × Block-Zellen einer vorhandenen Transitionstabelle."""
+    cells = df[["subject", "block"]].astype(str).drop_duplicates().reset_index(drop=True)
+    plan = stratified_sample(cells.assign(unit=None), fraction, seed)
+    chosen = plan.units.loc[plan.units["selected"], ["subject", "block"]]
+    keys = pd.MultiIndex.from_frame(df[["subject", "block"]].astype(str))
+    mask = keys.isin(pd.MultiIndex.from_frame(chosen))
+    return plan, df[mask]
+
+
+def _sample_fraction(value):
+    fraction = float(value)
+    if not 0 < fraction <= 1:
+        raise argparse.ArgumentTypeError("Anteil muss in (0, 1] liegen, z.B. 0.2")
+    return fraction
+
+
+def add_sample_arguments(parser: argparse.ArgumentParser) -> None:
+    """--sample / --sample-seed für die CLI und die Statistik-Skripte."""
+    parser.add_argument("--sample", metavar="ANTEIL", type=_sample_fraction,
+                        help="Nur eine geschichtete Stichprobe analysieren (Anteil je Block, mind. 2 Dateien; "
+                             "Subjects gleichmäßig verteilt) und Schätzungen mit Standardfehler ausgeben")
+    parser.add_argument("--sample-seed", metavar="N", type=int, default=0,
+                        help="Seed der Stichprobe (Default: 0, gleiche Auswahl bei gleichen Dateien)")
+
+
+def _stratum_stats(df: pd.DataFrame, plan: SamplePlan) -> pd.DataFrame:
+    """Je Block: n_h (Dateien mit Daten), N_h, Mittel und Varianz der Datei-Mittelwerte."""
+    data = df[["subject", "block", VALUE_COL]].dropna()
+    data = data.assign(subject=data["subject"].astype(str), block=data["block"].astype(str))
+    per_file = data.groupby(["block", "subject"], observed=True)[VALUE_COL].agg(["mean", "size"])
+    stats = per_file.groupby("block", observed=True).agg(
+        n_sampled=("mean", "size"),
+        n_transitions=("size", "sum"),
+        mean_s=("mean", "mean"),
+        var_s=("mean", "var"),
+    )
+    stats["n_population"] = plan.population_counts().reindex(stats.index).fillna(0).astype(int)
+    stats["n_population"] = stats[["n_population", "n_sampled"]].max(axis=1)
+    return stats
+
+
+def _combine(stats: pd.DataFrame, confidence: float) -> dict:
+    """Geschichteter Schätzer über die Zeilen von stats."""
+    # scipy.stats erst hier: analyzer importiert sampling, der Paket-Import soll schlank bleiben
+    from scipy.stats import t as t_dist
+
+    weights = stats["n_population"] / stats["n_population"].sum()
+    finite_pc = 1 - stats["n_sampled"] / stats["n_population"]
+    parts = weights ** 2 * finite_pc * stats["var_s"] / stats["n_sampled"]
+    variance = parts.sum(skipna=False)
+    # Satterthwaite; Schichten ohne Restvarianz (Vollerhebung) tragen keine Freiheitsgrade bei
+    with np.errstate(divide="ignore", invalid="ignore"):
+        denom = (parts ** 2 / (stats["n_sampled"] - 1)).sum(skipna=False)
+        dof = variance ** 2 / denom if denom > 0 else np.inf
+    se = math.sqrt(variance) if pd.notna(variance) else np.nan
+    t_crit = t_dist.ppf(1 - (1 - confidence) / 2, dof) if pd.notna(dof) else np.nan
+    mean = float((weights * stats["mean_s"]).sum())
+    return {
+        "n_sampled": int(stats["n_sampled"].sum()),
+        "n_population": int(stats["n_population"].sum()),
+        "n_transitions": int(stats["n_transitions"].sum()),
+        "mean_s": mean,
+        "se_s": se,
+        "ci_lower_s": mean - t_crit * se,
+        "ci_upper_s": mean + t_crit * se,
+        "df": dof,
+    }
+
+
+def sample_estimates(df: pd.DataFrame, plan: SamplePlan, confidence: float = 0.95) -> pd.DataFrame:
+    """
+    Mittlere Übergangszeit (je Datei gemittelt) mit Stichprobenfehler je Block, Block-Typ und gesamt.
+
+    Spalten: level, group, n_sampled, n_population, n_transitions, mean_s, se_s,
+    ci_lower_s, ci_upper_s, df. Schichten mit nur einer Datei haben keinen Standardfehler.
+    """
+    stats = _stratum_stats(df, plan)
+    if stats.empty:
+        return pd.DataFrame()
+    stats = stats.loc[sorted(stats.index, key=block_sort_key)]
+    rows = [{"level": "block", "group": block, **_combine(stats.loc[[block]], confidence)} for block in stats.index]
+    block_types = pd.Series([classify_block(block) for block in stats.index], index=stats.index)
+    for block_type in sorted(block_types.unique()):
+        rows.append({"level": "block_type", "group": block_type,
+                     **_combine(stats[block_types == block_type], confidence)})
+    rows.append({"level": "all", "group": "all", **_combine(stats, confidence)})
+    return pd.DataFrame(rows)
+
+
+def report_estimates(df: pd.DataFrame, plan: SamplePlan) -> None:
+    """Gibt die Stichprobenschätzung als eigenen Abschnitt aus."""
+    table = sample_estimates(df, plan)
+    print(f"\n=== Stichprobenschätzung ({plan.n_selected} von {plan.n_population} Dateien, Seed {plan.seed}) ===")
+    print(table.to_string(index=False) if not table.empty else "Keine Daten.")
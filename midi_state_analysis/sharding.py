@@ -0,0 +1,84 @@
+"""
+Verteilte Analyse über mehrere Rechner: Shard-Zuordnung und Merge der Teilergebnisse.
+
+Ein Lauf mit `--shard i/N` verarbeitet nur die Subjects, deren CRC32-Hash modulo N gleich
+i-1 ist (stabil über Rechner und Python-Versionen, anders als hash()). Die Teil-CSV trägt
+zusätzlich die Spalte source_file (Pfad relativ zum Datenordner). `midi-analysis merge`
+sortiert danach in die Reihenfolge eines Einzelrechner-Laufs, entfernt die Spalte und
+führt die Quantil-Sketches der Teile zusammen.
+"""
+
+import os
+import zlib
+from typing import List, Sequence, Tuple
+
+import pandas as pd
+
+from .archives import walk_order_key
+from .quantile_sketch import TransitionSketches, sketch_path_for
+
+SOURCE_COL = "source_file"
+
+
+def parse_shard(text: str) -> Tuple[int, int]:
+    """
+    Parst eine Shard-Angabe "i/N" (1-basiert).
+
+    Beispiel:
+        >>> parse_shard("2/4")
+        (2, 4)
+    """
+    try:
+        index, total = (int(part) for part in text.split("/"))
+    except ValueError:
+        raise ValueError(f"Ungültige Shard-Angabe {text!r}, erwartet i/N (z.B. 1/4)") from None
+    if total < 1 or not 1 <= index <= total:
+        raise ValueError(f"Ungültige Shard-Angabe {text!r}: i muss zwischen 1 und N liegen")
+    return index, total
+
+
+def subject_shard(subject: str, n_shards: int) -> int:
+    """1-basierte Shard-Nummer eines Subjects."""
+    return zlib.crc32(subject.encode("utf-8")) % n_shards + 1
+
+
+def shard_output_path(output_csv: str, shard: Tuple[int, int]) -> str:
+    """X.csv -> X.part-2-of-4.csv"""
+    stem = output_csv[:-4] if output_csv.lower().endswith(".csv") else output_csv
+    return f"{stem}.part-{shard[0]}-of-{shard[1]}.csv"
+
+
+def merge_partial_outputs(partial_csvs: Sequence[str], output_csv: str) -> int:
+    """
+    Führt Teil-CSVs aus Shard-Läufen zur finalen Transitionstabelle zusammen.
+
+    Zeilen werden als Text übernommen (keine Float-Rundung) und in die Reihenfolge eines
+    Einzelrechner-Laufs gebracht. Vorhandene Sketch-Dateien der Teile werden gemerged.
+
+    Returns:
+        Anzahl der geschriebenen Zeilen
+    """
+    frames: List[pd.DataFrame] = []
+    sketches = TransitionSketches()
+    has_sketches = False
+    for path in partial_csvs:
+        df = pd.read_csv(path, dtype=str, keep_default_na=False, encoding="utf-8-sig")
+        if SOURCE_COL not in df.columns:
+            raise ValueError(f"{path} ist keine Teil-CSV eines Shard-Laufs (Spalte {SOURCE_COL} fehlt).")
+        frames.append(df)
+        sketch_file = sketch_path_for(path)
+        if os.path.isfile(sketch_file):
+            sketches.merge(TransitionSketches.load(sketch_file))
+            has_sketches = True
+    if not frames:
+        raise ValueError("Keine Teil-CSVs angegeben.")
+
+    df = pd.concat(frames, ignore_index=True)
+    sources = df[SOURCE_COL].unique()
+    rank = {source: i for i, source in enumerate(sorted(sources, key=walk_order_key))}
+    df["_order"] = df[SOURCE_COL].map(rank)
+    df = df.sort_values("_order", kind="stable").drop(columns=["_order", SOURCE_COL])
+    df.to_csv(output_csv, index=False, encoding="utf-8-sig")
+    if has_sketches:
+        sketches.save(sketch_path_for(output_csv))
+    return len(df)
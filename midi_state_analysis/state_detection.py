@@ -1,43 +1,316 @@
-from typing import List, Tuple, Set
+from typing import Optional
 import mido
-import pandas as pd
-from .config import COMBO_TO_STATE, STATE_DEFS
-from .midi_utils import get_sec_per_tick, merge_music_tracks
-
-def detect_states_in_midi(mid: mido.MidiFile) -> pd.DataFrame:
-    sec_per_tick = get_sec_per_tick(mid)
-    track = merge_music_tracks(mid)
-    pressed: Set[int] = set()
-    events = []
+import numpy as np
+from .config import STATE_DEFS
+from .midi_utils import extract_note_events
+from .state_matcher import StateMatcher
+from .events import StateEvents, StateEventBuilder
+
+_DEFAULT_MATCHER: Optional[StateMatcher] = None
+
+def default_matcher() -> StateMatcher:
+    """Matcher für das feste Vokabular aus config.STATE_DEFS (einmalig aufgebaut)."""
+    global _DEFAULT_MATCHER
+    if _DEFAULT_MATCHER is None:
+        _DEFAULT_MATCHER = StateMatcher(STATE_DEFS)
+    return _DEFAULT_MATCHER
+
+def make_matcher(state_defs: Optional[dict] = None, tolerance: int = 0) -> Optional[StateMatcher]:
+    """Matcher für state_defs/tolerance; None, wenn der Default-Matcher genügt."""
+    if not state_defs and not tolerance:
+        return None
+    return StateMatcher(state_defs or STATE_DEFS, tolerance)
+
+def detect_states_in_midi(
+    mid: mido.MidiFile,
+    matcher: Optional[StateMatcher] = None,
+    features: bool = False,
+) -> StateEvents:
+    notes = extract_note_events(mid)
+    if features:
+        return detect_states_with_features(notes["time_s"], notes["pitch"], notes["is_on"], notes["velocity"], matcher)
+    return detect_states_from_notes(notes["time_s"], notes["pitch"], notes["is_on"], matcher)
+
+def detect_states_from_notes(
+    time_s: np.ndarray,
+    pitch: np.ndarray,
+    is_on: np.ndarray,
+    matcher: Optional[StateMatcher] = None,
+) -> StateEvents:
+    """
+    State-Erkennung auf bereits dekodierten Noten-Events (z.B. Views aus dem Event-Store).
+
+    Die Events werden direkt in typisierte Arrays geschrieben; `StateEvents.to_frame()`
+    liefert bei Bedarf den DataFrame im früheren Format.
+
+    Args:
+        time_s: Zeitpunkt jedes Events in Sekunden
+        pitch: MIDI-Notennummer jedes Events
+        is_on: True für Anschlag, False für Loslassen
+        matcher: StateMatcher für ein eigenes Vokabular (Default: config.STATE_DEFS);
+            mit tolerance > 0 werden auch Beinahe-Treffer erkannt (`detect_states_tolerant`)
+    """
+    matcher = matcher or default_matcher()
+    if matcher.tolerance:
+        return detect_states_tolerant(time_s, pitch, is_on, matcher)
+    if matcher.scan:
+        return _detect_states_scan(time_s, pitch, is_on, matcher)
+    matcher.reset()
+    press, release, current = matcher.press, matcher.release, matcher.current
+    pressed = matcher.pressed
+    events = StateEventBuilder()
+    append = events.append
     last_state = None
-    ticks = 0
-    for msg in track:
-        ticks += msg.time
-        if msg.type == "note_on" and msg.velocity > 0:
-            pressed.add(msg.note)
-        elif msg.type in ("note_on", "note_off"):
-            pressed.discard(msg.note)
-        
-        state = None
-        extra_keys = []
-        
-        if len(pressed) == 6:
-            state = COMBO_TO_STATE.get(frozenset(pressed))
-        elif len(pressed) > 6:
-            # Prüfe ob einer der definierten States ein Subset der gedrückten Tasten ist
-            for state_id, state_notes in STATE_DEFS.items():
-                if state_notes.issubset(pressed):
-                    state = state_id
-                    extra_keys = list(pressed - state_notes)
+    for t, note, on in zip(time_s.tolist(), pitch.tolist(), is_on.tolist()):
+        if on:
+            press(note)
+        else:
+            release(note)
+
+        state, extra_keys = current()
+
+        if state is not None and state != last_state:
+            append(t, state, len(pressed), extra_keys)
+            last_state = state
+    return events.build()
+
+def _detect_states_scan(time_s: np.ndarray, pitch: np.ndarray, is_on: np.ndarray, matcher: StateMatcher) -> StateEvents:
+    """Kleines Vokabular: exakter Treffer per frozenset, sonst erster Teilmengen-Treffer (inline)."""
+    matcher.reset()
+    pressed = matcher.pressed
+    exact, state_ids = matcher.exact, matcher.state_ids
+    ordered = list(enumerate(matcher.state_notes))
+    min_size = min(matcher.sizes)
+    events = StateEventBuilder()
+    append = events.append
+    last_state = None
+    for t, note, on in zip(time_s.tolist(), pitch.tolist(), is_on.tolist()):
+        if on:
+            pressed.add(note)
+        else:
+            pressed.discard(note)
+        if len(pressed) < min_size:
+            continue
+
+        rank = exact.get(frozenset(pressed))
+        if rank is None:
+            for candidate, notes in ordered:
+                if notes <= pressed:
+                    rank = candidate
                     break
-        
+            else:
+                continue
+            if state_ids[rank] != last_state:
+                append(t, state_ids[rank], len(pressed), list(pressed - ordered[rank][1]))
+                last_state = state_ids[rank]
+        elif state_ids[rank] != last_state:
+            append(t, state_ids[rank], len(pressed), [])
+            last_state = state_ids[rank]
+    return events.build()
+
+def _keys_of(mask: int) -> list:
+    """Pitches der gesetzten Bits einer Tastenmaske (aufsteigend)."""
+    keys = []
+    while mask:
+        low = mask & -mask
+        keys.append(low.bit_length() - 1)
+        mask ^= low
+    return keys
+
+def detect_states_tolerant(
+    time_s: np.ndarray,
+    pitch: np.ndarray,
+    is_on: np.ndarray,
+    matcher: StateMatcher,
+) -> StateEvents:
+    """
+    State-Erkennung mit Toleranz: auch Akkorde mit Hamming-Distanz <= matcher.tolerance
+    zu einem State (fehlende plus zusätzliche Tasten) zählen als Treffer.
+
+    Vollständige States werden genau wie in `detect_states_from_notes` erkannt. Beinahe-
+    Treffer werden erst geprüft, wenn nach einem Anschlag ohne vollständigen State wieder
+    eine Taste losgelassen wird (bzw. am Dateiende), und zwar auf den bis dahin gehaltenen
+    Tasten: beim Aufbau durchläuft ein Akkord sonst Vorstufen, die selbst Beinahe-Treffer
+    wären, und die Popcount-Suche läuft so einmal pro Akkord statt pro Event. Zeitpunkt
+    ist der späteste Anschlag der gehaltenen Akkordtasten. Bei gleicher Distanz gewinnt der
+    zuletzt erkannte State (kein neues Event). Fehlende Tasten stehen in
+    `StateEvents.missing_keys`.
+    """
+    matcher.reset()
+    press, release, current, near_miss = matcher.press, matcher.release, matcher.current, matcher.near_miss
+    pressed, masks, state_ids = matcher.pressed, matcher.masks, matcher.state_ids
+    rank_of = {state: rank for rank, state in enumerate(state_ids)}
+    # Distanz >= Akkordgröße - gedrückte Tasten: mit weniger Tasten ist kein State nah genug
+    min_keys = max(min(matcher.sizes) - matcher.tolerance, 1)
+    onset = [0.0] * 128
+    events = StateEventBuilder(missing=True)
+    append = events.append
+    last_state = None
+    mask = 0
+    armed = False  # Anschlag seit dem letzten Treffer, aber kein vollständiger State
+
+    def check() -> bool:
+        nonlocal last_state
+        if len(pressed) < min_keys:
+            return False
+        rank, distance = near_miss(mask)
+        if rank is None or state_ids[rank] == last_state:
+            return False
+        if last_state is not None and (mask ^ masks[rank_of[last_state]]).bit_count() <= distance:
+            return False
+        state_mask = masks[rank]
+        held = mask & state_mask
+        t = max([onset[k] for k in _keys_of(held)])
+        append(t, state_ids[rank], len(pressed), _keys_of(mask & ~state_mask), _keys_of(state_mask & ~mask))
+        last_state = state_ids[rank]
+        return True
+
+    for t, note, on in zip(time_s.tolist(), pitch.tolist(), is_on.tolist()):
+        if on:
+            if note not in pressed:
+                onset[note] = t
+            press(note)
+            mask |= 1 << note
+        else:
+            if armed and check():
+                armed = False
+            release(note)
+            mask &= ~(1 << note)
+
+        state, extra_keys = current()
+
+        if state is not None:
+            armed = False
+            if state != last_state:
+                append(t, state, len(pressed), extra_keys, ())
+                last_state = state
+        elif on:
+            armed = True
+    if armed:
+        check()
+    return events.build()
+
+FEATURE_COLUMNS = (
+    "first_onset_s", "onset_asynchrony_s", "mean_velocity", "release_first_s", "release_last_s",
+    "dwell_s", "gap_s", "exit_s",
+)
+
+def detect_states_with_features(
+    time_s: np.ndarray,
+    pitch: np.ndarray,
+    is_on: np.ndarray,
+    velocity: np.ndarray,
+    matcher: Optional[StateMatcher] = None,
+) -> StateEvents:
+    """
+    Wie `detect_states_from_notes`, misst im selben Durchlauf zusätzlich die Motorik je Akkord
+    sowie Verweildauer und Lücken je State.
+
+    Pro Pitch werden Anschlagzeit, Velocity und das besitzende Event in Listen fester
+    Länge (128) gehalten; ein Event kostet damit nur ein paar Listenzugriffe mehr.
+    Tasten, die zwei aufeinanderfolgende Akkorde gemeinsam haben und vom vorigen Akkord
+    noch gehalten werden, bleiben dem vorigen Event zugeordnet: Anschlag, Velocity und
+    Loslassen eines Events beziehen sich nur auf seine neu angeschlagenen Tasten (gibt es
+    keine, weil der State nur durch Loslassen entstand, auf alle Akkordtasten; Loslassen
+    bleibt dann NaN).
+    Ergebnis in `StateEvents.features` (ein Wert je Event):
+        first_onset_s:      Anschlag der ersten neuen Akkordtaste
+        onset_asynchrony_s: erste neue Taste bis Akkord vollständig (= time_s - first_onset_s)
+        mean_velocity:      mittlere Anschlagsstärke der neuen Akkordtasten
+        release_first_s:    Loslassen der ersten neuen Akkordtaste (NaN, falls nie losgelassen)
+        release_last_s:     Loslassen der letzten neuen Akkordtaste (NaN, falls nie losgelassen)
+        dwell_s:            Zeit, in der der State gehalten war, bis der nächste State beginnt
+                            (beim letzten Event bis zum letzten Noten-Event der Datei)
+        gap_s:              gesamte Zeit ohne gültigen Akkord zwischen diesem und dem nächsten
+                            State (Summe aller Lücken, nicht nur der letzten)
+        exit_s:             letztes Verlassen des States (direkter Wechsel: Beginn des
+                            nächsten States; NaN, falls bis zum Dateiende gehalten)
+
+    Verweildauer und Lücken ergeben sich aus den Wechseln von `current()` (State <-> kein
+    State): zwischen zwei Events ist nur der State des ersten Events oder keiner gültig.
+    Wird ein State nach einer Lücke erneut gegriffen, ohne dass ein anderer dazwischen lag
+    (A → keiner → A), zählt die neue Haltezeit weiter zu seinem Event und die Lücke bleibt in
+    gap_s stehen: dwell_s + gap_s ist immer die Zeit bis zum nächsten Event, darauf beruht
+    occupancy.
+    """
+    matcher = matcher or default_matcher()
+    if matcher.tolerance:
+        raise ValueError("Feature-Modus und Toleranz-Modus sind nicht kombinierbar.")
+    matcher.reset()
+    press, release, current = matcher.press, matcher.release, matcher.current
+    pressed = matcher.pressed
+    state_notes = dict(zip(matcher.state_ids, [tuple(notes) for notes in matcher.state_notes]))
+    onset = [0.0] * 128
+    note_velocity = [0] * 128
+    owner = [-1] * 128
+    first_onset, asynchrony, mean_velocity = [], [], []
+    release_first, release_last = [], []
+    dwell, gap, exit_time = [], [], []
+    held, held_since = None, 0.0  # gültiger State (oder None) seit held_since
+    events = StateEventBuilder()
+    append = events.append
+    last_state = None
+    t = 0.0
+    for t, note, on, vel in zip(time_s.tolist(), pitch.tolist(), is_on.tolist(), velocity.tolist()):
+        if on:
+            if note not in pressed:
+                onset[note] = t
+                note_velocity[note] = vel
+            press(note)
+        else:
+            if note in pressed:
+                event = owner[note]
+                if event >= 0:
+                    if release_first[event] != release_first[event]:
+                        release_first[event] = t
+                    release_last[event] = t
+                    owner[note] = -1
+            release(note)
+
+        state, extra_keys = current()
+
+        if state != held:
+            # Haltezeit bzw. Lücke bis hierher dem letzten Event zuschlagen
+            if first_onset:
+                if held is None:
+                    # Lücken summieren sich, auch wenn derselbe State erneut gegriffen wird
+                    gap[-1] += t - held_since
+                    if state == last_state:
+                        exit_time[-1] = np.nan
+                else:
+                    dwell[-1] += t - held_since
+                    exit_time[-1] = t
+            held, held_since = state, t
+
         if state is not None and state != last_state:
-            event = {
-                "time_s": ticks * sec_per_tick, 
-                "state": state,
-                "extra_keys": extra_keys if extra_keys else None,
-                "total_keys_pressed": len(pressed)
-            }
-            events.append(event)
+            event = len(first_onset)
+            # Vom vorigen Akkord gehaltene Tasten gehören weiter zu dessen Event
+            keys = [k for k in state_notes[state] if owner[k] < 0] or state_notes[state]
+            start = min([onset[k] for k in keys])
+            first_onset.append(start)
+            asynchrony.append(t - start)
+            mean_velocity.append(sum([note_velocity[k] for k in keys]) / len(keys))
+            release_first.append(np.nan)
+            release_last.append(np.nan)
+            dwell.append(0.0)
+            gap.append(0.0)
+            exit_time.append(np.nan)
+            for k in keys:
+                if owner[k] < 0:
+                    owner[k] = event
+            append(t, state, len(pressed), extra_keys)
             last_state = state
-    return pd.DataFrame(events)
+    if held is not None and first_onset:
+        dwell[-1] += t - held_since
+    result = events.build()
+    result.features = {
+        "first_onset_s": np.asarray(first_onset, dtype=np.float64),
+        "onset_asynchrony_s": np.asarray(asynchrony, dtype=np.float64),
+        "mean_velocity": np.asarray(mean_velocity, dtype=np.float64),
+        "release_first_s": np.asarray(release_first, dtype=np.float64),
+        "release_last_s": np.asarray(release_last, dtype=np.float64),
+        "dwell_s": np.asarray(dwell, dtype=np.float64),
+        "gap_s": np.asarray(gap, dtype=np.float64),
+        "exit_s": np.asarray(exit_time, dtype=np.float64),
+    }
+    return result
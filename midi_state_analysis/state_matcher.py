@@ -0,0 +1,125 @@
+"""
+Inkrementeller Matcher für State-Vokabulare beliebiger Größe.
+
+Statt bei jedem Event alle State-Definitionen zu prüfen, hält der Matcher einen
+invertierten Index Pitch -> States und pro State einen Zähler der aktuell gedrückten
+Töne. Ein Anschlag/Loslassen kostet damit nur so viele Schritte, wie States den Ton
+enthalten; ein State ist vollständig, sobald sein Zähler die Akkordgröße erreicht.
+
+Tie-Breaking bei mehreren vollständigen States (überlappende Akkorde):
+    1. der größte Akkord gewinnt (ein exakter Treffer ist immer der größte),
+    2. bei gleicher Größe die kleinste State-ID.
+Für das feste 9er-Vokabular aus config.STATE_DEFS entspricht das genau dem bisherigen
+Verhalten (exakter Treffer bzw. erster Subset-Treffer in ID-Reihenfolge).
+
+Toleranz-Modus (tolerance=k > 0): zusätzlich hält jeder State seine Tasten als Bitmaske
+(int, Bit = MIDI-Pitch). `near_miss` sucht zu einer Maske der gedrückten Tasten den State
+mit der kleinsten Hamming-Distanz popcount(maske ^ state_maske) <= k. Die Zähler führen
+dafür die Menge der States, denen höchstens k Tasten fehlen; nur diese werden geprüft.
+
+Kleine Vokabulare (bis SCAN_MAX_STATES, z.B. das feste 9er-Vokabular): Index und Zähler
+kosten pro Event mehr, als sie sparen (benchmarks/bench_state_matcher.py: ~0.7x bei 9
+States). Für sie setzt der Matcher `scan`; detect_states_from_notes prüft dann inline per
+frozenset-Lookup (`exact`) auf exakten Treffer und sonst die States in Tie-Breaking-
+Ordnung auf Teilmenge, ohne Methodenaufrufe pro Event.
+"""
+
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+# Bis zu dieser Vokabulargröße ist der Scan über alle States schneller als Index + Zähler
+SCAN_MAX_STATES = 32
+
+
+class StateMatcher:
+    __slots__ = (
+        "state_ids", "state_notes", "sizes", "masks", "tolerance", "scan", "exact", "index", "near_at",
+        "pressed", "counts", "complete", "near",
+    )
+
+    def __init__(self, state_defs: Dict[int, Iterable[int]], tolerance: int = 0):
+        if not state_defs:
+            raise ValueError("Mindestens eine State-Definition erforderlich.")
+        # Rang = Position in der Tie-Breaking-Ordnung; intern wird nur mit Rängen gearbeitet
+        ordered = sorted(state_defs.items(), key=lambda item: (-len(set(item[1])), item[0]))
+        self.state_ids: List[int] = [state for state, _ in ordered]
+        self.state_notes: List[frozenset] = [frozenset(notes) for _, notes in ordered]
+        self.sizes: List[int] = [len(notes) for notes in self.state_notes]
+        self.masks: List[int] = [sum(1 << note for note in notes) for notes in self.state_notes]
+        if not 0 <= tolerance < min(self.sizes):
+            raise ValueError(f"tolerance muss zwischen 0 und {min(self.sizes) - 1} liegen.")
+        self.tolerance = tolerance
+        self.scan = len(self.state_ids) <= SCAN_MAX_STATES
+        self.exact: Dict[frozenset, int] = {}
+        for rank, notes in enumerate(self.state_notes):
+            self.exact.setdefault(notes, rank)
+        self.index: Dict[int, List[int]] = {}
+        for rank, notes in enumerate(self.state_notes):
+            for note in notes:
+                self.index.setdefault(note, []).append(rank)
+        # Zählerstand, ab dem einem State höchstens tolerance Tasten fehlen
+        self.near_at: List[int] = [size - tolerance for size in self.sizes]
+        self.reset()
+
+    def reset(self) -> None:
+        """Setzt den Zustand zurück (vor jeder neuen Datei)."""
+        self.pressed: Set[int] = set()
+        self.counts: List[int] = [0] * len(self.state_ids)
+        self.complete: Set[int] = set()
+        self.near: Set[int] = set()
+
+    def press(self, note: int) -> None:
+        if note in self.pressed:
+            return
+        self.pressed.add(note)
+        counts, sizes, near_at, tolerance = self.counts, self.sizes, self.near_at, self.tolerance
+        for rank in self.index.get(note, ()):
+            counts[rank] += 1
+            if counts[rank] == sizes[rank]:
+                self.complete.add(rank)
+            if tolerance and counts[rank] == near_at[rank]:
+                self.near.add(rank)
+
+    def release(self, note: int) -> None:
+        if note not in self.pressed:
+            return
+        self.pressed.discard(note)
+        counts, sizes, near_at, tolerance = self.counts, self.sizes, self.near_at, self.tolerance
+        for rank in self.index.get(note, ()):
+            if counts[rank] == sizes[rank]:
+                self.complete.discard(rank)
+            if tolerance and counts[rank] == near_at[rank]:
+                self.near.discard(rank)
+            counts[rank] -= 1
+
+    def current(self) -> Tuple[Optional[int], List[int]]:
+        """
+        Liefert den aktuell gehaltenen State und die zusätzlich gedrückten Tasten.
+
+        Returns:
+            (state_id, extra_keys) bzw. (None, []) wenn kein State vollständig gedrückt ist
+        """
+        if not self.complete:
+            return None, []
+        rank = min(self.complete)
+        if self.sizes[rank] == len(self.pressed):
+            return self.state_ids[rank], []
+        return self.state_ids[rank], list(self.pressed - self.state_notes[rank])
+
+    def near_miss(self, mask: int) -> Tuple[Optional[int], int]:
+        """
+        Nächster State innerhalb der Toleranz zur Tastenmaske mask (Bit = gedrückter Pitch).
+
+        Gleiche Distanz: Tie-Breaking wie bei vollständigen States (größter Akkord,
+        kleinste ID).
+
+        Returns:
+            (Rang, Hamming-Distanz) bzw. (None, 0), wenn kein State nah genug ist
+        """
+        best, best_distance = None, self.tolerance + 1
+        masks = self.masks
+        # Kandidaten in Rang-Reihenfolge, damit bei gleicher Distanz der erste gewinnt
+        for rank in sorted(self.near):
+            distance = (mask ^ masks[rank]).bit_count()
+            if distance < best_distance:
+                best, best_distance = rank, distance
+        return (best, best_distance) if best is not None else (None, 0)
@@ -1,37 +1,20 @@
+import argparse
 import os
 import pandas as pd
 import numpy as np
 from scipy.stats import t, shapiro
 
-from midi_state_analysis.folder_utils import find_midi_data_folder
-
-
-def locate_transition_csv(explicit_path: str | None = None) -> str:
-    """Locate the CSV produced by midi_state_analysis (MIDI_ANALYSIS_STATES.csv)."""
-    candidates = []
-    if explicit_path:
-        candidates.append(explicit_path)
-
-    midi_folder = find_midi_data_folder(start_path='.')
-    if midi_folder:
-        candidates.append(os.path.join(os.path.dirname(midi_folder), "MIDI_ANALYSIS_STATES.csv"))
-
-    candidates.append(os.path.join(os.getcwd(), "MIDI_ANALYSIS_STATES.csv"))
-
-    for path in candidates:
-        if path and os.path.isfile(path):
-            return path
-
-    raise FileNotFoundError("Keine CSV-Datei mit Transitionen gefunden. Führe zuerst midi-analysis aus.")
-
-
-def classify_block(block: str) -> str:
-    b = str(block).lower()
-    if "pre" in b or "post" in b or "test" in b:
-        return "Test"
-    if b.startswith("b"):
-        return "Training"
-    return "Unbekannt"
+from midi_state_analysis.transition_data import (
+    locate_transition_csv,
+    classify_block,
+    prepare_dataframe,
+    load_transitions,
+)
+from midi_state_analysis.outliers import OUTLIER_METHODS, remove_outliers, outlier_summary
+from midi_state_analysis.quantile_sketch import TransitionSketches, sketch_path_for
+from midi_state_analysis.result_store import ResultStore, is_result_db
+from midi_state_analysis.markov import TransitionMatrices, markov_summary
+from midi_state_analysis.sampling import add_sample_arguments, report_estimates, sample_table
 
 
 def ci_bounds(series: pd.Series, confidence: float = 0.95) -> tuple[float, float]:
@@ -47,7 +30,7 @@ def ci_bounds(series: pd.Series, confidence: float = 0.95) -> tuple[float, float
 
 def summarize_transition_times(df: pd.DataFrame, group_cols: list[str]) -> pd.DataFrame:
     rows = []
-    for keys, group in df.groupby(group_cols):
+    for keys, group in df.groupby(group_cols, observed=True):
         series = group["transition_time_s"].dropna()
         ci_low, ci_up = ci_bounds(series)
         keys_tuple = keys if isinstance(keys, tuple) else (keys,)
@@ -66,9 +49,20 @@ def summarize_transition_times(df: pd.DataFrame, group_cols: list[str]) -> pd.Da
     return pd.DataFrame(rows).sort_values(group_cols)
 
 
+def summarize_from_store(store: ResultStore, group_cols: list[str], confidence: float = 0.95) -> pd.DataFrame:
+    """Same table as summarize_transition_times, aggregated inside SQLite."""
+    table = store.aggregate(group_cols)
+    n = table["n"].astype(float)
+    with np.errstate(invalid="ignore"):
+        delta = t.ppf(1 - (1 - confidence) / 2, n - 1) * table["std_s"] / np.sqrt(n)
+    table["ci_lower_s"] = (table["mean_s"] - delta).where(n >= 2)
+    table["ci_upper_s"] = (table["mean_s"] + delta).where(n >= 2)
+    return table
+
+
 def normality_by_transition(df: pd.DataFrame) -> pd.DataFrame:
     rows = []
-    for tid, group in df.groupby("transition_id"):
+    for tid, group in df.groupby("transition_id", observed=True):
         series = group["transition_time_s"].dropna()
         if len(series) < 3:
             w_stat, p_val = (np.nan, np.nan)
@@ -84,6 +78,48 @@ def normality_by_transition(df: pd.DataFrame) -> pd.DataFrame:
     return pd.DataFrame(rows).sort_values("transition_id")
 
 
+def load_sketches(csv_path: str) -> TransitionSketches | None:
+    """Sketches saved next to the CSV/database by the analysis run (None if missing)."""
+    path = sketch_path_for(csv_path)
+    return TransitionSketches.load(path) if os.path.isfile(path) else None
+
+
+MARKOV_INPUT = ["subject", "block", "state_from", "state_to", "transition_time_s"]
+MARKOV_COLUMNS = ["n_transitions", "entropy_rate_bits", "mean_time_s", "tv_distance", "completeness"]
+
+
+def markov_by_block(df: pd.DataFrame) -> pd.DataFrame:
+    """Markov statistics per subject x block, averaged over subjects."""
+    summary = markov_summary(TransitionMatrices.from_frame(df))
+    return summary.groupby("block", sort=False)[MARKOV_COLUMNS].mean().reset_index()
+
+
+DWELL_INPUT = ["subject", "block", "state_from", "dwell_from_s", "gap_s"]
+
+
+def summarize_dwell(df: pd.DataFrame, group_cols: list[str]) -> pd.DataFrame:
+    """
+    Dwell and gap times per group (columns from a --features run).
+
+    occupancy is pooled: total dwell / (total dwell + total gap) of the group. With
+    group_cols = ["subject", "block", "state_from"] this is the per-file table per state.
+    """
+    data = df.dropna(subset=["dwell_from_s", "gap_s"])
+    grouped = data.groupby(group_cols, observed=True)
+    table = grouped.agg(
+        n=("dwell_from_s", "size"),
+        dwell_mean_s=("dwell_from_s", "mean"),
+        dwell_median_s=("dwell_from_s", "median"),
+        gap_mean_s=("gap_s", "mean"),
+        gap_median_s=("gap_s", "median"),
+        dwell_total_s=("dwell_from_s", "sum"),
+        gap_total_s=("gap_s", "sum"),
+    )
+    total = table["dwell_total_s"] + table["gap_total_s"]
+    table["occupancy"] = (table["dwell_total_s"] / total).where(total > 0)
+    return table.drop(columns=["dwell_total_s", "gap_total_s"]).reset_index()
+
+
 def print_section(title: str, df: pd.DataFrame) -> None:
     print(f"\n=== {title} ===")
     if df.empty:
@@ -92,38 +128,99 @@ def print_section(title: str, df: pd.DataFrame) -> None:
     print(df.to_string(index=False))
 
 
-def prepare_dataframe(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.copy()
-    df["block_type"] = df["block"].apply(classify_block)
-    df["transition_time_s"] = pd.to_numeric(df["transition_time_s"], errors="coerce")
-    return df.dropna(subset=["transition_time_s"])
+def run(
+    df: pd.DataFrame,
+    outliers: str | None = None,
+    store: ResultStore | None = None,
+    sketches: TransitionSketches | None = None,
+) -> None:
+    """
+    Print all summary sections for an already prepared transition table.
+
+    store: SQLite result store to aggregate in SQL instead of pandas (df may then hold
+    only transition_id and transition_time_s). sketches: quantile sketches for the
+    percentile sections; skipped when outliers are removed, since the sketches were
+    built from the raw table.
+    """
+    if outliers:
+        # Ausreißer je Subject × Block × Transition entfernen ("grubbs", "iqr" oder "mad")
+        clean, audit = remove_outliers(df, method=outliers)
+        print_section(f"Entfernte Ausreißer ({outliers}, je Subject × Block × Transition)", outlier_summary(audit, df))
+        df = clean
+        sketches = None
+
+    def summarize(group_cols: list[str]) -> pd.DataFrame:
+        if store is not None:
+            return summarize_from_store(store, group_cols)
+        return summarize_transition_times(df, group_cols)
+
+    overall = summarize(["transition_id"])
+    by_block_type = summarize(["block_type", "transition_id"])
+    by_block = summarize(["block", "transition_id"])
+    by_freq = summarize(["state_from_freq", "transition_id"])
+    normality = normality_by_transition(df)
 
+    print_section("Übersicht je Übergangscode", overall)
+    print_section("Übersicht je Block-Typ (Test/Training)", by_block_type)
+    print_section("Übersicht je Block", by_block)
+    print_section("Übersicht je Frequenz (h/s)", by_freq)
+    print_section("Normalitätscheck (Shapiro)", normality)
 
-def main(csv_path: str | None = None) -> None:
+    markov_input = store.query(MARKOV_INPUT) if store is not None else df
+    if set(MARKOV_INPUT) <= set(markov_input.columns):
+        print_section("Markov-Kennzahlen je Block (Mittel über Subjects)", markov_by_block(markov_input))
+
+    if store is not None:
+        dwell_input = store.query(DWELL_INPUT) if set(DWELL_INPUT) <= set(store.columns) else pd.DataFrame()
+    else:
+        dwell_input = df
+    if set(DWELL_INPUT) <= set(dwell_input.columns):
+        print_section("Verweildauer und Lücken je Block × State", summarize_dwell(dwell_input, ["block", "state_from"]))
+
+    if sketches is not None:
+        for group_cols, label in ((["transition_id"], "Übergangscode"), (["state_from_freq", "transition_id"], "Frequenz (h/s)")):
+            print_section(f"Perzentile je {label} (Sketch)", sketches.summary(group_cols))
+
+
+def main(
+    csv_path: str | None = None,
+    outliers: str | None = None,
+    sample: float | None = None,
+    sample_seed: int = 0,
+) -> None:
+    # sample: analyze only a stratified subset of subject × block cells (see sampling)
     path = locate_transition_csv(csv_path)
     print(f"✓ Lade Transitionen aus: {path}")
-    df = pd.read_csv(path)
+    store = ResultStore(path) if is_result_db(path) and not outliers and sample is None else None
+    if store is not None:
+        # SQLite: Kennzahlen in SQL, für Shapiro nur die beiden benötigten Spalten laden
+        df = store.query(["transition_id", "transition_time_s"])
+    else:
+        df = load_transitions(path)
     if df.empty:
         print("CSV ist leer.")
         return
+    if sample is not None:
+        plan, df = sample_table(df, sample, sample_seed)
+        print(f"✓ {plan.describe()}")
+        report_estimates(df, plan)
+        run(df, outliers=outliers)
+        return
+    run(df, outliers=outliers, store=store, sketches=load_sketches(path))
 
-    df = prepare_dataframe(df)
-
-    overall = summarize_transition_times(df, ["transition_id"])
-    by_block_type = summarize_transition_times(df, ["block_type", "transition_id"])
-    by_block = summarize_transition_times(df, ["block", "transition_id"])
-    by_freq = summarize_transition_times(df, ["state_from_freq", "transition_id"])
-    normality = normality_by_transition(df)
 
-    print_section("Übersicht je Übergangscode", overall)
-    print_section("Übersicht je Block-Typ (Test/Training)", by_block_type)
-    print_section("Übersicht je Block", by_block)
-    print_section("Übersicht je Frequenz (h/s)", by_freq)
-    print_section("Normalitätscheck (Shapiro)", normality)
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Deskriptive Statistik der Übergangszeiten.")
+    parser.add_argument("csv_path", nargs="?",
+                        help="Transitionstabelle (CSV oder SQLite); Default: automatisch suchen")
+    parser.add_argument("--outliers", choices=OUTLIER_METHODS,
+                        help="Ausreißer je Subject × Block × Transition vorher entfernen")
+    add_sample_arguments(parser)
+    return parser.parse_args(argv)
 
 
 if __name__ == "__main__":
-    main()
+    main(**vars(parse_args()))
 
 
 
@@ -0,0 +1,165 @@
+"""
+Gemeinsamer, typisierter Loader für die Transitionstabelle (MIDI_ANALYSIS_STATES.csv).
+
+Alle Analyse-Skripte (statistical_analysis, anova_Transition, graph_learningcurve) laden
+die Tabelle hierüber. Die CSV wird mit festem Schema gelesen (kategoriale Labels, kleine
+Integer-Typen), block_type wird einmal pro Kategorie statt pro Zeile bestimmt, und das
+Ergebnis wird pro Prozess nach (Pfad, mtime, Größe) gecacht: mehrere Analysen in einer
+Session parsen die Datei nur einmal.
+"""
+
+import os
+from typing import Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .folder_utils import find_midi_data_folder
+from .result_store import ResultStore, is_result_db
+
+try:
+    import pyarrow  # noqa: F401  (nur für den schnelleren CSV-Parser)
+    CSV_ENGINE = "pyarrow"
+except ImportError:
+    CSV_ENGINE = "c"
+
+TRANSITION_CSV_NAME = "MIDI_ANALYSIS_STATES.csv"
+
+TRANSITION_SCHEMA: Dict[str, str] = {
+    "idx_from": "int32",
+    "state_from": "int8",
+    "onset_from_s": "float64",
+    "idx_to": "int32",
+    "state_to": "int8",
+    "onset_to_s": "float64",
+    "transition_time_s": "float64",
+    "transition_id": "int16",
+    "state_from_freq": "category",
+    "subject": "category",
+    "block": "category",
+    # Motorik-Spalten (nur bei Läufen mit --features)
+    "onset_asynchrony_s": "float64",
+    "mean_velocity": "float64",
+    "overlap_s": "float64",
+    "release_to_press_s": "float64",
+    "dwell_from_s": "float64",
+    "gap_s": "float64",
+    "occupancy": "float64",
+    # Toleranz-Spalten (nur bei Läufen mit --tolerance)
+    "n_missing_keys_to": "int8",
+    "n_extra_keys_to": "int8",
+}
+
+_CACHE: Dict[str, Tuple[Tuple[int, int], pd.DataFrame]] = {}
+
+
+def locate_transition_csv(explicit_path: str | None = None) -> str:
+    """
+    Locate the CSV produced by midi_state_analysis (MIDI_ANALYSIS_STATES.csv).
+
+    An explicit path is used as is: if it does not exist, FileNotFoundError is raised
+    instead of silently falling back to another table.
+    """
+    if explicit_path:
+        if not os.path.isfile(explicit_path):
+            raise FileNotFoundError(f"Transitionstabelle nicht gefunden: {explicit_path}")
+        return explicit_path
+
+    candidates = []
+    midi_folder = find_midi_data_folder(start_path='.')
+    if midi_folder:
+        candidates.append(os.path.join(os.path.dirname(midi_folder), TRANSITION_CSV_NAME))
+
+    candidates.append(os.path.join(os.getcwd(), TRANSITION_CSV_NAME))
+
+    for path in candidates:
+        if path and os.path.isfile(path):
+            return path
+
+    raise FileNotFoundError("Keine CSV-Datei mit Transitionen gefunden. Führe zuerst midi-analysis aus.")
+
+
+def classify_block(block: str) -> str:
+    b = str(block).lower()
+    if "pre" in b or "post" in b or "test" in b:
+        return "Test"
+    if b.startswith("b"):
+        return "Training"
+    return "Unbekannt"
+
+
+def classify_blocks(blocks: pd.Series) -> pd.Series:
+    """Vektorisierte Variante von classify_block: wertet jede Block-Kategorie nur einmal aus."""
+    blocks = blocks.astype("category")
+    labels = np.array([classify_block(b) for b in blocks.cat.categories] + ["Unbekannt"], dtype=object)
+    codes = blocks.cat.codes.to_numpy()
+    block_types = pd.Categorical(labels[codes], categories=["Test", "Training", "Unbekannt"])
+    return pd.Series(block_types.remove_unused_categories(), index=blocks.index, name="block_type")
+
+
+def apply_schema(df: pd.DataFrame) -> pd.DataFrame:
+    """Bringt eine Transitionstabelle auf TRANSITION_SCHEMA (fehlerhafte Zahlen werden NaN)."""
+    df = df.copy()
+    for col, dtype in TRANSITION_SCHEMA.items():
+        if col not in df.columns or df[col].dtype == dtype:
+            continue
+        if dtype == "category":
+            df[col] = df[col].astype("category")
+            continue
+        values = pd.to_numeric(df[col], errors="coerce")
+        if dtype.startswith("int"):
+            if values.isna().any():
+                continue
+            info = np.iinfo(dtype)
+            if values.min() < info.min or values.max() > info.max:
+                continue
+        df[col] = values.astype(dtype)
+    return df
+
+
+def prepare_dataframe(df: pd.DataFrame) -> pd.DataFrame:
+    """Schema anwenden, block_type ergänzen und Zeilen ohne Übergangszeit verwerfen."""
+    df = apply_schema(df)
+    df["block_type"] = classify_blocks(df["block"])
+    if "state_from_freq" not in df.columns:
+        df["state_from_freq"] = pd.Categorical(["UNKNOWN"] * len(df))
+    return df.dropna(subset=["transition_time_s"]).reset_index(drop=True)
+
+
+def _read_csv(path: str) -> pd.DataFrame:
+    header = pd.read_csv(path, nrows=0, encoding="utf-8-sig").columns
+    dtypes = {col: dtype for col, dtype in TRANSITION_SCHEMA.items() if col in header}
+    try:
+        return pd.read_csv(path, dtype=dtypes, engine=CSV_ENGINE, encoding="utf-8-sig")
+    except (ValueError, TypeError, OverflowError):
+        # Unsaubere Werte (leere Zellen, Text in Zahlenspalten): ohne Schema lesen, danach konvertieren
+        return pd.read_csv(path, encoding="utf-8-sig")
+
+
+def load_transitions(path: str | None = None) -> pd.DataFrame:
+    """
+    Lädt und bereitet die Transitionstabelle auf (gecacht nach Pfad, mtime und Größe).
+
+    Args:
+        path: Pfad zur CSV oder SQLite-Datenbank (.sqlite/.sqlite3/.db); ohne Angabe wird
+              wie bisher nach MIDI_ANALYSIS_STATES.csv gesucht
+
+    Returns:
+        Typisierter DataFrame inkl. block_type. Es wird eine flache Kopie des gecachten
+        Ergebnisses zurückgegeben; neue Spalten berühren den Cache nicht.
+    """
+    path = os.path.abspath(locate_transition_csv(path))
+    stat = os.stat(path)
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    cached = _CACHE.get(path)
+    if cached is None or cached[0] != stamp:
+        df = ResultStore(path).query() if is_result_db(path) else _read_csv(path)
+        if not df.empty and "block" in df.columns and "transition_time_s" in df.columns:
+            df = prepare_dataframe(df)
+        _CACHE[path] = (stamp, df)
+        cached = _CACHE[path]
+    return cached[1].copy(deep=False)
+
+
+def clear_transition_cache() -> None:
+    _CACHE.clear()
@@ -1,5 +1,7 @@
 from typing import List, Tuple, Dict
+import numpy as np
 import pandas as pd
+from .events import StateEvents, TransitionTable
 
 def choose_freq_pattern(block: str, n_events: int) -> str:
     b = block.lower()
@@ -27,22 +29,78 @@ def compute_transition_id(state_from: int, state_to: int) -> int:
     """
     return int(f"{state_from}{state_to}")
 
-def compute_transitions(events: pd.DataFrame) -> pd.DataFrame:
-    if events.empty:
-        return pd.DataFrame()
-    transitions = []
-    for i in range(len(events) - 1):
-        t1, s1 = events.iloc[i]["time_s"], events.iloc[i]["state"]
-        t2, s2 = events.iloc[i + 1]["time_s"], events.iloc[i + 1]["state"]
-        transition_id = compute_transition_id(s1, s2)
-        transitions.append({
-            "idx_from": i,
-            "state_from": s1,
-            "onset_from_s": t1,
-            "idx_to": i + 1,
-            "state_to": s2,
-            "onset_to_s": t2,
-            "transition_time_s": t2 - t1,
-            "transition_id": transition_id,
-        })
-    return pd.DataFrame(transitions)
+def compute_transition_ids(state_from: np.ndarray, state_to: np.ndarray) -> np.ndarray:
+    """Vektorisierte Variante von compute_transition_id (Ziffern aneinanderhängen)."""
+    state_from = np.asarray(state_from, dtype=np.int64)
+    state_to = np.asarray(state_to, dtype=np.int64)
+    scale = np.full(state_to.shape, 10, dtype=np.int64)
+    rest = state_to // 10
+    while rest.any():
+        scale[rest > 0] *= 10
+        rest //= 10
+    return state_from * scale + state_to
+
+def compute_transitions(events: StateEvents | pd.DataFrame) -> TransitionTable:
+    """
+    Bildet Transitionen zwischen aufeinanderfolgenden State-Events (ohne Schleife pro Zeile).
+
+    Returns:
+        TransitionTable mit idx_from, state_from, onset_from_s, idx_to, state_to,
+        onset_to_s, transition_time_s und transition_id; bei Events aus dem Feature-Modus
+        zusätzlich die Spalten aus `transition_features`, aus dem Toleranz-Modus
+        n_missing_keys_to und n_extra_keys_to (fehlende/zusätzliche Tasten des Ziel-Akkords)
+    """
+    if isinstance(events, pd.DataFrame):
+        events = StateEvents.from_frame(events)
+    if len(events) < 2:
+        return TransitionTable()
+    times = events.time_s
+    states = events.state.astype(np.int64)
+    idx = np.arange(len(events), dtype=np.int64)
+    table = TransitionTable({
+        "idx_from": idx[:-1],
+        "state_from": states[:-1],
+        "onset_from_s": times[:-1],
+        "idx_to": idx[1:],
+        "state_to": states[1:],
+        "onset_to_s": times[1:],
+        "transition_time_s": times[1:] - times[:-1],
+        "transition_id": compute_transition_ids(states[:-1], states[1:]),
+    })
+    if events.features:
+        table.columns.update(transition_features(events.features))
+    if events.missing_offsets is not None:
+        table["n_missing_keys_to"] = np.diff(events.missing_offsets)[1:].astype(np.int8)
+        table["n_extra_keys_to"] = np.diff(events.extra_offsets)[1:].astype(np.int8)
+    return table
+
+def transition_features(features: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """
+    Motorik-Merkmale je Transition aus den Event-Merkmalen der Feature-Erkennung.
+
+    onset_asynchrony_s: Aufbauzeit des Ziel-Akkords (erste Taste bis vollständig)
+    mean_velocity:      mittlere Velocity des Ziel-Akkords
+    overlap_s:          letzte Taste des Start-Akkords losgelassen minus erste Taste des
+                        Ziel-Akkords gedrückt (> 0 legato überlappend, < 0 Pause)
+    release_to_press_s: erste Taste des Start-Akkords losgelassen bis erste Taste des
+                        Ziel-Akkords gedrückt
+    dwell_from_s:       Haltezeit des Start-States innerhalb der Transition
+    gap_s:              gesamte Zeit ohne gültigen Akkord innerhalb der Transition (Summe
+                        aller Lücken; dwell_from_s + gap_s = transition_time_s)
+    occupancy:          dwell_from_s / (dwell_from_s + gap_s), Anteil der Transition mit
+                        gehaltenem Start-State (NaN bei Dauer 0)
+    """
+    first_onset = features["first_onset_s"]
+    columns = {
+        "onset_asynchrony_s": features["onset_asynchrony_s"][1:],
+        "mean_velocity": features["mean_velocity"][1:],
+        "overlap_s": features["release_last_s"][:-1] - first_onset[1:],
+        "release_to_press_s": first_onset[1:] - features["release_first_s"][:-1],
+    }
+    if "dwell_s" in features:
+        dwell, gap = features["dwell_s"][:-1], features["gap_s"][:-1]
+        total = dwell + gap
+        with np.errstate(divide="ignore", invalid="ignore"):
+            occupancy = np.where(total > 0, dwell / total, np.nan)
+        columns.update({"dwell_from_s": dwell, "gap_s": gap, "occupancy": occupancy})
+    return columns
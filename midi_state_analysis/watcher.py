@@ -0,0 +1,270 @@
+"""
+Watch-Modus: analysiert neue MIDI-Dateien, sobald sie fertig geschrieben sind.
+
+Unter Linux wird inotify genutzt (optionales Paket `inotify_simple`, Event IN_CLOSE_WRITE
+bzw. IN_MOVED_TO), sonst ein Polling-Fallback, der nur Verzeichnisse per os.scandir
+abfragt und eine Datei erst verarbeitet, wenn Größe und mtime für `settle_time` stabil sind.
+Jede neue Datei läuft durch dieselbe Pipeline wie `analyze_root_folder`; ihre Zeilen werden
+per O_APPEND an die Ergebnis-CSV angehängt, die Sketch-Datei wird per os.replace atomar
+ersetzt.
+
+Nur Anhängen: Zeilen einer Datei werden nie ersetzt. Wird eine bereits ausgewertete Datei
+(aus dem Lauf vor dem Beobachten oder schon angehängt) neu geschrieben, wird sie mit einer
+Warnung übersprungen statt doppelt angehängt; für die neuen Werte den normalen Lauf
+wiederholen.
+"""
+
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+import pandas as pd
+
+from .analyzer import analyze_midi_file
+from .quantile_sketch import TransitionSketches, sketch_path_for
+from .state_detection import make_matcher
+
+try:
+    from inotify_simple import INotify, flags as inotify_flags
+except ImportError:
+    INotify = None
+
+MIDI_SUFFIXES = (".mid", ".midi")
+
+
+def _is_midi(name: str) -> bool:
+    return name.lower().endswith(MIDI_SUFFIXES)
+
+
+def scan_midi_files(root_folder: str) -> Dict[str, Tuple[int, int]]:
+    """(size, mtime_ns) aller MIDI-Dateien unter root_folder."""
+    found = {}
+    stack = [root_folder]
+    while stack:
+        folder = stack.pop()
+        try:
+            entries = list(os.scandir(folder))
+        except OSError:
+            continue
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                stack.append(entry.path)
+            elif _is_midi(entry.name):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                found[entry.path] = (stat.st_size, stat.st_mtime_ns)
+    return found
+
+
+def append_rows(df: pd.DataFrame, output_csv: str) -> None:
+    """
+    Hängt Zeilen per O_APPEND an die CSV an (ein write()-Aufruf, bei kurzen Writes fortgesetzt).
+
+    Mit O_APPEND landet der Block am Dateiende, auch wenn andere Prozesse anhängen. Die
+    Spaltenreihenfolge folgt dem vorhandenen Header; eine neue Datei bekommt Header + BOM.
+
+    Raises:
+        OSError: wenn nicht der ganze Block geschrieben werden kann
+    """
+    exists = os.path.isfile(output_csv) and os.path.getsize(output_csv) > 0
+    if exists:
+        header = pd.read_csv(output_csv, nrows=0, encoding="utf-8-sig").columns
+        df = df.reindex(columns=header)
+        payload = df.to_csv(index=False, header=False).encode("utf-8")
+    else:
+        payload = df.to_csv(index=False).encode("utf-8-sig")
+    fd = os.open(output_csv, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        view = memoryview(payload)
+        while view:
+            written = os.write(fd, view)
+            if written <= 0:
+                raise OSError(f"Schreiben nach {output_csv} fehlgeschlagen ({len(view)} Bytes offen)")
+            view = view[written:]
+    finally:
+        os.close(fd)
+
+
+def _update_sketches(df: pd.DataFrame, output_csv: str) -> None:
+    path = sketch_path_for(output_csv)
+    sketches = TransitionSketches.load(path) if os.path.isfile(path) else TransitionSketches()
+    sketches.update_from_frame(df)
+    tmp = path + ".tmp"
+    sketches.save(tmp)
+    os.replace(tmp, path)
+
+
+def _inotify_events(
+    root_folder: str,
+    stop: threading.Event,
+    known: Dict[str, Tuple[int, int]],
+    timeout_ms: int,
+    settle_time: float,
+) -> Iterator[str]:
+    """
+    Liefert Pfade fertig geschriebener MIDI-Dateien per inotify (inkl. neuer Unterordner).
+
+    Dateien, die sich seit known geändert haben (z.B. während des Initiallaufs entstanden),
+    werden nach dem Anlegen der Watches wie beim Polling nachgeholt.
+    """
+    inotify = INotify()
+    mask = inotify_flags.CLOSE_WRITE | inotify_flags.MOVED_TO | inotify_flags.CREATE
+    watches: Dict[int, str] = {}
+    # Dateien, die in einem neuen Ordner vor dessen add_watch entstanden sind:
+    # wie beim Polling erst nach settle_time ohne Änderung verarbeiten
+    pending: Dict[str, Tuple[Tuple[int, int], float]] = {}
+
+    def add_tree(folder: str) -> None:
+        for dirpath, _, _ in os.walk(folder):
+            watches[inotify.add_watch(dirpath, mask)] = dirpath
+
+    add_tree(root_folder)
+    now = time.monotonic()
+    for path, stamp in scan_midi_files(root_folder).items():
+        if known.get(path) != stamp:
+            pending[path] = (stamp, now)
+    try:
+        while not stop.is_set():
+            for event in inotify.read(timeout=timeout_ms):
+                folder = watches.get(event.wd)
+                if folder is None or not event.name:
+                    continue
+                path = os.path.join(folder, event.name)
+                if event.mask & inotify_flags.ISDIR:
+                    if event.mask & (inotify_flags.CREATE | inotify_flags.MOVED_TO):
+                        add_tree(path)
+                        now = time.monotonic()
+                        for existing, stamp in scan_midi_files(path).items():
+                            pending[existing] = (stamp, now)
+                elif _is_midi(event.name) and event.mask & (inotify_flags.CLOSE_WRITE | inotify_flags.MOVED_TO):
+                    pending.pop(path, None)
+                    yield path
+            now = time.monotonic()
+            for path, (stamp, since) in list(pending.items()):
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    del pending[path]
+                    continue
+                current = (stat.st_size, stat.st_mtime_ns)
+                if current != stamp:
+                    pending[path] = (current, now)
+                elif now - since >= settle_time:
+                    del pending[path]
+                    yield path
+            yield ""  # Heartbeat, damit der Aufrufer stop prüfen kann
+    finally:
+        inotify.close()
+
+
+def _polling_events(
+    root_folder: str,
+    stop: threading.Event,
+    known: Dict[str, Tuple[int, int]],
+    poll_interval: float,
+    settle_time: float,
+) -> Iterator[str]:
+    """Polling-Fallback: eine Datei gilt als fertig, wenn size/mtime settle_time lang stabil sind."""
+    pending: Dict[str, Tuple[Tuple[int, int], float]] = {}
+    while not stop.is_set():
+        now = time.monotonic()
+        for path, stamp in scan_midi_files(root_folder).items():
+            if known.get(path) == stamp:
+                continue
+            previous = pending.get(path)
+            if previous is None or previous[0] != stamp:
+                pending[path] = (stamp, now)
+            elif now - previous[1] >= settle_time:
+                del pending[path]
+                known[path] = stamp
+                yield path
+        yield ""
+        stop.wait(poll_interval)
+
+
+def watch_folder(
+    root_folder: str,
+    output_csv: str,
+    state_defs: dict | None = None,
+    poll_interval: float = 0.2,
+    settle_time: float = 0.3,
+    use_inotify: bool | None = None,
+    stop: Optional[threading.Event] = None,
+    on_file: Optional[Callable[[str, int], None]] = None,
+    features: bool = False,
+    tolerance: int = 0,
+    known: Optional[Dict[str, Tuple[int, int]]] = None,
+) -> None:
+    """
+    Beobachtet root_folder und hängt die Transitionen jeder neuen MIDI-Datei an output_csv an.
+
+    Dateien aus known (Default: alle beim Start vorhandenen) gelten als analysiert, dafür
+    gibt es den normalen Lauf. Läuft bis Strg+C oder bis `stop` gesetzt wird.
+
+    Args:
+        root_folder: Ordner "Daten (MIDI)"
+        output_csv: Ergebnis-CSV, an die angehängt wird
+        state_defs: Optionales State-Vokabular (wie in analyze_root_folder)
+        poll_interval: Abfrageintervall des Polling-Fallbacks in Sekunden
+        settle_time: Wie lange eine Datei beim Polling unverändert sein muss
+        use_inotify: None = automatisch, False = immer Polling
+        stop: Event zum Beenden (z.B. aus Tests oder einem anderen Thread)
+        on_file: Callback (Pfad, Anzahl angehängter Zeilen) nach jeder Datei
+        features: Motorik-Spalten mitberechnen (wie beim Lauf, der die CSV erzeugt hat)
+        tolerance: Hamming-Toleranz der State-Erkennung (ebenfalls wie beim Lauf)
+        known: scan_midi_files() von vor dem normalen Lauf; Dateien, die währenddessen
+            hinzukamen, werden dann beim Start nachgeholt
+    """
+    stop = stop or threading.Event()
+    matcher = make_matcher(state_defs, tolerance)
+    known = dict(known) if known is not None else scan_midi_files(root_folder)
+    # Bereits in der CSV: Stand vor dem Lauf bzw. in dieser Sitzung angehängt
+    processed: Dict[str, Tuple[int, int]] = dict(known)
+    if use_inotify is None:
+        use_inotify = INotify is not None
+    if use_inotify:
+        source = _inotify_events(root_folder, stop, known, int(poll_interval * 1000), settle_time)
+        print(f"✓ Beobachte (inotify): {root_folder}")
+    else:
+        source = _polling_events(root_folder, stop, known, poll_interval, settle_time)
+        print(f"✓ Beobachte (Polling alle {poll_interval:.2f}s): {root_folder}")
+
+    try:
+        for path in source:
+            if stop.is_set():
+                break
+            if not path:
+                continue
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            stamp = (stat.st_size, stat.st_mtime_ns)
+            previous = processed.get(path)
+            if previous == stamp:
+                continue
+            processed[path] = stamp
+            if previous is not None:
+                print(f"⚠ {os.path.relpath(path, root_folder)} wurde neu geschrieben; nicht erneut angehängt "
+                      "(Watch-Modus hängt nur an, für neue Werte den normalen Lauf wiederholen)")
+                continue
+            try:
+                df = analyze_midi_file(path, matcher, features)
+            except Exception as e:
+                print(f"⚠ Fehler beim Verarbeiten von {os.path.basename(path)}: {e}")
+                continue
+            n_rows = 0 if df is None else len(df)
+            if n_rows:
+                append_rows(df, output_csv)
+                _update_sketches(df, output_csv)
+            print(f"✓ {os.path.relpath(path, root_folder)}: {n_rows} Transitionen angehängt")
+            if on_file is not None:
+                on_file(path, n_rows)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        source.close()
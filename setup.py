@@ -4,7 +4,8 @@ setup(
     name="midi_state_analysis",
     version="1.0.0",
     packages=find_packages(),
-    install_requires=["mido", "pandas", "pretty_midi", "scipy", "statsmodels", "seaborn", "matplotlib"],
+    install_requires=["mido", "numpy", "pandas", "pretty_midi", "scipy", "statsmodels", "seaborn", "matplotlib"],
+    extras_require={"watch": ["inotify_simple"]},
     entry_points={"console_scripts": ["midi-analysis=midi_state_analysis.cli:main"]},
     author="Your Name",
     description="Analyse von State-Transitionen in Klavier-MIDI-Daten",
@@ -0,0 +1,67 @@
+"""Gemeinsame Helfer der Regressionstests: kleine synthetische MIDI-Dateien mit mido."""
+
+import os
+
+import mido
+import pytest
+
+from midi_state_analysis.config import STATE_DEFS
+
+TICKS_PER_BEAT = 480
+TICKS_PER_S = 960  # 480 Ticks je Viertel bei 120 BPM
+
+
+def write_midi(path, notes):
+    """
+    Schreibt eine MIDI-Datei mit Tempo-Spur und einer Notenspur.
+
+    Args:
+        path: Zieldatei (Ordner werden angelegt)
+        notes: Iterable (pitch, on_s, off_s, velocity)
+    """
+    events = []
+    for pitch, on_s, off_s, velocity in notes:
+        events.append((round(on_s * TICKS_PER_S), 1, pitch, velocity))
+        events.append((round(off_s * TICKS_PER_S), 0, pitch, 0))
+    mid = mido.MidiFile(ticks_per_beat=TICKS_PER_BEAT)
+    meta = mido.MidiTrack([mido.MetaMessage("set_tempo", tempo=500000)])
+    track = mido.MidiTrack()
+    mid.tracks.extend([meta, track])
+    last = 0
+    # Bei gleichem Tick zuerst loslassen, dann anschlagen
+    for tick, on, pitch, velocity in sorted(events, key=lambda e: (e[0], e[1])):
+        kind = "note_on" if on else "note_off"
+        track.append(mido.Message(kind, note=pitch, velocity=velocity, time=tick - last))
+        last = tick
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    mid.save(path)
+
+
+def chord_notes(states, start=1.0, hold=0.5, gap=0.25, stagger=0.0, velocity=80):
+    """(pitch, on_s, off_s, velocity) für eine Folge von State-Akkorden, Anschläge um stagger versetzt."""
+    notes = []
+    t = start
+    for state in states:
+        pitches = sorted(STATE_DEFS[state])
+        for i, pitch in enumerate(pitches):
+            notes.append((pitch, t + i * stagger, t + hold, velocity))
+        t += hold + gap
+    return notes
+
+
+SEQUENCES = {
+    "S01": [1, 2, 3, 4, 5],
+    "S02": [2, 3, 1, 6, 7, 8],
+    "S03": [9, 8, 7, 6],
+}
+
+
+@pytest.fixture
+def midi_root(tmp_path):
+    """tmp/Daten (MIDI)/<Subject>/MIDI_<Subject>_<Block>.mid für drei Subjects und zwei Blöcke."""
+    root = tmp_path / "Daten (MIDI)"
+    for subject, states in SEQUENCES.items():
+        for k, block in enumerate(["B1", "B2"]):
+            path = root / subject / f"MIDI_{subject}_{block}.mid"
+            write_midi(str(path), chord_notes(states[k:] + states[:k], hold=0.4 + 0.1 * k))
+    return str(root)
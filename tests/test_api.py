@@ -0,0 +1,50 @@
+import random
+import sys
+
+import pytest
+
+from conftest import chord_notes, write_midi
+from midi_state_analysis.api import iter_results
+from midi_state_analysis.config import BLOCK_TRANSITION_SEQUENCE
+
+
+@pytest.fixture
+def many_files(tmp_path):
+    rng = random.Random(9)
+    paths = []
+    for k in range(24):
+        subject = f"S{k // 4:02d}"
+        path = str(tmp_path / "Daten (MIDI)" / subject / f"MIDI_{subject}_B{k % 4 + 1}.mid")
+        # Erwartete Sequenz, stellenweise durch zufällige States gestört
+        states = [BLOCK_TRANSITION_SEQUENCE[0] // 10] + [tid % 10 for tid in BLOCK_TRANSITION_SEQUENCE]
+        states = [rng.randint(1, 9) if rng.random() < 0.05 else state for state in states]
+        write_midi(path, chord_notes(states, hold=0.3, gap=0.1, stagger=0.01))
+        paths.append(path)
+    return paths
+
+
+def _frames(results):
+    return [(r.source, None if r.to_frame() is None else r.to_frame().to_csv()) for r in results]
+
+
+@pytest.mark.parametrize("features", [False, True])
+def test_thread_pool_matches_serial(many_files, features):
+    serial = _frames(iter_results(many_files, features=features))
+    # Häufige Thread-Wechsel, damit geteilter Matcher-Zustand sicher auffällt
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        threaded = _frames(iter_results(many_files, features=features, max_workers=4))
+        unordered = _frames(iter_results(many_files, features=features, max_workers=4, ordered=False))
+    finally:
+        sys.setswitchinterval(interval)
+    assert all(frame is not None for _, frame in serial)
+    assert threaded == serial
+    assert sorted(unordered) == sorted(serial)
+
+
+def test_errors_are_reported_per_file(many_files):
+    results = list(iter_results([many_files[0], ("kaputt.mid", b"keine MIDI-Datei"), many_files[1]],
+                                max_workers=2))
+    assert [r.ok for r in results] == [True, False, True]
+    assert results[1].source == "kaputt.mid" and results[1].error
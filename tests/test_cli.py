@@ -0,0 +1,42 @@
+import pytest
+
+from midi_state_analysis.cli import main
+
+
+def test_shards_merge_to_the_single_run(midi_root, tmp_path):
+    full = tmp_path / "full.csv"
+    main([midi_root, "-o", str(full)])
+    out = tmp_path / "out.csv"
+    for shard in ("1/3", "2/3", "3/3"):
+        main([midi_root, "-o", str(out), "--shard", shard])
+    # Ein Shard ohne Subjects schreibt keine Teil-CSV
+    parts = sorted(str(path) for path in tmp_path.glob("out.part-*-of-3.csv"))
+    assert len(parts) >= 2
+    merged = tmp_path / "merged.csv"
+    main(["merge", *parts, "-o", str(merged)])
+    assert merged.read_bytes() == full.read_bytes()
+
+
+@pytest.mark.parametrize("extra", [["--store", "notes.store"], ["--build-store", "notes.store"], ["--watch"]])
+def test_shard_only_for_folder_analysis(extra, capsys):
+    with pytest.raises(SystemExit) as exc:
+        main([".", "--shard", "1/2", *extra])
+    assert exc.value.code == 2
+    assert "--shard" in capsys.readouterr().err
+
+
+@pytest.mark.parametrize("argv", [[".", "--tolerance", "-1"], [".", "--tolerance", "6"],
+                                  ["pipeline", ".", "--tolerance", "7"]])
+def test_tolerance_out_of_range(argv, capsys):
+    with pytest.raises(SystemExit) as exc:
+        main(argv)
+    assert exc.value.code == 2
+    assert "--tolerance muss zwischen 0 und 5 liegen" in capsys.readouterr().err
+
+
+def test_tolerance_range_follows_custom_states(tmp_path, capsys):
+    states = tmp_path / "states.json"
+    states.write_text('{"states": {"1": ["C4", "E4", "G4"], "2": ["D4", "F4", "A4", "C5"]}}')
+    with pytest.raises(SystemExit):
+        main([".", "--states", str(states), "--tolerance", "3"])
+    assert "zwischen 0 und 2" in capsys.readouterr().err
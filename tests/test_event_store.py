@@ -0,0 +1,53 @@
+import json
+import os
+
+import numpy as np
+import pytest
+from mido import MidiFile
+
+from conftest import chord_notes, write_midi
+from midi_state_analysis.event_store import INDEX_FILE, EventStore, build_event_store
+from midi_state_analysis.midi_utils import extract_note_events
+
+
+def test_store_matches_direct_decoding(midi_root, tmp_path):
+    store_path = str(tmp_path / "notes.store")
+    assert build_event_store(midi_root, store_path) == 6
+    store = EventStore(store_path)
+    assert store.subjects == ["S01", "S02", "S03"]
+    for entry, notes in store.iter_files():
+        direct = extract_note_events(MidiFile(os.path.join(midi_root, entry["source"])))
+        for name, column in notes.items():
+            np.testing.assert_array_equal(column, direct[name])
+        block = store.block_events(entry["subject"], entry["block"])
+        np.testing.assert_array_equal(block["tick"], notes["tick"])
+
+
+def test_same_subject_in_two_folders_is_grouped(tmp_path):
+    root = tmp_path / "Daten (MIDI)"
+    for group, subject, block, states in [("A", "S01", "B1", [1, 2]), ("A", "S02", "B1", [3, 4]),
+                                          ("B", "S01", "B2", [5, 6, 7])]:
+        write_midi(str(root / group / subject / f"MIDI_{subject}_{block}.mid"), chord_notes(states))
+    store_path = str(tmp_path / "notes.store")
+    build_event_store(str(root), store_path)
+    store = EventStore(store_path)
+
+    assert sorted(store.subjects) == ["S01", "S02"]
+    s01 = store.subject_events("S01")
+    assert len(s01["pitch"]) == 2 * 6 * (2 + 3)
+    assert len(store.block_events("S01", "B1")["pitch"]) == 2 * 6 * 2
+    assert len(store.block_events("S01", "B2")["pitch"]) == 2 * 6 * 3
+
+
+def test_interleaved_index_is_rejected(midi_root, tmp_path):
+    store_path = str(tmp_path / "notes.store")
+    build_event_store(midi_root, store_path)
+    index_path = os.path.join(store_path, INDEX_FILE)
+    with open(index_path, encoding="utf-8") as fh:
+        index = json.load(fh)
+    files = index["files"]
+    files[1], files[2] = files[2], files[1]  # S01, S02, S01, ...
+    with open(index_path, "w", encoding="utf-8") as fh:
+        json.dump(index, fh)
+    with pytest.raises(ValueError, match="nicht zusammenhängend"):
+        EventStore(store_path)
@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+import pytest
+import statsmodels.formula.api as smf
+
+from midi_state_analysis.mixed_model import fit_mixed_model
+
+
+def _table():
+    rng = np.random.default_rng(8)
+    rows = []
+    for s in range(10):
+        offset = rng.normal(0, 0.2)
+        for block, shift in [("Pretest", 0.4), ("B1", 0.2), ("Posttest", 0.0)]:
+            for freq, extra in [("h", 0.0), ("s", 0.1)]:
+                for value in 1.0 + offset + shift + extra + rng.normal(0, 0.15, rng.integers(2, 6)):
+                    rows.append((f"S{s:02d}", block, freq, value))
+    return pd.DataFrame(rows, columns=["subject", "block", "state_from_freq", "transition_time_s"])
+
+
+@pytest.mark.parametrize("reml", [True, False])
+def test_matches_statsmodels_mixedlm(reml):
+    df = _table()
+    result = fit_mixed_model(df, reml=reml)
+    assert result.blocks == ["Pretest", "B1", "Posttest"]
+
+    cells = [f"{block}/{freq}" for block in result.blocks for freq in result.freqs]
+    data = df.assign(cell=pd.Categorical(df["block"] + "/" + df["state_from_freq"], categories=cells))
+    reference = smf.mixedlm("transition_time_s ~ 0 + cell", data, groups=data["subject"]).fit(reml=reml)
+    fe = reference.fe_params.to_numpy()
+
+    np.testing.assert_allclose(result.cell_means, fe, rtol=1e-5)
+    np.testing.assert_allclose(result.sigma2, reference.scale, rtol=1e-4)
+    np.testing.assert_allclose(result.sigma2_subject, float(reference.cov_re.iloc[0, 0]), rtol=1e-3)
+    np.testing.assert_allclose(result.cov, reference.cov_params().to_numpy()[:len(fe), :len(fe)], rtol=1e-3)
+    np.testing.assert_allclose(result.loglik, reference.llf, rtol=1e-6)
+    effects = pd.Series({subject: float(value.iloc[0]) for subject, value in reference.random_effects.items()})
+    np.testing.assert_allclose(result.subject_effects[effects.index], effects, atol=1e-5)
+
+
+def test_empty_cell_is_rejected():
+    df = _table()
+    df = df[~((df["block"] == "B1") & (df["state_from_freq"] == "s"))]
+    with pytest.raises(ValueError, match="B1/s"):
+        fit_mixed_model(df)
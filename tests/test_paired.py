@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from midi_state_analysis.paired import paired_tests
+
+
+def _table():
+    rng = np.random.default_rng(7)
+    rows = []
+    for s in range(12):
+        for tid, effect in [(12, 0.15), (23, 0.0), (34, 0.3)]:
+            for block, shift in [("Pretest", effect), ("B1", 0.5), ("Posttest", 0.0)]:
+                if tid == 34 and block == "Posttest" and s < 3:
+                    continue  # Subject fehlt im Posttest
+                for value in 1.0 + shift + rng.normal(0, 0.1, 3):
+                    rows.append((f"S{s:02d}", block, tid, value))
+    return pd.DataFrame(rows, columns=["subject", "block", "transition_id", "transition_time_s"])
+
+
+def test_matches_scipy():
+    df = _table()
+    result = paired_tests(df).set_index("transition_id")
+    means = df.groupby(["transition_id", "subject", "block"])["transition_time_s"].mean().unstack("block")
+    for tid, row in result.iterrows():
+        pairs = means.loc[tid].dropna(subset=["Pretest", "Posttest"])
+        pre, post = pairs["Pretest"].to_numpy(), pairs["Posttest"].to_numpy()
+        assert row["n_subjects"] == len(pairs)
+        rel = stats.ttest_rel(pre, post)
+        np.testing.assert_allclose([row["t"], row["p_t"]], [rel.statistic, rel.pvalue], rtol=1e-9)
+        ci = rel.confidence_interval()
+        np.testing.assert_allclose([row["ci_lower_s"], row["ci_upper_s"]], [ci.low, ci.high], rtol=1e-9)
+        wil = stats.wilcoxon(pre, post)
+        np.testing.assert_allclose([row["wilcoxon_w"], row["p_wilcoxon"]], [wil.statistic, wil.pvalue], rtol=1e-9)
+        # KI von dz: Nichtzentralitätsparameter, für den t_obs auf dem Rand liegt
+        n = len(pairs)
+        for bound, q in [(row["dz_ci_lower"], 0.975), (row["dz_ci_upper"], 0.025)]:
+            np.testing.assert_allclose(stats.nct.cdf(row["t"], n - 1, bound * np.sqrt(n)), q, atol=1e-6)
+
+
+def test_wilcoxon_with_ties_and_zeros():
+    pre = np.array([1.0, 1.2, 1.2, 1.5, 1.1, 1.3, 1.3, 1.0])
+    post = np.array([1.0, 1.0, 1.0, 1.1, 1.2, 1.0, 1.0, 1.1])
+    df = pd.DataFrame({
+        "subject": np.tile([f"S{s}" for s in range(8)], 2),
+        "block": np.repeat(["Pretest", "Posttest"], 8),
+        "transition_id": 12,
+        "transition_time_s": np.concatenate([pre, post]),
+    })
+    row = paired_tests(df).iloc[0]
+    wil = stats.wilcoxon(pre, post)
+    np.testing.assert_allclose([row["wilcoxon_w"], row["p_wilcoxon"]], [wil.statistic, wil.pvalue], rtol=1e-9)
@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+from scipy import stats
+from statsmodels.stats.multicomp import pairwise_tukeyhsd
+from statsmodels.stats.multitest import multipletests
+
+from midi_state_analysis.posthoc import pairwise_posthoc
+
+
+def _table():
+    rng = np.random.default_rng(4)
+    sizes = {12: 9, 23: 7, 34: 8, 45: 1, 56: 6}  # 45: nur ein Wert
+    values = [rng.normal(1.0 + 0.05 * k, 0.1 + 0.03 * k, n) for k, n in enumerate(sizes.values())]
+    return pd.DataFrame({
+        "block": "B1",
+        "transition_id": np.repeat(list(sizes), list(sizes.values())),
+        "transition_time_s": np.concatenate(values),
+    })
+
+
+def test_matches_statsmodels_and_scipy():
+    df = _table()
+    result = pairwise_posthoc(df, ["block"]).set_index(["transition_id_a", "transition_id_b"])
+    assert 45 not in result.index.get_level_values(0).union(result.index.get_level_values(1))
+    assert len(result) == 6
+
+    tukey = pairwise_tukeyhsd(df["transition_time_s"], df["transition_id"])
+    groups = tukey.groupsunique
+    pairs = [(a, b) for i, a in enumerate(groups) for b in groups[i + 1:]]
+    compared = 0
+    for (a, b), p, (low, high) in zip(pairs, tukey.pvalues, tukey.confint):
+        if (a, b) not in result.index:
+            continue
+        compared += 1
+        row = result.loc[(a, b)]
+        np.testing.assert_allclose(row["tukey_p"], p, atol=1e-4)
+        np.testing.assert_allclose([row["tukey_ci_low"], row["tukey_ci_high"]], [low, high], atol=1e-4)
+    assert compared == 6
+
+    by_id = dict(tuple(df.groupby("transition_id")["transition_time_s"]))
+    for (a, b), row in result.iterrows():
+        xa, xb = by_id[a].to_numpy(), by_id[b].to_numpy()
+        welch = stats.ttest_ind(xb, xa, equal_var=False)
+        np.testing.assert_allclose([row["welch_t"], row["welch_p"]], [welch.statistic, welch.pvalue], rtol=1e-9)
+        se = np.sqrt(xa.var(ddof=1) / len(xa) + xb.var(ddof=1) / len(xb))
+        q = abs(xb.mean() - xa.mean()) / se * np.sqrt(2)
+        # Games-Howell: k = Gruppen mit Varianz (ohne die n=1-Gruppe)
+        np.testing.assert_allclose(row["gh_p"], stats.studentized_range.sf(q, 4, row["welch_df"]), atol=1e-5)
+
+    holm = multipletests(result["welch_p"], method="holm")[1]
+    np.testing.assert_allclose(result["welch_p_holm"], holm, rtol=1e-12)
+
+
+def test_zero_variance_pairs_are_nan_and_not_counted_by_holm():
+    df = pd.concat([_table(), pd.DataFrame({"block": "B1", "transition_id": [67, 67, 78, 78],
+                                            "transition_time_s": [2.0, 2.0, 2.0, 2.0]})])
+    result = pairwise_posthoc(df, ["block"]).set_index(["transition_id_a", "transition_id_b"])
+    const = result.loc[(67, 78)]
+    assert np.isnan(const["welch_p"]) and np.isnan(const["gh_p"]) and np.isnan(const["welch_p_holm"])
+
+    finite = result["welch_p"].notna()
+    holm = multipletests(result.loc[finite, "welch_p"], method="holm")[1]
+    np.testing.assert_allclose(result.loc[finite, "welch_p_holm"], holm, rtol=1e-12)
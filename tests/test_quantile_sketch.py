@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+
+from midi_state_analysis.quantile_sketch import TDigest, TransitionSketches
+
+QUANTILES = [0.0, 0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99, 1.0]
+
+
+def test_lossless_digest_reproduces_numpy():
+    values = np.random.default_rng(0).lognormal(size=50)
+    digest = TDigest()
+    digest.update(values)
+    np.testing.assert_allclose(digest.quantile(QUANTILES), np.quantile(values, QUANTILES), rtol=1e-12)
+
+
+def test_merged_digests_track_numpy_in_the_tails():
+    rng = np.random.default_rng(1)
+    parts = [rng.lognormal(sigma=0.6, size=20_000) for _ in range(10)]
+    digest = TDigest()
+    for part in parts:
+        shard = TDigest()
+        shard.update(part)
+        digest.merge(shard)
+    values = np.concatenate(parts)
+    assert digest.count == values.size
+    assert len(digest.means) < 1000
+    for q, tol in [(0.5, 0.005), (0.9, 0.01), (0.99, 0.02), (0.999, 0.05)]:
+        expected = np.quantile(values, q)
+        assert abs(digest.quantile(q) - expected) / expected < tol, q
+
+
+def test_summary_after_save_and_load(tmp_path):
+    rng = np.random.default_rng(2)
+    df = pd.DataFrame({
+        "transition_id": np.repeat([12, 23], 40),
+        "block": "B1",
+        "state_from_freq": "high",
+        "transition_time_s": rng.gamma(2.0, 0.3, size=80),
+    })
+    sketches = TransitionSketches()
+    sketches.update_from_frame(df)
+    path = str(tmp_path / "x.sketches.json")
+    sketches.save(path)
+    summary = TransitionSketches.load(path).summary(["transition_id"]).set_index("transition_id")
+
+    for tid, values in df.groupby("transition_id")["transition_time_s"]:
+        row = summary.loc[tid]
+        q1, q3 = np.quantile(values, [0.25, 0.75])
+        assert row["n"] == len(values)
+        np.testing.assert_allclose(row["p50_s"], values.median(), rtol=1e-12)
+        np.testing.assert_allclose(row["std_s"], values.std(), rtol=1e-9)
+        np.testing.assert_allclose(row["fence_high_s"], min(values.max(), q3 + 1.5 * (q3 - q1)), rtol=1e-12)
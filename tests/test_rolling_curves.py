@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+
+from midi_state_analysis.rolling_curves import rolling_curves
+
+
+def _table():
+    rng = np.random.default_rng(6)
+    frames = []
+    for subject in ["S01", "S02"]:
+        for block in ["B1", "B2"]:
+            idx = np.arange(40)
+            keep = rng.random(40) > 0.25  # Lücken, z.B. nach Ausreißer-Entfernung
+            frames.append(pd.DataFrame({
+                "subject": subject,
+                "block": block,
+                "idx_from": idx[keep],
+                "transition_id": 12,
+                "transition_time_s": 1.0 + np.exp(-idx[keep] / 8) + rng.normal(0, 0.05, keep.sum()),
+            }))
+    return pd.concat(frames).sample(frac=1, random_state=0)
+
+
+def test_matches_pandas_rolling_over_idx_from():
+    df = _table()
+    window, min_periods = 6, 3
+    curves = rolling_curves(df, window=window, min_periods=min_periods)
+    assert len(curves) == len(df)
+    assert (curves["position"] == curves["idx_from"]).all()
+
+    for (subject, block), group in df.groupby(["subject", "block"]):
+        series = group.set_index("idx_from")["transition_time_s"].sort_index()
+        full = series.reindex(range(series.index.max() + 1))
+        rolling = full.rolling(window, min_periods=min_periods)
+        got = curves[(curves["subject"] == subject) & (curves["block"] == block)].set_index("idx_from")
+        np.testing.assert_allclose(got["rolling_mean_s"], rolling.mean()[series.index], rtol=1e-12)
+        np.testing.assert_allclose(got["rolling_median_s"], rolling.median()[series.index], rtol=1e-12)
+        np.testing.assert_array_equal(got["n_window"], full.rolling(window, min_periods=0).count()[series.index])
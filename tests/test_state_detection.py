@@ -0,0 +1,45 @@
+import numpy as np
+from mido import MidiFile
+
+from conftest import TICKS_PER_S, write_midi
+from midi_state_analysis.config import STATE_DEFS
+from midi_state_analysis.midi_utils import extract_note_events
+from midi_state_analysis.state_detection import detect_states_in_midi, detect_states_with_features
+
+STAGGER = 4 / TICKS_PER_S
+
+
+def _features(path):
+    notes = extract_note_events(MidiFile(path))
+    events = detect_states_with_features(notes["time_s"], notes["pitch"], notes["is_on"], notes["velocity"])
+    return events, events.features
+
+
+def test_shared_keys_stay_with_the_previous_chord(tmp_path):
+    # State 1 aufbauen, G4 (67) gegen E4 (64) tauschen -> State 8; die übrigen fünf Tasten
+    # bleiben gedrückt und gehören weiter zum Event von State 1
+    state_1 = sorted(STATE_DEFS[1])
+    assert STATE_DEFS[8] == STATE_DEFS[1] - {67} | {64}
+    notes = [(pitch, 1.5 + i * STAGGER, 2.0 if pitch == 67 else 3.0, 60) for i, pitch in enumerate(state_1)]
+    notes.append((64, 2.0, 3.0, 100))
+    path = str(tmp_path / "MIDI_S01_B1.mid")
+    write_midi(path, notes)
+
+    events, features = _features(path)
+    assert events.state.tolist() == [1, 8]
+    np.testing.assert_allclose(features["first_onset_s"], [1.5, 2.0])
+    np.testing.assert_allclose(features["onset_asynchrony_s"], [5 * STAGGER, 0.0])
+    np.testing.assert_allclose(features["mean_velocity"], [60.0, 100.0])
+    np.testing.assert_allclose(features["release_first_s"], [2.0, 3.0])
+    np.testing.assert_allclose(features["release_last_s"], [3.0, 3.0])
+
+
+def test_features_do_not_change_detection(midi_root):
+    path = f"{midi_root}/S02/MIDI_S02_B2.mid"
+    events, features = _features(path)
+    plain = detect_states_in_midi(MidiFile(path))
+    expected = plain.to_frame()
+    assert events.to_frame()[expected.columns].equals(expected)
+    assert all(len(values) == len(events.state) for values in features.values())
+    assert np.all(features["onset_asynchrony_s"] >= 0)
+
@@ -0,0 +1,62 @@
+import random
+
+import numpy as np
+
+from conftest import chord_notes
+from midi_state_analysis.config import STATE_DEFS
+from midi_state_analysis.state_detection import detect_states_from_notes
+from midi_state_analysis.state_matcher import StateMatcher
+
+
+def _random_vocabulary(rng, n_states, pitches=range(48, 84)):
+    return {state: set(rng.sample(list(pitches), rng.randint(3, 7))) for state in range(1, n_states + 1)}
+
+
+def _brute_force_near_miss(matcher, mask):
+    best, best_distance = None, matcher.tolerance + 1
+    for rank, state_mask in enumerate(matcher.masks):
+        distance = (mask ^ state_mask).bit_count()
+        if distance < best_distance:
+            best, best_distance = rank, distance
+    return (best, best_distance) if best is not None else (None, 0)
+
+
+def test_near_miss_matches_brute_force():
+    rng = random.Random(3)
+    matcher = StateMatcher(_random_vocabulary(rng, 200), tolerance=2)
+    pitches = list(range(48, 84))
+    for _ in range(5000):
+        note = rng.choice(pitches)
+        if note in matcher.pressed:
+            matcher.release(note)
+        else:
+            matcher.press(note)
+        mask = sum(1 << note for note in matcher.pressed)
+        assert matcher.near_miss(mask) == _brute_force_near_miss(matcher, mask)
+
+
+def _as_arrays(notes):
+    events = sorted([(on, 1, pitch) for pitch, on, _, _ in notes] + [(off, 0, pitch) for pitch, _, off, _ in notes])
+    time_s = np.array([e[0] for e in events])
+    is_on = np.array([e[1] == 1 for e in events])
+    pitch = np.array([e[2] for e in events])
+    return time_s, pitch, is_on
+
+
+def test_scan_and_index_paths_agree():
+    rng = random.Random(5)
+    states = [rng.randint(1, 9) for _ in range(60)]
+    notes = chord_notes(states, stagger=0.01)
+    # Fehltöne und überlappende Akkorde
+    notes += [(50, 1.0 + 0.7 * k, 1.3 + 0.7 * k, 60) for k in range(0, 60, 7)]
+    notes += [(65, 2.0 + 0.7 * k, 2.9 + 0.7 * k, 60) for k in range(0, 60, 5)]
+    arrays = _as_arrays(notes)
+
+    scan = StateMatcher(STATE_DEFS)
+    index = StateMatcher(STATE_DEFS)
+    assert scan.scan
+    index.scan = False
+    expected = detect_states_from_notes(*arrays, matcher=index).to_frame()
+    result = detect_states_from_notes(*arrays, matcher=scan).to_frame()
+    assert len(expected) > 0
+    assert result.equals(expected)
@@ -0,0 +1,49 @@
+import pandas as pd
+import pytest
+
+from midi_state_analysis.transition_data import load_transitions, locate_transition_csv
+
+
+def _table(n):
+    return pd.DataFrame({
+        "idx_from": range(n),
+        "state_from": [1] * n,
+        "onset_from_s": [0.5 * k for k in range(n)],
+        "idx_to": range(1, n + 1),
+        "state_to": [2] * n,
+        "onset_to_s": [0.5 * k + 0.4 for k in range(n)],
+        "transition_time_s": [0.4] * (n - 1) + [None],
+        "transition_id": [12] * n,
+        "state_from_freq": ["high"] * n,
+        "subject": ["S01"] * n,
+        "block": ["Pretest", "B1", "B2", "Posttest"] * (n // 4),
+    })
+
+
+def test_load_applies_schema_and_block_type(tmp_path):
+    path = tmp_path / "MIDI_ANALYSIS_STATES.csv"
+    _table(8).to_csv(path, index=False)
+    df = load_transitions(str(path))
+    assert len(df) == 7  # Zeile ohne Übergangszeit verworfen
+    assert df["state_from"].dtype == "int8"
+    assert df["transition_id"].dtype == "int16"
+    assert isinstance(df["block"].dtype, pd.CategoricalDtype)
+    assert df.groupby("block", observed=True)["block_type"].first().to_dict() == {
+        "B1": "Training", "B2": "Training", "Posttest": "Test", "Pretest": "Test"}
+
+
+def test_cache_follows_file_changes(tmp_path):
+    path = tmp_path / "MIDI_ANALYSIS_STATES.csv"
+    _table(8).to_csv(path, index=False)
+    first = load_transitions(str(path))
+    first["extra"] = 1
+    assert "extra" not in load_transitions(str(path)).columns
+    _table(12).to_csv(path, index=False)
+    assert len(load_transitions(str(path))) == 11
+
+
+def test_missing_explicit_path_raises(tmp_path, monkeypatch):
+    _table(4).to_csv(tmp_path / "MIDI_ANALYSIS_STATES.csv", index=False)
+    monkeypatch.chdir(tmp_path)
+    with pytest.raises(FileNotFoundError):
+        locate_transition_csv(str(tmp_path / "other.csv"))
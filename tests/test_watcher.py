@@ -0,0 +1,48 @@
+import os
+import threading
+
+import pandas as pd
+
+from conftest import chord_notes, write_midi
+from midi_state_analysis import watcher
+from midi_state_analysis.watcher import append_rows, scan_midi_files, watch_folder
+
+
+def test_append_rows_survives_short_writes(tmp_path, monkeypatch):
+    path = str(tmp_path / "out.csv")
+    pd.DataFrame({"a": [1], "b": ["x"]}).to_csv(path, index=False, encoding="utf-8-sig")
+    real_write = os.write
+    monkeypatch.setattr(watcher.os, "write", lambda fd, data: real_write(fd, bytes(data[:5])))
+
+    append_rows(pd.DataFrame({"b": ["y", "z"], "a": [2, 3]}), path)
+    df = pd.read_csv(path, encoding="utf-8-sig")
+    assert df.to_dict("list") == {"a": [1, 2, 3], "b": ["x", "y", "z"]}
+
+
+def test_watch_appends_only_new_files(midi_root, tmp_path):
+    output = str(tmp_path / "out.csv")
+    subject_dir = os.path.join(midi_root, "S04")
+    seen = []
+    stop = threading.Event()
+
+    def on_file(path, n_rows):
+        seen.append((os.path.basename(path), n_rows))
+        stop.set()
+
+    thread = threading.Thread(target=watch_folder, args=(midi_root, output),
+                              kwargs=dict(poll_interval=0.05, settle_time=0.1, use_inotify=False,
+                                          stop=stop, on_file=on_file, known=scan_midi_files(midi_root)))
+    thread.start()
+    try:
+        # Bereits vorhandene Datei neu schreiben: wird nicht angehängt
+        write_midi(os.path.join(midi_root, "S01", "MIDI_S01_B1.mid"), chord_notes([3, 4, 5]))
+        write_midi(os.path.join(subject_dir, "MIDI_S04_B1.mid"), chord_notes([1, 2, 3, 4]))
+        assert stop.wait(10)
+    finally:
+        stop.set()
+        thread.join(10)
+
+    assert seen[0][0] == "MIDI_S04_B1.mid"
+    df = pd.read_csv(output, encoding="utf-8-sig")
+    assert len(df) == seen[0][1] > 0
+    assert set(df["subject"]) == {"S04"}